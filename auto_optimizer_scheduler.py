@@ -23,6 +23,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 SCHEDULE_FILE = os.path.join(PROJECT_ROOT, 'artifacts', 'results', 'optimizer_schedule.json')
+CONFIGS_DIR = os.path.join(PROJECT_ROOT, 'src', 'dbot', 'strategy', 'configs')
+
+# Optimizer-Zeitraum je Timeframe (wie run_pipeline.sh mit automatischem Startdatum)
+LOOKBACK_DAYS = {'5m': 60, '15m': 60, '30m': 365, '1h': 365, '2h': 730, '4h': 730}
 
 
 def get_schedule():
@@ -59,6 +63,25 @@ def mark_done(symbol, timeframe):
     save_schedule(schedule)
 
 
+def label_args(symbol, timeframe):
+    """
+    seq_len / horizon / neutral_zone aus der Strategie-Config (von der Grid-Suche gewählt),
+    damit Re-Training und Warm-Start dieselben Labels nutzen wie das Live-Modell.
+    """
+    safe_name = f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
+    config_path = os.path.join(CONFIGS_DIR, f"config_{safe_name}_lstm.json")
+    if not os.path.exists(config_path):
+        return []
+    with open(config_path) as f:
+        model_cfg = json.load(f).get('model', {})
+    args = []
+    for key, flag in (('sequence_length', '--seq-len'), ('horizon_candles', '--horizon'),
+                      ('neutral_zone_pct', '--neutral-zone')):
+        if key in model_cfg:
+            args += [flag, str(model_cfg[key])]
+    return args
+
+
 def main():
     settings_file = os.path.join(PROJECT_ROOT, 'settings.json')
     if not os.path.exists(settings_file):
@@ -76,6 +99,11 @@ def main():
     interval_days = opt_settings.get('interval_days', 7)
     start_capital = opt_settings.get('start_capital', 1000)
     n_trials = opt_settings.get('num_trials', 100)
+    # 'bf16' = Re-Training unter Autocast (vorher mit dbot.analysis.benchmark --precision prüfen)
+    precision = opt_settings.get('precision', 'fp32')
+    # Warm-Start: bestehendes Modell auf den neuen Kerzen weitertrainieren (Fallback: volles Training)
+    finetune = opt_settings.get('finetune', True)
+    val_split = opt_settings.get('val_split', 0.2)
 
     active_strategies = settings.get('live_trading_settings', {}).get('active_strategies', [])
 
@@ -96,25 +124,36 @@ def main():
 
         import subprocess
 
-        # Schritt 1: Modell trainieren
+        # Schritt 1: Modell trainieren (bzw. weitertrainieren)
+        labels = label_args(symbol, timeframe)
         train_cmd = [
             python_executable,
             os.path.join(PROJECT_ROOT, 'train_model.py'),
             '--symbol', symbol, '--timeframe', timeframe,
+            '--precision', precision,
+            *labels,
         ]
+        if finetune:
+            train_cmd.append('--finetune')
         logger.info(f"Training: {' '.join(train_cmd)}")
         result = subprocess.run(train_cmd, capture_output=True, text=True, timeout=3600)
         if result.returncode != 0:
             logger.error(f"Training fehlgeschlagen für {symbol}: {result.stderr}")
             continue
 
-        # Schritt 2: Optimizer
+        # Schritt 2: Optimizer (nutzt das eben gespeicherte Modell, kein Re-Training)
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=LOOKBACK_DAYS.get(timeframe, 1095))
         opt_cmd = [
             python_executable,
             '-m', 'dbot.analysis.optimizer',
-            '--symbol', symbol, '--timeframe', timeframe,
+            '--symbols', symbol, '--timeframes', timeframe,
+            '--start-date', start_date.strftime('%Y-%m-%d'),
+            '--end-date', end_date.strftime('%Y-%m-%d'),
             '--trials', str(n_trials),
             '--start-capital', str(start_capital),
+            '--val-split', str(val_split),
+            *labels,
         ]
         logger.info(f"Optimizer: {' '.join(opt_cmd)}")
         result = subprocess.run(opt_cmd, capture_output=True, text=True, timeout=3600,
@@ -14,7 +14,7 @@ echo -e "=======================================================${NC}"
 
 VENV_PATH=".venv/bin/activate"
 PYTHON=".venv/bin/python3"
-OPTIMIZER="src/dbot/analysis/optimizer.py"
+GRID_RUNNER="src/dbot/analysis/grid.py"
 
 if [ ! -f "$VENV_PATH" ]; then
     echo -e "${RED}Fehler: Virtuelle Umgebung nicht gefunden. Bitte install.sh ausführen.${NC}"
@@ -30,7 +30,7 @@ read -p "Dies wird für einen kompletten Neustart empfohlen. (j/n) [Standard: n]
 if [[ "$CLEANUP_CHOICE" == "j" || "$CLEANUP_CHOICE" == "J" ]]; then
     echo -e "${YELLOW}Lösche alte Konfigurationen (config_*_lstm.json) und Modelle...${NC}"
     rm -f src/dbot/strategy/configs/config_*_lstm.json
-    rm -f artifacts/models/*.pt artifacts/models/*.pkl
+    rm -f artifacts/models/*.pt artifacts/models/*.npz artifacts/models/*.pkl artifacts/models/*.onnx
     echo -e "${GREEN}✔ Aufräumen abgeschlossen.${NC}"
 else
     echo -e "${GREEN}✔ Alte Konfigurationen werden beibehalten.${NC}"
@@ -77,6 +77,18 @@ HORIZONS=(3 5 10)
 NEUTRAL_ZONES=(0.2 0.3 0.5)
 TOTAL_COMBOS=$((${#HORIZONS[@]} * ${#NEUTRAL_ZONES[@]}))
 
+echo -e "\n${YELLOW}Multi-Head-Modell: ein Training mit einem Kopf je Kombination statt $TOTAL_COMBOS Einzel-Trainings?${NC}"
+read -p "(j/n) [Standard: j]: " MULTIHEAD_CHOICE; MULTIHEAD_CHOICE=${MULTIHEAD_CHOICE:-j}
+read -p "Parallele Worker für das Grid [Standard: auto]: " GRID_WORKERS; GRID_WORKERS=${GRID_WORKERS:-auto}
+
+GRID_ARGS=()
+if [[ "$MULTIHEAD_CHOICE" == "j" || "$MULTIHEAD_CHOICE" == "J" ]]; then
+    GRID_ARGS+=(--multihead)
+fi
+if [ "$GRID_WORKERS" != "auto" ]; then
+    GRID_ARGS+=(--workers "$GRID_WORKERS")
+fi
+
 # --- Schleife über Symbole und Zeitrahmen ---
 for symbol in $SYMBOLS; do
     FULL_SYMBOL="${symbol}/USDT:USDT"
@@ -97,64 +109,33 @@ for symbol in $SYMBOLS; do
             FINAL_START_DATE=$START_DATE_INPUT
         fi
 
-        SAFE_NAME="${symbol}USDTUSDT_${timeframe}"
-        CONFIG_FILE="src/dbot/strategy/configs/config_${SAFE_NAME}_lstm.json"
-        BEST_PNL="-9999"
-        COMBO_IDX=0
-
         echo -e "\n${BLUE}=======================================================${NC}"
         echo -e "${BLUE}  Pipeline für: $FULL_SYMBOL ($timeframe)${NC}"
         echo -e "${BLUE}  Datenzeitraum: $FINAL_START_DATE bis $END_DATE${NC}"
         echo -e "${BLUE}  Grid-Suche: ${#HORIZONS[@]} Horizonte × ${#NEUTRAL_ZONES[@]} Zonen = $TOTAL_COMBOS Kombinationen${NC}"
         echo -e "${BLUE}=======================================================${NC}"
 
-        for H in "${HORIZONS[@]}"; do
-            for N in "${NEUTRAL_ZONES[@]}"; do
-                COMBO_IDX=$((COMBO_IDX + 1))
-                echo -e "\n${YELLOW}[$COMBO_IDX/$TOTAL_COMBOS] Testing horizon=$H | neutral_zone=${N}%${NC}"
-
-                PYTHONPATH="$SCRIPT_DIR/src" "$PYTHON" "$OPTIMIZER" \
-                    --symbols "$FULL_SYMBOL" \
-                    --timeframes "$timeframe" \
-                    --start-date "$FINAL_START_DATE" \
-                    --end-date "$END_DATE" \
-                    --start-capital "$START_CAPITAL" \
-                    --epochs 50 \
-                    --trials "$N_TRIALS" \
-                    --horizon "$H" \
-                    --neutral-zone "$N" \
-                    --mode "$OPTIM_MODE_ARG" \
-                    --max-drawdown "$MAX_DD" \
-                    --min-win-rate "$MIN_WR" \
-                    --min-pnl "$MIN_PNL" \
-                    --force-retrain
-
-                if [ $? -ne 0 ]; then
-                    echo -e "${RED}❌ Fehler bei horizon=$H neutral_zone=$N. Überspringe...${NC}"
-                    continue
-                fi
-
-                # PnL aus gespeicherter Config lesen und mit bisherigem Besten vergleichen
-                if [ -f "$CONFIG_FILE" ]; then
-                    NEW_PNL=$("$PYTHON" -c "import json; c=json.load(open('$CONFIG_FILE')); print(c.get('_backtest_metrics',{}).get('pnl_pct',-9999))")
-                    IS_BETTER=$("$PYTHON" -c "print(1 if float('${NEW_PNL}') > float('${BEST_PNL}') else 0)")
-                    if [ "$IS_BETTER" == "1" ]; then
-                        BEST_PNL=$NEW_PNL
-                        cp "$CONFIG_FILE" "${CONFIG_FILE}.best"
-                        echo -e "${GREEN}  ✔ Neue beste Kombination! horizon=$H | neutral_zone=${N}% | PnL=$BEST_PNL%${NC}"
-                    else
-                        echo -e "  → PnL=$NEW_PNL% (kein Fortschritt, Bestes bisher: $BEST_PNL%)"
-                    fi
-                fi
-            done
-        done
-
-        # Beste Config als finale Config setzen
-        if [ -f "${CONFIG_FILE}.best" ]; then
-            mv "${CONFIG_FILE}.best" "$CONFIG_FILE"
-            echo -e "\n${GREEN}✔ Beste Config gespeichert: $FULL_SYMBOL ($timeframe) | PnL=$BEST_PNL%${NC}"
-        else
+        # Alle Kombinationen parallel (Prozess-Pool); die beste wird als Modell + Config übernommen
+        PYTHONPATH="$SCRIPT_DIR/src" "$PYTHON" "$GRID_RUNNER" \
+            --symbols "$FULL_SYMBOL" \
+            --timeframes "$timeframe" \
+            --start-date "$FINAL_START_DATE" \
+            --end-date "$END_DATE" \
+            --horizons "${HORIZONS[@]}" \
+            --neutral-zones "${NEUTRAL_ZONES[@]}" \
+            --start-capital "$START_CAPITAL" \
+            --epochs 50 \
+            --trials "$N_TRIALS" \
+            --mode "$OPTIM_MODE_ARG" \
+            --max-drawdown "$MAX_DD" \
+            --min-win-rate "$MIN_WR" \
+            --min-pnl "$MIN_PNL" \
+            "${GRID_ARGS[@]}"
+
+        if [ $? -ne 0 ]; then
             echo -e "${RED}❌ Keine valide Config gefunden für $FULL_SYMBOL ($timeframe)${NC}"
+        else
+            echo -e "\n${GREEN}✔ Beste Config gespeichert: $FULL_SYMBOL ($timeframe)${NC}"
         fi
     done
 done
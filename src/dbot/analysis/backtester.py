@@ -12,10 +12,13 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from dbot.model.feature_engineering import (
-    compute_features, create_labels, build_sequences, apply_scaler, load_scaler, FEATURE_NAMES
+    compute_features, create_labels, build_sequences, apply_scaler, load_scaler, set_feature_dtype,
+    FEATURE_NAMES,
 )
 from dbot.model.trainer import load_model
-from dbot.model.predictor import LSTMPredictor
+from dbot.model.predictor import LSTMPredictor, predictor_options
+from dbot.model.feature_store import FeatureStore
+from dbot.analysis.evaluation import signals_from_probs
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,8 @@ def run_backtest(
     config: dict,
     start_capital: float = 1000.0,
     verbose: bool = True,
+    feature_df: pd.DataFrame = None,
+    probs: np.ndarray = None,
 ) -> dict:
     """
     Führt einen Backtest mit LSTM-Signalen durch.
@@ -49,6 +54,8 @@ def run_backtest(
         config: Strategy-Config dict
         start_capital: Startkapital in USDT
         verbose: Ob Fortschritt geloggt werden soll
+        feature_df: Vorberechnete (unskalierte) Features für df, z.B. aus dem FeatureStore
+        probs: Vorberechnete Predictions (n - seq_len, 3), z.B. aus stacked.predict_batch_many
 
     Returns:
         dict mit Performance-Metriken
@@ -67,16 +74,16 @@ def run_backtest(
     use_shorts = config.get('behavior', {}).get('use_shorts', True)
 
     # Features + Predictions für alle Kerzen
-    feature_df = compute_features(df)
+    if feature_df is None:
+        feature_df = compute_features(df)
     if len(feature_df) < predictor.seq_len + 10:
         logger.error(f"Zu wenig Daten für Backtest: {len(feature_df)}")
         return {'error': 'insufficient_data'}
 
-    scaler = predictor.scaler
-    scaled_df = apply_scaler(feature_df, scaler)
-
     # Alle Predictions in einem Batch
-    all_probs = predictor.predict_batch(scaled_df)  # (n - seq_len, 3)
+    if probs is None:
+        probs = predictor.predict_batch(apply_scaler(feature_df, predictor.scaler))
+    all_probs = probs  # (n - seq_len, 3)
 
     # Alignment: Index der Predictions entspricht feature_df.iloc[seq_len:]
     pred_index = feature_df.index[predictor.seq_len:]
@@ -88,25 +95,9 @@ def run_backtest(
     ohlcv_pred['neutral_prob'] = all_probs[:, 1]
     ohlcv_pred['short_prob'] = all_probs[:, 2]
 
-    # Signale
-    ohlcv_pred['signal'] = 0  # 0 = neutral
-    ohlcv_pred.loc[
-        (ohlcv_pred['long_prob'] > long_threshold) &
-        (ohlcv_pred['long_prob'] > ohlcv_pred['short_prob']),
-        'signal'
-    ] = 1  # LONG
-
-    ohlcv_pred.loc[
-        (ohlcv_pred['short_prob'] > short_threshold) &
-        (ohlcv_pred['short_prob'] > ohlcv_pred['long_prob']),
-        'signal'
-    ] = -1  # SHORT
-
-    # Deaktiviere Seiten basierend auf Config
-    if not use_longs:
-        ohlcv_pred.loc[ohlcv_pred['signal'] == 1, 'signal'] = 0
-    if not use_shorts:
-        ohlcv_pred.loc[ohlcv_pred['signal'] == -1, 'signal'] = 0
+    # Signale (1 = LONG, -1 = SHORT, 0 = neutral; deaktivierte Seiten laut Config)
+    ohlcv_pred['signal'] = signals_from_probs(all_probs, long_threshold, short_threshold,
+                                              use_longs=use_longs, use_shorts=use_shorts)
 
     # Backtest-Simulation
     capital = start_capital
@@ -290,7 +281,11 @@ def main():
     parser.add_argument('--start-date', type=str, default='2022-01-01', help="Startdatum (YYYY-MM-DD)")
     parser.add_argument('--end-date', type=str, default=None, help="Enddatum (YYYY-MM-DD)")
     parser.add_argument('--data-file', type=str, help="Pfad zu lokaler CSV-Datei (optional)")
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default=None,
+                        help="Dtype für Features/Scaler (Standard: DBOT_FEATURE_DTYPE bzw. float32)")
     args = parser.parse_args()
+    if args.dtype:
+        set_feature_dtype(args.dtype)
 
     symbol = args.symbol
     timeframe = args.timeframe
@@ -301,14 +296,14 @@ def main():
 
     # Modell + Scaler laden
     model_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
-    scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.pkl")
+    scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.npz")
 
     if not os.path.exists(model_path):
         print(f"FEHLER: Modell nicht gefunden: {model_path}")
         print("Bitte zuerst ausführen: python train_model.py --symbol ... --timeframe ...")
         sys.exit(1)
 
-    predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+    predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, **predictor_options(config))
 
     # Daten laden
     if args.data_file and os.path.exists(args.data_file):
@@ -337,7 +332,8 @@ def main():
 
     # Backtest ausführen
     logger.info(f"Starte Backtest für {symbol} ({timeframe}) mit {len(df)} Kerzen...")
-    metrics = run_backtest(df, predictor, config, start_capital=args.start_capital)
+    feature_df = FeatureStore().get(symbol, timeframe, df)
+    metrics = run_backtest(df, predictor, config, start_capital=args.start_capital, feature_df=feature_df)
 
     if 'error' in metrics:
         print(f"FEHLER: {metrics['error']}")
@@ -0,0 +1,357 @@
+# src/dbot/analysis/benchmark.py
+# Vergleicht Inference-Backends (eager / TorchScript / ONNX): Latenz je Fenster und Batch-Durchsatz,
+# sowie Architekturen (LSTM / TCN): Trainings-Durchsatz und Inference-Latenz
+# und gestapelte Inference mehrerer Modelle gegenüber der Einzel-Auswertung sowie fp32 vs. bf16 (Autocast)
+# und Trainings-Loader (DataLoader/TensorDataset vs. BatchLoader)
+# Ausführung: python -m dbot.analysis.benchmark --model artifacts/models/BTCUSDTUSDT_4h.pt
+#             python -m dbot.analysis.benchmark --architectures lstm tcn
+#             python -m dbot.analysis.benchmark --stacked 4 8 16
+#             python -m dbot.analysis.benchmark --precision [--model artifacts/models/BTCUSDTUSDT_4h.pt]
+#             python -m dbot.analysis.benchmark --loader
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from dbot.model.lstm_model import create_model, CLI_MODEL_TYPES
+from dbot.model.trainer import load_model, autocast, DEVICE, PRECISIONS, STUDENT_CONFIG
+from dbot.model.dataset import WindowDataset, BatchLoader
+from dbot.model.predictor import LSTMPredictor
+from dbot.model.export import load_inference_fn, BACKENDS
+from dbot.model.feature_engineering import FEATURE_NAMES
+from dbot.model.stacked import StackedPredictor
+
+logger = logging.getLogger(__name__)
+
+
+def _timeit(fn, repeats: int) -> np.ndarray:
+    """Laufzeiten (Sekunden) von repeats Aufrufen nach einem Warmup-Aufruf."""
+    fn()
+    times = np.empty(repeats)
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - t0
+    return times
+
+
+def benchmark_backends(model_path: str, backends=BACKENDS, seq_len: int = 60,
+                       n_rows: int = 5000, repeats: int = 200, seed: int = 0) -> pd.DataFrame:
+    """
+    Misst pro Backend:
+        latency_ms     – Median der Inference für ein einzelnes Fenster (Live-Zyklus)
+        p95_ms         – 95%-Perzentil derselben Messung
+        batch_s        – predict_batch über n_rows skalierte Feature-Zeilen (Backtest)
+        windows_per_s  – Durchsatz von predict_batch
+        max_abs_diff   – größte Abweichung der Wahrscheinlichkeiten zu eager
+    """
+    model = load_model(model_path)
+    rng = np.random.default_rng(seed)
+    feature_df = pd.DataFrame(rng.standard_normal((n_rows, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+    window = feature_df.to_numpy(dtype=np.float32)[np.newaxis, -seq_len:]
+
+    reference = None
+    rows = []
+    for backend in backends:
+        infer = load_inference_fn(model_path, backend, model=model)
+        if infer.backend != backend:
+            logger.warning(f"Backend {backend} nicht verfügbar – übersprungen.")
+            continue
+        predictor = LSTMPredictor(model, None, seq_len, infer=infer, backend=backend)
+
+        single = _timeit(lambda: infer(window), repeats)
+        batch_repeats = max(3, repeats // 50)
+        batch = _timeit(lambda: predictor.predict_batch(feature_df), batch_repeats)
+
+        probs = predictor.predict_batch(feature_df)
+        if reference is None:
+            reference = probs
+        rows.append({
+            'backend': backend,
+            'latency_ms': np.median(single) * 1e3,
+            'p95_ms': np.percentile(single, 95) * 1e3,
+            'batch_s': np.median(batch),
+            'windows_per_s': len(probs) / np.median(batch),
+            'max_abs_diff': float(np.abs(probs - reference).max()),
+        })
+    return pd.DataFrame(rows).set_index('backend')
+
+
+def benchmark_architectures(model_types=tuple(CLI_MODEL_TYPES), model_config: dict = None, seq_len: int = 60,
+                            batch_size: int = 64, train_steps: int = 20, repeats: int = 200,
+                            seed: int = 0) -> pd.DataFrame:
+    """
+    Misst pro Architektur (zufällig initialisiert, gleiche Eingabe-Form wie im Training):
+        params            – Anzahl trainierbarer Parameter
+        train_samples_s   – Fenster/s für Forward + Backward + Adam-Schritt (batch_size)
+        latency_ms        – Median von predict_proba für ein einzelnes Fenster (Live-Zyklus)
+        p95_ms            – 95%-Perzentil derselben Messung
+        batch_windows_s   – Fenster/s von predict_proba mit Batches à 512 (Backtest)
+    """
+    config = model_config or {'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64}
+    n_features = len(FEATURE_NAMES)
+    rng = np.random.default_rng(seed)
+    X = torch.from_numpy(rng.standard_normal((batch_size, seq_len, n_features), dtype=np.float32)).to(DEVICE)
+    y = torch.from_numpy(rng.integers(0, 3, batch_size)).to(DEVICE)
+    window = X[:1]
+    X_batch = torch.from_numpy(rng.standard_normal((512, seq_len, n_features), dtype=np.float32)).to(DEVICE)
+
+    rows = []
+    for model_type in model_types:
+        torch.manual_seed(seed)
+        model = create_model(n_features, {**config, 'model_type': model_type}).to(DEVICE)
+        criterion = nn.CrossEntropyLoss()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+        def train_step():
+            optimizer.zero_grad()
+            loss = criterion(model(X), y)
+            loss.backward()
+            optimizer.step()
+
+        model.train()
+        train = _timeit(train_step, train_steps)
+
+        model.eval()
+        with torch.no_grad():
+            single = _timeit(lambda: model.predict_proba(window), repeats)
+            batch = _timeit(lambda: model.predict_proba(X_batch), max(3, repeats // 50))
+        rows.append({
+            'model_type': model_type,
+            'params': sum(p.numel() for p in model.parameters() if p.requires_grad),
+            'train_samples_s': batch_size / np.median(train),
+            'latency_ms': np.median(single) * 1e3,
+            'p95_ms': np.percentile(single, 95) * 1e3,
+            'batch_windows_s': len(X_batch) / np.median(batch),
+        })
+    return pd.DataFrame(rows).set_index('model_type')
+
+
+def benchmark_stacked(n_models=(4, 8, 16), model_type: str = 'lstm', model_config: dict = None,
+                      seq_len: int = 60, n_rows: int = 2000, repeats: int = 50, seed: int = 0) -> pd.DataFrame:
+    """
+    Vergleicht K einzelne Predictors mit einem StackedPredictor (zufällige Gewichte):
+        latest_seq_ms / latest_stacked_ms – letztes Fenster aller K Modelle (Live-Zyklus)
+        batch_seq_s / batch_stacked_s     – predict_batch über n_rows Zeilen je Modell (Backtest)
+        max_abs_diff                      – größte Abweichung der Wahrscheinlichkeiten
+    """
+    config = {'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64, **(model_config or {}),
+              'model_type': model_type}
+    rng = np.random.default_rng(seed)
+    rows = []
+    for k in n_models:
+        torch.manual_seed(seed)
+        predictors = [LSTMPredictor(create_model(len(FEATURE_NAMES), config).to(DEVICE), None, seq_len)
+                      for _ in range(k)]
+        frames = [pd.DataFrame(rng.standard_normal((n_rows, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+                  for _ in range(k)]
+        stacked = StackedPredictor(predictors)
+        windows = [f.to_numpy(dtype=np.float32)[np.newaxis, -seq_len:].copy() for f in frames]
+
+        latest_seq = _timeit(lambda: [p._infer(w) for p, w in zip(predictors, windows)], repeats)
+        latest_stacked = _timeit(lambda: stacked.predict_latest(frames), repeats)
+        batch_repeats = max(3, repeats // 25)
+        batch_seq = _timeit(lambda: [p.predict_batch(f) for p, f in zip(predictors, frames)], batch_repeats)
+        batch_stacked = _timeit(lambda: stacked.predict_batch(frames), batch_repeats)
+
+        reference = [p.predict_batch(f) for p, f in zip(predictors, frames)]
+        diff = max(float(np.abs(a - b).max()) for a, b in zip(reference, stacked.predict_batch(frames)))
+        rows.append({
+            'n_models': k,
+            'latest_seq_ms': np.median(latest_seq) * 1e3,
+            'latest_stacked_ms': np.median(latest_stacked) * 1e3,
+            'batch_seq_s': np.median(batch_seq),
+            'batch_stacked_s': np.median(batch_stacked),
+            'max_abs_diff': diff,
+        })
+    return pd.DataFrame(rows).set_index('n_models')
+
+
+def benchmark_precision(model_path: str = None, model_config: dict = None, seq_len: int = 60,
+                        batch_size: int = 64, train_steps: int = 20, repeats: int = 200,
+                        seed: int = 0) -> pd.DataFrame:
+    """
+    Misst pro Precision (fp32 / bf16 über Autocast):
+        train_samples_s   – Fenster/s für Forward + Backward + Adam-Schritt (Loss in fp32)
+        latency_ms        – Median von predict_proba für ein einzelnes Fenster (Live-Zyklus)
+        batch_windows_s   – Fenster/s von predict_proba mit Batches à 512 (Backtest)
+        max_abs_diff      – größte Abweichung der Wahrscheinlichkeiten zu fp32
+        argmax_agreement  – Anteil Fenster mit derselben Klasse wie fp32
+
+    Mit model_path werden die Inference-Werte mit den trainierten Gewichten gemessen
+    (Training dann auf einer Kopie), sonst mit zufällig initialisiertem LSTM.
+    """
+    n_features = len(FEATURE_NAMES)
+    rng = np.random.default_rng(seed)
+    X = torch.from_numpy(rng.standard_normal((batch_size, seq_len, n_features), dtype=np.float32)).to(DEVICE)
+    y = torch.from_numpy(rng.integers(0, 3, batch_size)).to(DEVICE)
+    window = X[:1]
+    X_batch = torch.from_numpy(rng.standard_normal((512, seq_len, n_features), dtype=np.float32)).to(DEVICE)
+
+    if model_path:
+        trained = load_model(model_path)
+        state = {k: v.clone() for k, v in trained.state_dict().items()}
+        config = {**trained.hparams, 'model_type': trained.model_type}
+    else:
+        torch.manual_seed(seed)
+        state = None
+        config = {'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64, **(model_config or {})}
+
+    reference = None
+    rows = []
+    for precision in PRECISIONS:
+        torch.manual_seed(seed)
+        model = create_model(n_features, config).to(DEVICE)
+        if state is not None:
+            model.load_state_dict(state)
+        criterion = nn.CrossEntropyLoss()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+        model.eval()
+        with torch.no_grad(), autocast(precision):
+            single = _timeit(lambda: model.predict_proba(window), repeats)
+            batch = _timeit(lambda: model.predict_proba(X_batch), max(3, repeats // 50))
+            probs = model.predict_proba(X_batch).float().cpu().numpy()
+        if reference is None:
+            reference = probs
+
+        def train_step():
+            optimizer.zero_grad()
+            with autocast(precision):
+                logits = model(X)
+            loss = criterion(logits.float(), y)
+            loss.backward()
+            optimizer.step()
+
+        model.train()
+        train = _timeit(train_step, train_steps)
+        rows.append({
+            'precision': precision,
+            'train_samples_s': batch_size / np.median(train),
+            'latency_ms': np.median(single) * 1e3,
+            'batch_windows_s': len(X_batch) / np.median(batch),
+            'max_abs_diff': float(np.abs(probs - reference).max()),
+            'argmax_agreement': float((probs.argmax(axis=1) == reference.argmax(axis=1)).mean()),
+        })
+    return pd.DataFrame(rows).set_index('precision')
+
+
+def benchmark_loader(n_samples: int = 4000, seq_len: int = 60, batch_size: int = 64, model_config: dict = None,
+                     drop_last: bool = False, repeats: int = 3, seed: int = 0) -> pd.DataFrame:
+    """
+    Misst pro Trainings-Loader eine Epoche über n_samples Fenster:
+        loader_samples_s  – Fenster/s nur für das Iterieren (Batches bilden, kein Modell)
+        epoch_samples_s   – Fenster/s für eine Trainings-Epoche (Forward + Backward + Adam)
+
+    Loader: DataLoader(TensorDataset, shuffle=True) bzw. BatchSampler + WindowDataset (bisher)
+    gegen BatchLoader auf demselben Tensor bzw. WindowDataset. Standard-Modell ist das kleine
+    Student-LSTM (STUDENT_CONFIG), bei dem der Loader-Anteil am größten ist.
+    """
+    from torch.utils.data import DataLoader, TensorDataset, BatchSampler, RandomSampler
+
+    n_features = len(FEATURE_NAMES)
+    rng = np.random.default_rng(seed)
+    features = rng.standard_normal((n_samples + seq_len, n_features), dtype=np.float32)
+    labels = rng.integers(0, 3, n_samples + seq_len)
+    window_ds = WindowDataset(features, labels, np.arange(seq_len, n_samples + seq_len), seq_len)
+    X_t = torch.from_numpy(np.ascontiguousarray(window_ds.windows(np.arange(n_samples))))
+    y_t = torch.from_numpy(window_ds.targets)
+
+    loaders = {
+        'dataloader': lambda: DataLoader(TensorDataset(X_t, y_t), batch_size=batch_size, shuffle=True,
+                                         drop_last=drop_last),
+        'batchloader': lambda: BatchLoader(X_t, y_t, batch_size=batch_size, drop_last=drop_last),
+        'dataloader_lazy': lambda: DataLoader(window_ds, batch_size=None, sampler=BatchSampler(
+            RandomSampler(window_ds), batch_size=batch_size, drop_last=drop_last)),
+        'batchloader_lazy': lambda: BatchLoader(window_ds, batch_size=batch_size, drop_last=drop_last),
+    }
+    rows = []
+    for name, make_loader in loaders.items():
+        torch.manual_seed(seed)
+        model = create_model(n_features, {**STUDENT_CONFIG, **(model_config or {})}).to(DEVICE).train()
+        criterion = nn.CrossEntropyLoss()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+        loader = make_loader()
+        seen = sum(len(y) for _, y in loader)
+
+        def iterate():
+            for X_batch, y_batch in loader:
+                X_batch.to(DEVICE), y_batch.to(DEVICE)
+
+        def epoch():
+            for X_batch, y_batch in loader:
+                optimizer.zero_grad()
+                loss = criterion(model(X_batch.to(DEVICE)), y_batch.to(DEVICE))
+                loss.backward()
+                optimizer.step()
+
+        rows.append({
+            'loader': name,
+            'loader_samples_s': seen / np.median(_timeit(iterate, repeats)),
+            'epoch_samples_s': seen / np.median(_timeit(epoch, repeats)),
+        })
+    return pd.DataFrame(rows).set_index('loader')
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="dbot Inference-Benchmark")
+    parser.add_argument('--model', type=str, help="Pfad zum .pt-Checkpoint (Backend-Vergleich)")
+    parser.add_argument('--architectures', nargs='+', choices=sorted(CLI_MODEL_TYPES), default=None,
+                        help="Architekturen vergleichen (Training + Inference) statt Backends")
+    parser.add_argument('--batch-size', type=int, default=64, help="Batch-Größe für die Trainings-Messung")
+    parser.add_argument('--stacked', nargs='+', type=int, default=None, metavar='K',
+                        help="Gestapelte Inference von K Modellen gegen K Einzel-Aufrufe messen")
+    parser.add_argument('--model-type', choices=('lstm', 'tcn'), default='lstm',
+                        help="Architektur für --stacked")
+    parser.add_argument('--precision', action='store_true',
+                        help="fp32 gegen bf16 (Autocast) vergleichen – Training und Inference, "
+                             "mit --model auf den trainierten Gewichten")
+    parser.add_argument('--loader', action='store_true',
+                        help="Trainings-Loader vergleichen: DataLoader/TensorDataset gegen BatchLoader (Samples/s)")
+    parser.add_argument('--samples', type=int, default=4000, help="Trainings-Fenster für --loader")
+    parser.add_argument('--drop-last', action='store_true', default=False,
+                        help="Unvollständigen letzten Batch verwerfen (--loader)")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--seq-len', type=int, default=60)
+    parser.add_argument('--rows', type=int, default=5000, help="Feature-Zeilen für predict_batch")
+    parser.add_argument('--repeats', type=int, default=200, help="Wiederholungen für die Latenz-Messung")
+    args = parser.parse_args()
+
+    if args.architectures:
+        result = benchmark_architectures(args.architectures, seq_len=args.seq_len,
+                                         batch_size=args.batch_size, repeats=args.repeats)
+        print(result.to_string(float_format=lambda v: f"{v:.4g}"))
+        return
+    if args.precision:
+        result = benchmark_precision(args.model, seq_len=args.seq_len, batch_size=args.batch_size,
+                                     repeats=args.repeats)
+        print(result.to_string(float_format=lambda v: f"{v:.4g}"))
+        return
+    if args.loader:
+        result = benchmark_loader(args.samples, seq_len=args.seq_len, batch_size=args.batch_size,
+                                  drop_last=args.drop_last)
+        print(result.to_string(float_format=lambda v: f"{v:.4g}"))
+        return
+    if args.stacked:
+        result = benchmark_stacked(args.stacked, args.model_type, seq_len=args.seq_len,
+                                   n_rows=args.rows, repeats=args.repeats)
+        print(result.to_string(float_format=lambda v: f"{v:.4g}"))
+        return
+    if not args.model:
+        parser.error("--model, --architectures, --stacked, --precision oder --loader angeben")
+
+    result = benchmark_backends(args.model, args.backends, args.seq_len, args.rows, args.repeats)
+    print(result.to_string(float_format=lambda v: f"{v:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
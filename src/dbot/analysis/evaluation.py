@@ -0,0 +1,236 @@
+# src/dbot/analysis/evaluation.py
+# Vergleich von Predictions (z.B. int8 vs. fp32): Wahrscheinlichkeits-Abweichung, Signal-Flips, Accuracy
+# Ausführung: python -m dbot.analysis.evaluation --symbol BTC/USDT:USDT --timeframe 4h --data-file data/BTCUSDTUSDT_4h.csv
+import os
+import sys
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from dbot.model.feature_engineering import compute_features, create_labels, apply_scaler
+from dbot.model.predictor import LSTMPredictor
+from dbot.model.export import load_inference_fn, checkpoint_metadata, BACKENDS
+from dbot.model.trainer import PRECISIONS
+
+logger = logging.getLogger(__name__)
+
+
+def signals_from_probs(probs: np.ndarray, long_threshold: float = 0.55, short_threshold: float = 0.55,
+                       use_longs: bool = True, use_shorts: bool = True) -> np.ndarray:
+    """
+    Signal je Zeile wie im Backtester: 1 = LONG, -1 = SHORT, 0 = neutral.
+
+    LONG, wenn long_prob > long_threshold und long_prob > short_prob (SHORT analog).
+    """
+    long_prob, short_prob = probs[:, 0], probs[:, 2]
+    signal = np.zeros(len(probs), dtype=np.int8)
+    if use_longs:
+        signal[(long_prob > long_threshold) & (long_prob > short_prob)] = 1
+    if use_shorts:
+        signal[(short_prob > short_threshold) & (short_prob > long_prob)] = -1
+    return signal
+
+
+def compare_predictions(ref_probs: np.ndarray, probs: np.ndarray, long_threshold: float = 0.55,
+                        short_threshold: float = 0.55, labels: np.ndarray = None) -> dict:
+    """
+    Übereinstimmung zweier Prediction-Reihen (n, 3) auf denselben Fenstern.
+
+    Returns:
+        dict mit max/mean_abs_delta (Wahrscheinlichkeiten), argmax_agreement,
+        signal_flip_rate (Anteil Kerzen mit anderem Handelssignal), Signal-Anzahlen
+        und – falls labels gegeben – der Accuracy beider Reihen.
+    """
+    if ref_probs.shape != probs.shape:
+        raise ValueError(f"Shape-Mismatch: {ref_probs.shape} vs. {probs.shape}")
+    delta = np.abs(probs - ref_probs)
+    ref_signal = signals_from_probs(ref_probs, long_threshold, short_threshold)
+    signal = signals_from_probs(probs, long_threshold, short_threshold)
+    report = {
+        'n': len(probs),
+        'max_abs_delta': float(delta.max()) if len(delta) else 0.0,
+        'mean_abs_delta': float(delta.mean()) if len(delta) else 0.0,
+        'argmax_agreement': float((probs.argmax(axis=1) == ref_probs.argmax(axis=1)).mean()),
+        'signal_flip_rate': float((signal != ref_signal).mean()),
+        'ref_signals': int((ref_signal != 0).sum()),
+        'signals': int((signal != 0).sum()),
+    }
+    if labels is not None:
+        report['ref_accuracy'] = float((ref_probs.argmax(axis=1) == labels).mean())
+        report['accuracy'] = float((probs.argmax(axis=1) == labels).mean())
+    return report
+
+
+def prediction_accuracy(predictor: LSTMPredictor, feature_df: pd.DataFrame, labels: pd.Series,
+                        start: int = None) -> dict:
+    """
+    Accuracy eines Predictors auf feature_df (unskaliert) gegen labels.
+
+    Predictions laufen über die komplette Reihe (zustandsbehaftete Modelle wärmen so
+    über die gesamte Historie auf); gewertet werden die Zeilen ab start
+    (Standard: seq_len, d.h. alle Zeilen mit vollständigem Fenster).
+    """
+    scaled = apply_scaler(feature_df, predictor.scaler)
+    probs = predictor.predict_batch(scaled)
+    pred_index = feature_df.index[predictor.seq_len:]
+    start = predictor.seq_len if start is None else max(start, predictor.seq_len)
+    probs = probs[start - predictor.seq_len:]
+    y = labels.reindex(pred_index[start - predictor.seq_len:]).to_numpy(dtype=np.float64)
+    valid = ~np.isnan(y)
+    preds = probs.argmax(axis=1)[valid]
+    return {
+        'n': int(valid.sum()),
+        'accuracy': float((preds == y[valid]).mean()) if valid.any() else float('nan'),
+        'stateful': predictor.stateful,
+    }
+
+
+def model_accuracy_report(models: dict, df: pd.DataFrame, horizon_candles: int, neutral_zone_pct: float,
+                          seq_len: int = 60, holdout: float = 0.1, backend: str = 'eager') -> pd.DataFrame:
+    """
+    Vergleicht mehrere Modelle (z.B. zustandsbehaftet vs. Fenster) auf derselben Holdout-Periode.
+
+    Args:
+        models: name -> (model_path, scaler_path)
+    """
+    feature_df = compute_features(df)
+    labels = create_labels(df, horizon_candles, neutral_zone_pct)
+    start = int(len(feature_df) * (1 - holdout))
+    rows = {}
+    for name, (model_path, scaler_path) in models.items():
+        predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, backend=backend)
+        rows[name] = prediction_accuracy(predictor, feature_df, labels, start=start)
+    return pd.DataFrame(rows).T
+
+
+def backend_agreement_report(model_path: str, scaler_path: str, df: pd.DataFrame, backend: str = 'int8',
+                             seq_len: int = 60, config: dict = None, holdout: float = 0.1,
+                             horizon_candles: int = None, neutral_zone_pct: float = None,
+                             precision: str = 'fp32') -> dict:
+    """
+    Vergleicht ein Inference-Backend (bzw. mit precision='bf16' die eager-Inference unter
+    Autocast) mit dem fp32 eager Modell auf der Holdout-Periode
+    (letzte holdout-Anteile der Feature-Zeilen, wie der Test-Split in train_model.py).
+
+    Mit horizon_candles / neutral_zone_pct (Standard: aus den Checkpoint-Metadaten)
+    wird zusätzlich die Accuracy beider Varianten gegen die Labels berechnet.
+    """
+    reference = LSTMPredictor.from_files(model_path, scaler_path, seq_len, backend='eager', precision='fp32')
+    infer = load_inference_fn(model_path, backend, model=reference.model, precision=precision)
+    candidate = LSTMPredictor(reference.model, reference.scaler, seq_len, infer=infer, backend=infer.backend)
+
+    feature_df = compute_features(df)
+    start = max(seq_len, int(len(feature_df) * (1 - holdout)))
+    # seq_len Kontext-Zeilen davor → genau eine Prediction je Holdout-Zeile
+    scaled = apply_scaler(feature_df.iloc[start - seq_len:], reference.scaler)
+    ref_probs = reference.predict_batch(scaled)
+    probs = candidate.predict_batch(scaled)
+    pred_index = feature_df.index[start:]
+
+    metadata = checkpoint_metadata(model_path)
+    horizon_candles = horizon_candles or metadata.get('horizon_candles')
+    neutral_zone_pct = neutral_zone_pct or metadata.get('neutral_zone_pct')
+    labels = None
+    if horizon_candles and neutral_zone_pct is not None:
+        labels = create_labels(df, horizon_candles, neutral_zone_pct).reindex(pred_index).to_numpy()
+
+    model_cfg = (config or {}).get('model', {})
+    report = compare_predictions(
+        ref_probs, probs,
+        long_threshold=model_cfg.get('long_threshold', 0.55),
+        short_threshold=model_cfg.get('short_threshold', 0.55),
+        labels=labels,
+    )
+    label = infer.backend if precision == 'fp32' else f"{infer.backend}/{precision}"
+    report.update({'backend': label, 'period_start': str(pred_index[0]), 'period_end': str(pred_index[-1])})
+    return report
+
+
+def distillation_report(teacher, student, X_val, y_val: np.ndarray = None, long_threshold: float = 0.55,
+                        short_threshold: float = 0.55) -> dict:
+    """
+    Übereinstimmung Student vs. Teacher auf den Validierungs-Fenstern (siehe trainer.distill_model).
+
+    Args:
+        X_val: (n, seq_len, features) oder WindowDataset (Labels dann aus X_val.targets)
+    """
+    from dbot.model.dataset import WindowDataset
+    from dbot.model.trainer import predict_windows
+    if y_val is None and isinstance(X_val, WindowDataset):
+        y_val = X_val.targets
+    return compare_predictions(predict_windows(teacher, X_val), predict_windows(student, X_val),
+                               long_threshold, short_threshold, labels=y_val)
+
+
+def print_agreement_report(report: dict):
+    print(f"\n{'='*60}")
+    print(f"  Backend-Vergleich: {report['backend']} vs. fp32 (eager)")
+    print(f"  Holdout: {report['period_start']} → {report['period_end']} ({report['n']} Kerzen)")
+    print(f"{'='*60}")
+    print(f"  Max |Δ Wahrscheinlichkeit|:  {report['max_abs_delta']:.6f}")
+    print(f"  Mittl. |Δ Wahrscheinlichkeit|: {report['mean_abs_delta']:.6f}")
+    print(f"  Argmax-Übereinstimmung:      {report['argmax_agreement']*100:.2f}%")
+    print(f"  Signal-Flip-Rate:            {report['signal_flip_rate']*100:.2f}%")
+    print(f"  Signale fp32 / {report['backend']}:        {report['ref_signals']} / {report['signals']}")
+    if 'accuracy' in report:
+        print(f"  Accuracy fp32 / {report['backend']}:       {report['ref_accuracy']:.4f} / {report['accuracy']:.4f}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="dbot Backend-Vergleich (z.B. int8 vs. fp32)")
+    parser.add_argument('--symbol', required=True, type=str, help="Handelspaar (z.B. BTC/USDT:USDT)")
+    parser.add_argument('--timeframe', required=True, type=str, help="Zeitrahmen (z.B. 4h)")
+    parser.add_argument('--data-file', required=True, type=str, help="OHLCV-CSV mit der Holdout-Periode")
+    parser.add_argument('--backend', choices=BACKENDS, default=None,
+                        help="Zu vergleichendes Backend (Standard: int8, mit --precision bf16 eager)")
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp32',
+                        help="bf16: eager-Inference unter Autocast gegen fp32 vergleichen")
+    parser.add_argument('--holdout', type=float, default=0.1, help="Anteil der letzten Kerzen als Holdout")
+    parser.add_argument('--compare-model', type=str, default=None,
+                        help="Weiterer Checkpoint (z.B. Fenster- vs. zustandsbehaftetes Modell): "
+                             "Accuracy-Vergleich auf dem Holdout statt Backend-Vergleich")
+    args = parser.parse_args()
+    backend = args.backend or ('eager' if args.precision == 'bf16' else 'int8')
+    if backend == 'eager' and args.precision == 'fp32':
+        parser.error("eager fp32 ist die Referenz – --backend oder --precision bf16 angeben")
+
+    from dbot.analysis.backtester import load_config
+    safe_name = f"{args.symbol.replace('/', '').replace(':', '')}_{args.timeframe}"
+    models_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'models')
+    try:
+        config = load_config(args.symbol, args.timeframe)
+    except Exception:
+        config = {}
+    seq_len = config.get('model', {}).get('sequence_length', 60)
+
+    df = pd.read_csv(args.data_file, index_col=0, parse_dates=True)
+    model_path = os.path.join(models_dir, f"{safe_name}.pt")
+    if args.compare_model:
+        metadata = checkpoint_metadata(model_path)
+        other_base, _ = os.path.splitext(args.compare_model)
+        result = model_accuracy_report(
+            {
+                safe_name: (model_path, os.path.join(models_dir, f"{safe_name}_scaler.npz")),
+                os.path.basename(args.compare_model): (args.compare_model, f"{other_base}_scaler.npz"),
+            },
+            df, metadata.get('horizon_candles', 5), metadata.get('neutral_zone_pct', 0.3),
+            seq_len=seq_len, holdout=args.holdout,
+        )
+        print(result.to_string())
+        return
+
+    report = backend_agreement_report(
+        os.path.join(models_dir, f"{safe_name}.pt"), os.path.join(models_dir, f"{safe_name}_scaler.npz"),
+        df, backend=backend, seq_len=seq_len, config=config, holdout=args.holdout, precision=args.precision,
+    )
+    print_agreement_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# src/dbot/analysis/grid.py
+# Grid-Runner: horizon × neutral_zone-Kombinationen parallel in einem Prozess-Pool optimieren
+# Ausführung: python -m dbot.analysis.grid --symbols BTC/USDT:USDT --timeframes 4h --start-date 2024-01-01 --end-date 2025-01-01
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import multiprocessing as mp
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from dbot.model.feature_engineering import set_feature_dtype
+from dbot.model.feature_store import FeatureStore, slice_features
+from dbot.model.lstm_model import CLI_MODEL_TYPES
+from dbot.model.trainer import PRECISIONS
+from dbot.model.export import checkpoint_metadata
+from dbot.model.predictor import student_path
+from dbot.analysis.optimizer import load_data, run_optimizer, config_path_for, _train_and_save
+
+logger = logging.getLogger(__name__)
+
+GRID_DIR = os.path.join(PROJECT_ROOT, 'artifacts', 'grid')
+RESULT_COLUMNS = ['horizon', 'neutral_zone', 'pnl_pct', 'win_rate', 'max_drawdown_pct', 'calmar_ratio',
+                  'trades', 'best_val_acc', 'seconds', 'error']
+
+# Kerzen + Features des aktuellen Marktes: vor dem Fork gesetzt, in den Workern nur gelesen
+# (Copy-on-Write – keine Kopie pro Kombination, kein Pickling der DataFrames)
+_SHARED = {}
+
+
+def _safe_name(symbol: str, timeframe: str) -> str:
+    return f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
+
+
+def combo_paths(symbol: str, timeframe: str, horizon: int, neutral_zone_pct: float) -> dict:
+    """Modell-, Scaler- und Config-Pfad einer Kombination unter artifacts/grid/<safe_name>/."""
+    combo_dir = os.path.join(GRID_DIR, _safe_name(symbol, timeframe), f"h{horizon}_nz{neutral_zone_pct}")
+    return {
+        'model_path': os.path.join(combo_dir, 'model.pt'),
+        'scaler_path': os.path.join(combo_dir, 'model_scaler.npz'),
+        'config_path': os.path.join(combo_dir, 'config.json'),
+    }
+
+
+def core_groups(workers: int, threads: int) -> list:
+    """Teilt die verfügbaren CPU-Kerne in disjunkte Gruppen à threads Kerne (eine je Worker)."""
+    cores = sorted(os.sched_getaffinity(0))
+    return [cores[i * threads:(i + 1) * threads] or cores for i in range(workers)]
+
+
+def _init_worker(groups, threads: int):
+    """Pool-Initializer: Worker auf eine Kern-Gruppe pinnen, torch auf threads Threads begrenzen."""
+    import torch
+    cores = groups.get()
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    logger.info(f"Worker {os.getpid()}: Kerne {cores} | {threads} Thread(s)")
+
+
+def _train_job(symbol: str, timeframe: str, paths: dict, options: dict):
+    """Multi-Head: ein Training für das ganze Grid (gleicher Train-Split wie run_optimizer)."""
+    df, feature_df = _SHARED['df'], _SHARED['feature_df']
+    df_train = df.iloc[:int(len(df) * (1 - options['val_split']))]
+    _train_and_save(
+        symbol, timeframe, df_train,
+        options['seq_len'], options['horizon'], options['neutral_zone_pct'], options['epochs'],
+        paths['model_path'], paths['scaler_path'],
+        feature_df=slice_features(feature_df, df_train),
+        lazy_windows=options['lazy_windows'],
+        model_type=options['model_type'],
+        label_grid=options['label_grid'],
+        precision=options['precision'],
+    )
+
+
+def _combo_job(symbol: str, timeframe: str, horizon: int, neutral_zone_pct: float, paths: dict,
+               options: dict) -> dict:
+    """Optimiert eine Kombination und liefert ihre Zeile der Ergebnis-Tabelle (Fehler als 'error')."""
+    row = {'horizon': horizon, 'neutral_zone': neutral_zone_pct}
+    started = time.time()
+    try:
+        _, metrics, _ = run_optimizer(
+            symbol=symbol, timeframe=timeframe, start_date=None, end_date=None,
+            horizon=horizon, neutral_zone_pct=neutral_zone_pct,
+            df=_SHARED['df'], feature_df=_SHARED['feature_df'], show_progress=False,
+            **paths, **options,
+        )
+        row.update(
+            pnl_pct=metrics.get('pnl_pct', 0.0),
+            win_rate=metrics.get('win_rate', 0.0),
+            max_drawdown_pct=metrics.get('max_drawdown_pct', 0.0),
+            calmar_ratio=metrics.get('calmar_ratio', 0.0),
+            trades=metrics.get('total_trades', 0),
+            best_val_acc=checkpoint_metadata(paths['model_path']).get('best_val_acc'),
+        )
+    except Exception as e:
+        logger.exception(f"Kombination horizon={horizon} | neutral_zone={neutral_zone_pct}% fehlgeschlagen")
+        row['error'] = str(e)
+    row['seconds'] = round(time.time() - started, 1)
+    return row
+
+
+def _promote(symbol: str, timeframe: str, paths: dict):
+    """Übernimmt Modell, Scaler, Student und Config der besten Kombination als Standard-Artefakte."""
+    safe_name = _safe_name(symbol, timeframe)
+    models_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'models')
+    model_path = os.path.join(models_dir, f"{safe_name}.pt")
+    if paths['model_path'] != model_path:
+        os.makedirs(models_dir, exist_ok=True)
+        shutil.copy2(paths['model_path'], model_path)
+        shutil.copy2(paths['scaler_path'], os.path.join(models_dir, f"{safe_name}_scaler.npz"))
+        if os.path.exists(student_path(paths['model_path'])):
+            shutil.copy2(student_path(paths['model_path']), student_path(model_path))
+    config_path = config_path_for(symbol, timeframe)
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+    shutil.copy2(paths['config_path'], config_path)
+    return config_path
+
+
+def run_grid(
+    symbol: str,
+    timeframe: str,
+    start_date: str,
+    end_date: str,
+    horizons: list = (3, 5, 10),
+    neutral_zones: list = (0.2, 0.3, 0.5),
+    workers: int = None,
+    threads: int = None,
+    multihead: bool = False,
+    **options,
+) -> pd.DataFrame:
+    """
+    Optimiert alle horizon × neutral_zone-Kombinationen eines Marktes (run_optimizer je
+    Kombination) parallel und übernimmt die beste (höchster PnL) als Standard-Modell/-Config.
+
+    Kerzen und Features werden einmal geladen und per fork mit den Workern geteilt. Jeder
+    Worker ist auf eigene Kerne gepinnt (threads je Worker, Standard: Kerne / Worker), damit
+    sich die torch-Threadpools der Worker nicht gegenseitig verdrängen. Jede Kombination
+    schreibt eigene Artefakte (combo_paths); mit multihead trainiert ein Lauf vorab das
+    Multi-Head-Modell, die Kombinationen wählen nur den Kopf.
+
+    Args:
+        options: weitere Argumente für run_optimizer (n_trials, epochs, mode, precision, ...)
+
+    Returns:
+        Ergebnis-Tabelle (RESULT_COLUMNS), eine Zeile je Kombination, nach pnl_pct sortiert
+    """
+    combos = [(h, nz) for h in horizons for nz in neutral_zones]
+    n_cpus = len(os.sched_getaffinity(0))
+    threads = threads or max(1, n_cpus // min(workers or len(combos), n_cpus))
+    workers = max(1, min(workers or n_cpus // threads, len(combos)))
+    options = {'n_trials': 100, 'start_capital': 1000.0, 'val_split': 0.2, 'epochs': 50, 'seq_len': 60,
+               'lazy_windows': False, 'model_type': 'lstm', 'precision': 'fp32', **options}
+
+    df = load_data(symbol, timeframe, start_date, end_date)
+    if df is None or len(df) < 300:
+        raise ValueError(f"Zu wenig Daten: {len(df) if df is not None else 0}")
+    _SHARED.update(df=df, feature_df=FeatureStore().get(symbol, timeframe, df))
+    logger.info(f"Grid {symbol} ({timeframe}): {len(combos)} Kombinationen | {workers} Worker à {threads} "
+                f"Thread(s) | {len(df)} Kerzen")
+
+    grid_dir = os.path.join(GRID_DIR, _safe_name(symbol, timeframe))
+    shutil.rmtree(grid_dir, ignore_errors=True)
+    jobs = []
+    if multihead:
+        # Alle Köpfe in einem Checkpoint: Modell/Scaler geteilt, nur die Config je Kombination
+        shared_paths = combo_paths(symbol, timeframe, 'all', 'all')
+        options['label_grid'] = (list(horizons), list(neutral_zones))
+    for horizon, nz in combos:
+        paths = combo_paths(symbol, timeframe, horizon, nz)
+        if multihead:
+            paths.update(model_path=shared_paths['model_path'], scaler_path=shared_paths['scaler_path'])
+        jobs.append((symbol, timeframe, horizon, nz, paths, {**options, 'force_retrain': not multihead}))
+
+    train_args = (symbol, timeframe, shared_paths if multihead else None,
+                  {**options, 'horizon': combos[0][0], 'neutral_zone_pct': combos[0][1]})
+    try:
+        if workers == 1:
+            if multihead:
+                _train_job(*train_args)
+            rows = [_combo_job(*job) for job in jobs]
+        else:
+            # fork: Worker erben _SHARED; torch läuft erst in den Kindprozessen
+            ctx = mp.get_context('fork')
+            if multihead:
+                with ctx.Pool(1) as pool:
+                    pool.apply(_train_job, train_args)
+            groups = ctx.Queue()
+            for cores in core_groups(workers, threads):
+                groups.put(cores)
+            with ctx.Pool(workers, initializer=_init_worker, initargs=(groups, threads)) as pool:
+                rows = pool.starmap(_combo_job, jobs, chunksize=1)
+    finally:
+        _SHARED.clear()
+
+    results = pd.DataFrame(rows).reindex(columns=RESULT_COLUMNS)
+    results = results.sort_values('pnl_pct', ascending=False, na_position='last').reset_index(drop=True)
+    results.to_csv(f"{grid_dir}_results.csv", index=False)
+    logger.info(f"Ergebnis-Tabelle: {grid_dir}_results.csv")
+
+    valid = results[results['error'].isna()]
+    if valid.empty:
+        logger.error(f"Keine Kombination erfolgreich für {symbol} ({timeframe}).")
+        return results
+    best = valid.iloc[0]
+    config_path = _promote(symbol, timeframe, jobs[combos.index((best['horizon'], best['neutral_zone']))][4])
+    shutil.rmtree(grid_dir, ignore_errors=True)
+    logger.info(f"Beste Kombination horizon={best['horizon']} | neutral_zone={best['neutral_zone']}% "
+                f"(PnL={best['pnl_pct']:.2f}%) → {config_path}")
+    return results
+
+
+# ---------------------------------------------------------------------------
+# CLI Entry Point
+# ---------------------------------------------------------------------------
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="dbot Grid-Runner: horizon × neutral_zone parallel optimieren")
+    parser.add_argument('--symbols', required=True, nargs='+', help="Handelspaare, z.B. BTC/USDT:USDT ETH/USDT:USDT")
+    parser.add_argument('--timeframes', required=True, nargs='+', help="Zeitfenster, z.B. 4h 1h")
+    parser.add_argument('--start-date', required=True, type=str, help="Startdatum (YYYY-MM-DD)")
+    parser.add_argument('--end-date', required=True, type=str, help="Enddatum (YYYY-MM-DD)")
+    parser.add_argument('--horizons', type=int, nargs='+', default=[3, 5, 10], help="Vorhersage-Horizonte (Kerzen)")
+    parser.add_argument('--neutral-zones', type=float, nargs='+', default=[0.2, 0.3, 0.5], help="Neutrale Zonen in %%")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Parallele Worker-Prozesse (Standard: Kerne / --threads, höchstens eine je Kombination)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="torch-Threads (= gepinnte Kerne) je Worker (Standard: Kerne / Worker)")
+    parser.add_argument('--start-capital', type=float, default=1000.0, help="Startkapital in USDT")
+    parser.add_argument('--trials', type=int, default=100, help="Anzahl Optuna-Trials je Kombination")
+    parser.add_argument('--epochs', type=int, default=50, help="LSTM Training-Epochen")
+    parser.add_argument('--seq-len', type=int, default=60, help="LSTM Eingabe-Fenster (Kerzen)")
+    parser.add_argument('--val-split', type=float, default=0.2, help="Anteil für Optuna-Validierung (0-1)")
+    parser.add_argument('--mode', choices=['strict', 'best_profit'], default='strict', help="Optimierungs-Modus")
+    parser.add_argument('--max-drawdown', type=float, default=30.0, help="Max erlaubter Drawdown %%")
+    parser.add_argument('--min-win-rate', type=float, default=0.0, help="Min Win-Rate %%")
+    parser.add_argument('--min-pnl', type=float, default=0.0, help="Min PnL %%")
+    parser.add_argument('--lazy-windows', action='store_true', default=False,
+                        help="Trainings-Fenster pro Batch bilden statt komplett im RAM")
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default=None,
+                        help="Dtype für Features/Scaler/Fenster (Standard: DBOT_FEATURE_DTYPE bzw. float32)")
+    parser.add_argument('--model-type', choices=sorted(CLI_MODEL_TYPES), default='lstm',
+                        help="Architektur beim Training: lstm oder tcn")
+    parser.add_argument('--distill', action='store_true', default=False,
+                        help="Je Kombination ein Student-Modell destillieren (nicht mit --multihead)")
+    parser.add_argument('--multihead', action='store_true', default=False,
+                        help="Ein Multi-Head-Modell für das ganze Grid trainieren, Kombinationen wählen den Kopf")
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp32',
+                        help="Precision beim Training: bf16 = Autocast (Loss in fp32)")
+    args = parser.parse_args()
+    if args.multihead and args.distill:
+        parser.error("--distill ist mit --multihead nicht möglich (der Student hätte nur einen Kopf)")
+    if args.dtype:
+        set_feature_dtype(args.dtype)
+
+    failed = False
+    for symbol in args.symbols:
+        for timeframe in args.timeframes:
+            print(f"\n{'='*55}")
+            print(f"  Grid: {symbol} ({timeframe})")
+            print(f"{'='*55}")
+            try:
+                results = run_grid(
+                    symbol, timeframe, args.start_date, args.end_date,
+                    horizons=args.horizons, neutral_zones=args.neutral_zones,
+                    workers=args.workers, threads=args.threads, multihead=args.multihead,
+                    n_trials=args.trials, start_capital=args.start_capital, val_split=args.val_split,
+                    epochs=args.epochs, seq_len=args.seq_len, mode=args.mode, max_drawdown=args.max_drawdown,
+                    min_win_rate=args.min_win_rate, min_pnl=args.min_pnl, lazy_windows=args.lazy_windows,
+                    model_type=args.model_type, distill=args.distill, precision=args.precision,
+                )
+                print(results.to_string(index=False))
+                failed |= bool(results['error'].notna().all())
+            except Exception as e:
+                print(f"\n  FEHLER für {symbol} ({timeframe}): {e}")
+                logger.exception(e)
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -129,10 +129,11 @@ def load_ohlcv(symbol, timeframe, start_date=None, end_date=None):
 # Trades aus LSTM-Backtest extrahieren (für Chart-Markierungen)
 # ---------------------------------------------------------------------------
 
-def extract_trades_lstm(df, predictor, config, start_capital):
+def extract_trades_lstm(df, predictor, config, start_capital, feature_df=None):
     """
     Fuehrt LSTM-Simulation durch und gibt Trade-Liste zurueck.
     Jeder Trade: {side, entry_time, entry_price, exit_time, exit_price, pnl_usd}
+    feature_df: optional vorberechnete Features (z.B. aus dem FeatureStore)
     """
     from dbot.model.feature_engineering import compute_features, apply_scaler
     model_cfg = config.get('model', {})
@@ -148,7 +149,8 @@ def extract_trades_lstm(df, predictor, config, start_capital):
     use_longs = config.get('behavior', {}).get('use_longs', True)
     use_shorts = config.get('behavior', {}).get('use_shorts', True)
 
-    feature_df = compute_features(df)
+    if feature_df is None:
+        feature_df = compute_features(df)
     if len(feature_df) < predictor.seq_len + 10:
         logger.warning("Zu wenig Daten fuer Trade-Extraktion.")
         return []
@@ -455,15 +457,15 @@ def run(start_capital=1000.0, start_date=None, end_date=None):
 
             # Modell laden
             model_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
-            scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.pkl")
+            scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.npz")
             seq_len = config.get('model', {}).get('sequence_length', 60)
 
             if not os.path.exists(model_path):
                 logger.warning(f"Kein Modell gefunden fuer {filename}, ueberspringe.")
                 continue
 
-            from dbot.model.predictor import LSTMPredictor
-            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+            from dbot.model.predictor import LSTMPredictor, predictor_options
+            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, **predictor_options(config))
 
             # Daten laden (immer gesamte Range fuer vollstaendige Trade-Historie)
             logger.info(f"Lade OHLCV-Daten fuer {symbol} {timeframe}...")
@@ -474,7 +476,9 @@ def run(start_capital=1000.0, start_date=None, end_date=None):
 
             # Trades extrahieren
             logger.info("Extrahiere Trades fuer Chart-Markierungen...")
-            trades = extract_trades_lstm(df, predictor, config, start_capital)
+            from dbot.model.feature_store import FeatureStore
+            feature_df = FeatureStore().get(symbol, timeframe, df)
+            trades = extract_trades_lstm(df, predictor, config, start_capital, feature_df=feature_df)
             logger.info(f"  {len(trades)} Trades gefunden")
 
             # Equity Curve
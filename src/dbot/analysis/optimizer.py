@@ -16,12 +16,17 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from dbot.model.feature_engineering import (
-    compute_features, create_labels, build_sequences,
-    fit_scaler, apply_scaler, save_scaler, FEATURE_NAMES,
+    compute_features, create_labels, create_label_grid, build_sequences,
+    fit_scaler, apply_scaler, save_scaler, set_feature_dtype, FEATURE_NAMES,
 )
-from dbot.model.trainer import train_model as _train_model, save_model
-from dbot.model.predictor import LSTMPredictor
+from dbot.model.feature_store import FeatureStore, slice_features
+from dbot.model.lstm_model import CLI_MODEL_TYPES
+from dbot.model.trainer import train_model as _train_model, save_model, distill_model, PRECISIONS
+from dbot.model.export import checkpoint_metadata
+from dbot.model.dataset import WindowDataset
+from dbot.model.predictor import LSTMPredictor, student_path
 from dbot.analysis.backtester import run_backtest
+from dbot.analysis.evaluation import distillation_report
 
 logger = logging.getLogger(__name__)
 optuna.logging.set_verbosity(optuna.logging.WARNING)
@@ -77,43 +82,78 @@ def _train_and_save(
     seq_len, horizon, neutral_zone_pct, epochs,
     model_path, scaler_path,
     inner_val_split=0.15,
+    feature_df=None,
+    lazy_windows=False,
+    model_type='lstm',
+    distill=False,
+    label_grid=None,
+    precision='fp32',
 ):
-    """Trainiert LSTM auf df_train (einmalig) und speichert Modell + Scaler."""
+    """
+    Trainiert das Modell (model_type, Standard LSTM) auf df_train (einmalig) und speichert Modell + Scaler.
+    precision='bf16' trainiert unter Autocast (siehe trainer.autocast).
+    Mit distill wird zusätzlich ein kleines Student-Modell destilliert (student_path(model_path)).
+    Mit label_grid=(horizons, neutral_zones) wird ein Multi-Head-Modell mit einem Kopf je
+    Kombination trainiert; aktiv (und in den Metadaten) ist der Kopf für horizon / neutral_zone_pct.
+    """
     logger.info(f"{'='*55}")
     logger.info(f"  LSTM Training: {symbol} ({timeframe})")
     logger.info(f"  seq_len={seq_len} | horizon={horizon} | neutral_zone={neutral_zone_pct}% | epochs={epochs}")
     logger.info(f"{'='*55}")
 
-    feature_df = compute_features(df_train)
-    labels = create_labels(df_train, horizon_candles=horizon, neutral_zone_pct=neutral_zone_pct)
-    aligned_labels = labels.reindex(feature_df.index)
+    if feature_df is None:
+        feature_df = compute_features(df_train)
+    if label_grid:
+        # Alle Kombinationen auf denselben Fenstern (eine Label-Spalte je Kopf)
+        aligned_labels = create_label_grid(df_train, *label_grid).reindex(feature_df.index)
+        head_keys = [list(k) for k in aligned_labels.columns]
+        logger.info(f"  Multi-Head: {len(head_keys)} Köpfe (horizon × neutral_zone)")
+    else:
+        labels = create_labels(df_train, horizon_candles=horizon, neutral_zone_pct=neutral_zone_pct)
+        aligned_labels = labels.reindex(feature_df.index)
 
-    # Label-Verteilung anzeigen
-    lbl_names = {0: 'LONG', 1: 'NEUTRAL', 2: 'SHORT'}
-    for lbl, cnt in aligned_labels.value_counts().sort_index().items():
-        logger.info(f"  {lbl_names.get(lbl, lbl)}: {cnt} ({cnt / len(aligned_labels) * 100:.1f}%)")
+        # Label-Verteilung anzeigen
+        lbl_names = {0: 'LONG', 1: 'NEUTRAL', 2: 'SHORT'}
+        for lbl, cnt in aligned_labels.value_counts().sort_index().items():
+            logger.info(f"  {lbl_names.get(lbl, lbl)}: {cnt} ({cnt / len(aligned_labels) * 100:.1f}%)")
 
     # Inner Train/Val Split (für Early Stopping – nur innerhalb der Trainings-Daten)
     split = int(len(feature_df) * (1 - inner_val_split))
     scaler, scaled_train = fit_scaler(feature_df.iloc[:split])
     scaled_val_inner = apply_scaler(feature_df.iloc[split:], scaler)
 
-    X_train, y_train = build_sequences(scaled_train, aligned_labels.iloc[:split], seq_len=seq_len)
-    X_val, y_val = build_sequences(scaled_val_inner, aligned_labels.iloc[split:], seq_len=seq_len)
-
-    logger.info(f"Sequenzen: Train={X_train.shape} | Val={X_val.shape}")
+    if lazy_windows:
+        X_train = WindowDataset.from_frames(scaled_train, aligned_labels.iloc[:split], seq_len=seq_len)
+        X_val = WindowDataset.from_frames(scaled_val_inner, aligned_labels.iloc[split:], seq_len=seq_len)
+        y_train = y_val = None
+        logger.info(f"Sequenzen (lazy): Train={len(X_train)} | Val={len(X_val)}")
+    else:
+        X_train, y_train = build_sequences(scaled_train, aligned_labels.iloc[:split], seq_len=seq_len)
+        X_val, y_val = build_sequences(scaled_val_inner, aligned_labels.iloc[split:], seq_len=seq_len)
+        logger.info(f"Sequenzen: Train={X_train.shape} | Val={X_val.shape}")
     if len(X_train) < 50:
         raise ValueError(f"Zu wenig Trainings-Sequenzen ({len(X_train)}). Mehr Daten oder kleineres seq_len verwenden.")
 
+    model_config = {'model_type': model_type, 'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64}
+    if label_grid:
+        model_config.update(model_type='multihead', head_keys=head_keys)
     model, history = _train_model(
         X_train, y_train, X_val, y_val,
-        model_config={'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64},
+        model_config=model_config,
         epochs=epochs,
         patience=15,
+        precision=precision,
     )
+    best_val_acc = max(history['val_acc'])
+    if label_grid:
+        model.select_head(horizon, neutral_zone_pct)
+        best_epoch = int(np.argmax(history['val_acc']))
+        for key, acc in zip(model.head_keys, history['val_acc_heads'][best_epoch]):
+            logger.info(f"  Kopf horizon={key[0]} | neutral_zone={key[1]}%: Val Acc {acc:.4f}")
+        best_val_acc = history['val_acc_heads'][best_epoch][model.active_head]
 
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    save_model(model, model_path, metadata={
+    metadata = {
         'symbol': symbol,
         'timeframe': timeframe,
         'seq_len': seq_len,
@@ -121,18 +161,52 @@ def _train_and_save(
         'neutral_zone_pct': neutral_zone_pct,
         'n_features': len(FEATURE_NAMES),
         'feature_names': FEATURE_NAMES,
-        'best_val_acc': max(history['val_acc']),
+        'best_val_acc': best_val_acc,
         'trained_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
-    })
+        'precision': precision,
+        'trained_until': str(feature_df.index[split - 1]),  # Warm-Start-Basis (train_model.py --finetune)
+    }
+    if label_grid:
+        metadata['heads'] = head_keys
+    save_model(model, model_path, metadata=metadata)
     save_scaler(scaler, scaler_path)
-    logger.info(f"Modell gespeichert: {model_path} | Beste Val Acc: {max(history['val_acc']):.4f}")
+    logger.info(f"Modell gespeichert: {model_path} | Beste Val Acc: {best_val_acc:.4f}")
+
+    if distill:
+        student, _ = distill_model(model, X_train, X_val, epochs=epochs)
+        report = distillation_report(model, student, X_val, y_val)
+        save_model(student, student_path(model_path), metadata={
+            **metadata,
+            'distilled_from': os.path.basename(model_path),
+            'teacher_agreement': report['argmax_agreement'],
+            'signal_flip_rate': report['signal_flip_rate'],
+            'best_val_acc': report['accuracy'],
+        })
+        logger.info(f"Student gespeichert: {student_path(model_path)} | Übereinstimmung: "
+                    f"{report['argmax_agreement']:.4f} | Signal-Flips: {report['signal_flip_rate']*100:.2f}% | "
+                    f"Val Acc Teacher/Student: {report['ref_accuracy']:.4f} / {report['accuracy']:.4f}")
+
+
+def _has_head(model_path, horizon, neutral_zone_pct):
+    """True, wenn der Checkpoint ein Multi-Head-Modell mit Kopf für (horizon, neutral_zone_pct) ist."""
+    heads = checkpoint_metadata(model_path).get('heads') or []
+    return any(int(h) == int(horizon) and abs(float(nz) - float(neutral_zone_pct)) < 1e-9 for h, nz in heads)
+
+
+def _student_agreement(model_path):
+    """Übereinstimmung des Student-Modells mit dem Teacher (None, wenn keins oder älter als der Teacher)."""
+    path = student_path(model_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(model_path):
+        return None
+    return checkpoint_metadata(path).get('teacher_agreement')
 
 
 # ---------------------------------------------------------------------------
 # Optuna Objective
 # ---------------------------------------------------------------------------
 
-def create_objective(df_val, predictor, base_config, start_capital, mode, max_drawdown, min_win_rate, min_pnl):
+def create_objective(df_val, predictor, base_config, start_capital, mode, max_drawdown, min_win_rate, min_pnl,
+                     feature_df=None):
     """Erstellt die Optuna-Objective-Funktion."""
     def objective(trial):
         long_threshold = trial.suggest_float('long_threshold', 0.45, 0.80)
@@ -162,7 +236,8 @@ def create_objective(df_val, predictor, base_config, start_capital, mode, max_dr
             'behavior': base_config.get('behavior', {'use_longs': True, 'use_shorts': True}),
         }
 
-        metrics = run_backtest(df_val, predictor, config, start_capital=start_capital, verbose=False)
+        metrics = run_backtest(df_val, predictor, config, start_capital=start_capital, verbose=False,
+                               feature_df=feature_df)
         if 'error' in metrics:
             return -999.0
 
@@ -195,12 +270,16 @@ def create_objective(df_val, predictor, base_config, start_capital, mode, max_dr
 # Config speichern
 # ---------------------------------------------------------------------------
 
-def save_best_config(symbol, timeframe, best_params, base_config, metrics):
-    """Speichert die beste Config als JSON."""
-    configs_dir = os.path.join(PROJECT_ROOT, 'src', 'dbot', 'strategy', 'configs')
-    os.makedirs(configs_dir, exist_ok=True)
+def config_path_for(symbol, timeframe):
+    """Pfad der Strategie-Config, z.B. configs/config_BTCUSDTUSDT_4h_lstm.json."""
     safe_name = f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
-    config_path = os.path.join(configs_dir, f"config_{safe_name}_lstm.json")
+    return os.path.join(PROJECT_ROOT, 'src', 'dbot', 'strategy', 'configs', f"config_{safe_name}_lstm.json")
+
+
+def save_best_config(symbol, timeframe, best_params, base_config, metrics, config_path=None):
+    """Speichert die beste Config als JSON (Standard: config_path_for(symbol, timeframe))."""
+    config_path = config_path or config_path_for(symbol, timeframe)
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
 
     rr_min = best_params['rr_min']
     rr_max = rr_min + best_params['rr_spread']
@@ -258,13 +337,33 @@ def run_optimizer(
     max_drawdown: float = 30.0,
     min_win_rate: float = 0.0,
     min_pnl: float = 0.0,
+    lazy_windows: bool = False,
+    model_type: str = 'lstm',
+    distill: bool = False,
+    student_min_agreement: float = 0.95,
+    label_grid: tuple = None,
+    precision: str = 'fp32',
+    df: pd.DataFrame = None,
+    feature_df: pd.DataFrame = None,
+    model_path: str = None,
+    scaler_path: str = None,
+    config_path: str = None,
+    show_progress: bool = True,
 ):
+    """
+    Training (falls nötig) + Optuna für eine horizon / neutral_zone-Kombination.
+
+    df / feature_df: bereits geladene Kerzen und Features (z.B. geteilt im Grid-Runner,
+    siehe dbot.analysis.grid) statt load_data / FeatureStore. model_path, scaler_path und
+    config_path überschreiben die Standard-Pfade des Symbols (Artefakte je Kombination).
+    """
     safe_name = f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
-    model_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
-    scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.pkl")
+    model_path = model_path or os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
+    scaler_path = scaler_path or os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.npz")
 
     # 1. Daten laden
-    df = load_data(symbol, timeframe, start_date, end_date)
+    if df is None:
+        df = load_data(symbol, timeframe, start_date, end_date)
     if df is None or len(df) < 300:
         raise ValueError(f"Zu wenig Daten: {len(df) if df is not None else 0}")
     logger.info(f"Daten: {len(df)} Kerzen | {df.index[0]} → {df.index[-1]}")
@@ -275,26 +374,48 @@ def run_optimizer(
     df_for_optuna = df.iloc[split_idx:]
     logger.info(f"Split: Training={len(df_for_training)} Kerzen | Optuna-Val={len(df_for_optuna)} Kerzen")
 
+    # Features einmal für den gesamten Zeitraum (persistenter Store, nur neue Kerzen werden berechnet)
+    if feature_df is None:
+        feature_df = FeatureStore().get(symbol, timeframe, df)
+    features_for_training = slice_features(feature_df, df_for_training)
+    features_for_optuna = slice_features(feature_df, df_for_optuna)
+
     # 3. LSTM trainieren (einmalig) – oder vorhandenes Modell nutzen
-    if force_retrain or not os.path.exists(model_path):
+    # Multi-Head: ein Training für das ganze Grid, weitere Kombinationen nutzen nur einen anderen Kopf
+    needs_training = force_retrain or not os.path.exists(model_path)
+    if label_grid and not needs_training and not _has_head(model_path, horizon, neutral_zone_pct):
+        logger.info(f"Checkpoint ohne Kopf für horizon={horizon} | neutral_zone={neutral_zone_pct}% – trainiere neu.")
+        needs_training = True
+    if needs_training:
         _train_and_save(
             symbol, timeframe, df_for_training,
             seq_len, horizon, neutral_zone_pct, epochs,
             model_path, scaler_path,
+            feature_df=features_for_training,
+            lazy_windows=lazy_windows,
+            model_type=model_type,
+            distill=distill,
+            label_grid=label_grid,
+            precision=precision,
         )
     else:
         logger.info(f"Modell bereits vorhanden: {model_path} (nutze --force-retrain um neu zu trainieren)")
 
-    # 4. Predictor laden
-    predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+    # 4. Predictor laden – Student statt Teacher, wenn die Übereinstimmung reicht
+    agreement = _student_agreement(model_path)
+    use_student = agreement is not None and agreement >= student_min_agreement
+    if agreement is not None:
+        logger.info(f"Student-Übereinstimmung {agreement:.4f} (Minimum {student_min_agreement}) → "
+                    f"{'Student' if use_student else 'Teacher'} für Backtests und Live.")
+    predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, use_student=use_student,
+                                         head=(horizon, neutral_zone_pct))
     logger.info(f"LSTM-Predictor geladen.")
 
     # 5. Basis-Config (aus bestehender Config oder Defaults)
-    configs_dir = os.path.join(PROJECT_ROOT, 'src', 'dbot', 'strategy', 'configs')
-    config_path = os.path.join(configs_dir, f"config_{safe_name}_lstm.json")
+    base_config_path = config_path_for(symbol, timeframe)
     base_config = {}
-    if os.path.exists(config_path):
-        with open(config_path) as f:
+    if os.path.exists(base_config_path):
+        with open(base_config_path) as f:
             base_config = json.load(f)
     base_config.setdefault('market', {'symbol': symbol, 'timeframe': timeframe})
     base_config.setdefault('model', {
@@ -304,15 +425,19 @@ def run_optimizer(
         'rr_min': 1.5,
         'rr_max': 3.0,
     })
+    base_config['model']['use_student'] = use_student
+    # Label-Parameter dieses Laufs (Multi-Head: wählt beim Laden via predictor_options den Kopf)
+    base_config['model'].update(horizon_candles=horizon, neutral_zone_pct=neutral_zone_pct)
 
     # 6. Optuna Optimierung (kein Re-Training pro Trial)
     study = optuna.create_study(direction='maximize', sampler=TPESampler(seed=42))
     objective = create_objective(
         df_for_optuna, predictor, base_config, start_capital,
         mode=mode, max_drawdown=max_drawdown, min_win_rate=min_win_rate, min_pnl=min_pnl,
+        feature_df=features_for_optuna,
     )
     logger.info(f"Starte Optuna: {n_trials} Trials für {symbol} ({timeframe}) [Modus: {mode}]...")
-    study.optimize(objective, n_trials=n_trials, show_progress_bar=True)
+    study.optimize(objective, n_trials=n_trials, show_progress_bar=show_progress)
 
     best_trial = study.best_trial
     logger.info(f"Beste Trial: PnL={best_trial.value:.2f}% | Params: {best_trial.params}")
@@ -337,10 +462,11 @@ def run_optimizer(
         },
         'behavior': base_config.get('behavior', {'use_longs': True, 'use_shorts': True}),
     }
-    final_metrics = run_backtest(df_for_optuna, predictor, best_config_tmp, start_capital=start_capital, verbose=True)
+    final_metrics = run_backtest(df_for_optuna, predictor, best_config_tmp, start_capital=start_capital, verbose=True,
+                                 feature_df=features_for_optuna)
 
     # 8. Config speichern
-    out_path = save_best_config(symbol, timeframe, best_trial.params, base_config, final_metrics)
+    out_path = save_best_config(symbol, timeframe, best_trial.params, base_config, final_metrics, config_path)
     return best_trial.params, final_metrics, out_path
 
 
@@ -368,7 +494,33 @@ def main():
     parser.add_argument('--max-drawdown', type=float, default=30.0, help="Max erlaubter Drawdown %%")
     parser.add_argument('--min-win-rate', type=float, default=0.0, help="Min Win-Rate %%")
     parser.add_argument('--min-pnl', type=float, default=0.0, help="Min PnL %%")
+    parser.add_argument('--lazy-windows', action='store_true', default=False,
+                        help="Trainings-Fenster pro Batch bilden statt komplett im RAM")
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default=None,
+                        help="Dtype für Features/Scaler/Fenster (Standard: DBOT_FEATURE_DTYPE bzw. float32)")
+    parser.add_argument('--model-type', choices=sorted(CLI_MODEL_TYPES), default='lstm',
+                        help="Architektur beim (Re-)Training: lstm oder tcn")
+    parser.add_argument('--distill', action='store_true', default=False,
+                        help="Nach dem Training ein kleines Student-Modell destillieren (1 Layer à 32)")
+    parser.add_argument('--student-min-agreement', type=float, default=0.95,
+                        help="Mindest-Übereinstimmung Student/Teacher, ab der der Student genutzt wird")
+    parser.add_argument('--multihead', action='store_true', default=False,
+                        help="Ein Multi-Head-Modell für das ganze Grid (--grid-horizons × --grid-neutral-zones) "
+                             "trainieren; --horizon / --neutral-zone wählen nur den Kopf")
+    parser.add_argument('--grid-horizons', type=int, nargs='+', default=[3, 5, 10])
+    parser.add_argument('--grid-neutral-zones', type=float, nargs='+', default=[0.2, 0.3, 0.5])
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp32',
+                        help="Precision beim (Re-)Training: bf16 = Autocast (Loss in fp32)")
     args = parser.parse_args()
+    if args.multihead and args.distill:
+        parser.error("--distill ist mit --multihead nicht möglich (der Student hätte nur einen Kopf)")
+    label_grid = None
+    if args.multihead:
+        label_grid = (args.grid_horizons, args.grid_neutral_zones)
+        if args.horizon not in args.grid_horizons or args.neutral_zone not in args.grid_neutral_zones:
+            parser.error("--horizon / --neutral-zone müssen im Grid enthalten sein")
+    if args.dtype:
+        set_feature_dtype(args.dtype)
 
     for symbol in args.symbols:
         for timeframe in args.timeframes:
@@ -393,6 +545,12 @@ def main():
                     max_drawdown=args.max_drawdown,
                     min_win_rate=args.min_win_rate,
                     min_pnl=args.min_pnl,
+                    lazy_windows=args.lazy_windows,
+                    model_type=args.model_type,
+                    distill=args.distill,
+                    student_min_agreement=args.student_min_agreement,
+                    label_grid=label_grid,
+                    precision=args.precision,
                 )
                 print(f"\n  Optimierung abgeschlossen!")
                 print(f"  Config: {config_path}")
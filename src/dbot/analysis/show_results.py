@@ -76,6 +76,24 @@ def model_exists(symbol, timeframe):
     return os.path.exists(os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt"))
 
 
+def _predict_all(loaded):
+    """
+    Predictions für alle geladenen Strategien ((config, predictor, df, feature_df)-Tupel);
+    Modelle gleicher Architektur laufen gestapelt, wenn DBOT_STACKED_INFERENCE aktiv ist.
+    Strategien mit zu wenig Daten erhalten None (run_backtest meldet den Fehler).
+    """
+    from dbot.model.feature_engineering import apply_scaler
+    from dbot.model.stacked import predict_batch_many
+    usable = [i for i, (_, predictor, _, feature_df) in enumerate(loaded)
+              if len(feature_df) >= predictor.seq_len + 10]
+    probs = predict_batch_many([loaded[i][1] for i in usable],
+                               [apply_scaler(loaded[i][3], loaded[i][1].scaler) for i in usable])
+    all_probs = [None] * len(loaded)
+    for i, p in zip(usable, probs):
+        all_probs[i] = p
+    return all_probs
+
+
 def print_separator(char="─", width=60):
     print(char * width)
 
@@ -99,10 +117,13 @@ def run_single_analysis(start_capital=1000.0, start_date=None, end_date=None):
         print("  Keine Configs gefunden. Bitte ./run_pipeline.sh ausführen.")
         return
 
-    from dbot.model.predictor import LSTMPredictor
+    from dbot.model.predictor import LSTMPredictor, predictor_options
+    from dbot.model.feature_store import FeatureStore
     from dbot.analysis.backtester import run_backtest
+    feature_store = FeatureStore()
 
     results = []
+    loaded = []
 
     for config_path in config_files:
         with open(config_path) as f:
@@ -118,11 +139,11 @@ def run_single_analysis(start_capital=1000.0, start_date=None, end_date=None):
             continue
 
         model_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
-        scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.pkl")
+        scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.npz")
         seq_len = config.get('model', {}).get('sequence_length', 60)
 
         try:
-            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, **predictor_options(config))
         except Exception as e:
             print(f"  ⚠  Modell-Fehler: {e}")
             continue
@@ -132,9 +153,18 @@ def run_single_analysis(start_capital=1000.0, start_date=None, end_date=None):
             print(f"  ⚠  Zu wenig Daten ({len(df) if df is not None else 0} Kerzen).")
             continue
 
-        metrics = run_backtest(df, predictor, config, start_capital=start_capital, verbose=False)
+        loaded.append((config, predictor, df, feature_store.get(symbol, timeframe, df)))
+
+    # Predictions aller Strategien (gleiche Architektur ggf. gestapelt, siehe dbot.model.stacked)
+    all_probs = _predict_all(loaded)
+
+    for (config, predictor, df, feature_df), probs in zip(loaded, all_probs):
+        symbol = config['market']['symbol']
+        timeframe = config['market']['timeframe']
+        metrics = run_backtest(df, predictor, config, start_capital=start_capital, verbose=False,
+                               feature_df=feature_df, probs=probs)
         if 'error' in metrics:
-            print(f"  ⚠  Backtest-Fehler: {metrics['error']}")
+            print(f"  ⚠  Backtest-Fehler bei {symbol} ({timeframe}): {metrics['error']}")
             continue
 
         actual_start = df.index[0].strftime('%Y-%m-%d')
@@ -177,8 +207,10 @@ def run_portfolio_simulation(start_capital=1000.0, start_date=None, end_date=Non
         print("  Keine Configs gefunden.")
         return
 
-    from dbot.model.predictor import LSTMPredictor
+    from dbot.model.predictor import LSTMPredictor, predictor_options
+    from dbot.model.feature_store import FeatureStore
     from dbot.analysis.backtester import run_backtest
+    feature_store = FeatureStore()
 
     available = []
     print("\n  Verfügbare Strategien:")
@@ -231,15 +263,17 @@ def run_portfolio_simulation(start_capital=1000.0, start_date=None, end_date=Non
         seq_len = config.get('model', {}).get('sequence_length', 60)
 
         model_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
-        scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.pkl")
+        scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.npz")
 
         try:
-            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, **predictor_options(config))
             df = load_ohlcv(symbol, timeframe, start_date=start_date, end_date=end_date)
             if df is None or len(df) < 200:
                 print(f"  ⚠  Zu wenig Daten für {symbol}.")
                 continue
-            metrics = run_backtest(df, predictor, config, start_capital=capital_per_strategy, verbose=False)
+            feature_df = feature_store.get(symbol, timeframe, df)
+            metrics = run_backtest(df, predictor, config, start_capital=capital_per_strategy, verbose=False,
+                                   feature_df=feature_df)
             pnl = metrics.get('pnl_usdt', 0.0)
             total_pnl += pnl
             total_trades += metrics.get('total_trades', 0)
@@ -349,12 +383,15 @@ def run_auto_portfolio_optimizer(start_capital=1000.0, start_date=None, end_date
         print("  Keine Configs gefunden. Bitte ./run_pipeline.sh ausführen.")
         return
 
-    from dbot.model.predictor import LSTMPredictor
+    from dbot.model.predictor import LSTMPredictor, predictor_options
+    from dbot.model.feature_store import FeatureStore
     from dbot.analysis.backtester import run_backtest
+    feature_store = FeatureStore()
 
     # ── 1. Alle Strategien laden & Einzel-Backtest ──────────────
     print("  1/3: Analysiere Einzel-Performance & filtere nach Max DD...")
     single_results = []
+    loaded, filenames = [], []
 
     for config_path in config_files:
         with open(config_path) as f:
@@ -368,15 +405,25 @@ def run_auto_portfolio_optimizer(start_capital=1000.0, start_date=None, end_date
             continue
 
         model_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}.pt")
-        scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.pkl")
+        scaler_path = os.path.join(PROJECT_ROOT, 'artifacts', 'models', f"{safe_name}_scaler.npz")
         seq_len = config.get('model', {}).get('sequence_length', 60)
 
         try:
-            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+            predictor = LSTMPredictor.from_files(model_path, scaler_path, seq_len, **predictor_options(config))
             df = load_ohlcv(symbol, timeframe, start_date=start_date, end_date=end_date)
             if df is None or len(df) < 200:
                 continue
-            metrics = run_backtest(df, predictor, config, start_capital=start_capital, verbose=False)
+            loaded.append((config, predictor, df, feature_store.get(symbol, timeframe, df)))
+            filenames.append(filename)
+        except Exception as e:
+            logger.warning(f"Fehler bei {symbol} ({timeframe}): {e}")
+
+    for (config, predictor, df, feature_df), probs, filename in zip(loaded, _predict_all(loaded), filenames):
+        symbol = config['market']['symbol']
+        timeframe = config['market']['timeframe']
+        try:
+            metrics = run_backtest(df, predictor, config, start_capital=start_capital, verbose=False,
+                                   feature_df=feature_df, probs=probs)
             if 'error' in metrics:
                 continue
 
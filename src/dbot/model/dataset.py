@@ -0,0 +1,219 @@
+# src/dbot/model/dataset.py
+# Lazy Window-Dataset: Trainings-Fenster werden erst beim Batch-Zugriff gebildet
+import logging
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset
+
+from dbot.model.feature_engineering import resolve_dtype
+
+logger = logging.getLogger(__name__)
+
+
+class WindowDataset(Dataset):
+    """
+    Sliding-Window-Dataset auf einem 2D-Feature-Array (n_kerzen, n_features).
+
+    Statt X als (n, seq_len, n_features) zu materialisieren (jede Kerze seq_len-fach
+    dupliziert), werden nur die Fenster-Endindizes gespeichert. Ein Batch wird per
+    Fancy-Index-Gather direkt aus dem (ggf. memory-mapped) Feature-Array gebaut.
+
+    Sample i: features[ends[i] - seq_len:ends[i]] → Label labels[ends[i]]
+    (identisch zu build_sequences).
+
+    Der Index kann ein einzelner Integer oder ein Index-Array sein – mit einem
+    Index-Array liefert __getitem__ ganze Batches (siehe BatchLoader):
+        loader = BatchLoader(ds, batch_size=64)
+    """
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray, ends: np.ndarray,
+                 seq_len: int, scaler=None, rows: np.ndarray = None):
+        """
+        Args:
+            features: (n_kerzen, n_features) – ndarray oder np.memmap
+            labels:   Labels je (gültiger) Zeile
+            ends:     Fenster-Endindizes (exklusiv), jeweils >= seq_len
+            seq_len:  Fensterlänge
+            scaler:   optionaler FeatureScaler, der pro Batch angewendet wird
+                      (für unskalierte Matrizen, z.B. aus dem Feature-Store)
+            rows:     optionale Zeilen-Indizes in features (z.B. ohne NaN-Zeilen);
+                      ends/labels beziehen sich dann auf diese Zeilen
+        """
+        self.features = features
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.seq_len = seq_len
+        self.scaler = scaler
+        self.rows = rows
+        self._offsets = np.arange(-seq_len, 0, dtype=np.int64)
+
+    @classmethod
+    def from_frames(cls, feature_df: pd.DataFrame, labels: pd.Series, seq_len: int = 60,
+                    scaler=None) -> 'WindowDataset':
+        """Wie build_sequences(feature_df, labels, seq_len), aber ohne Fenster-Kopien."""
+        features = np.ascontiguousarray(feature_df.to_numpy(dtype=resolve_dtype()))
+        label_arr = labels.reindex(feature_df.index).to_numpy(dtype=np.float64)
+        return cls.from_arrays(features, label_arr, seq_len, scaler=scaler)
+
+    @classmethod
+    def from_arrays(cls, features: np.ndarray, labels: np.ndarray, seq_len: int = 60,
+                    scaler=None) -> 'WindowDataset':
+        """
+        Wie from_frames auf compute_features-Ausgabe: NaN-Zeilen (rohe Feature-Store-
+        Matrizen enthalten den Indikator-Warmup) werden übersprungen, Fenster laufen
+        über die verbleibenden Zeilen. Samples ohne Label entfallen.
+        """
+        label_arr = np.asarray(labels, dtype=np.float64)
+        n = len(features)
+
+        # NaN-Zeilen blockweise suchen, damit memmaps nicht komplett geladen werden
+        keep = np.empty(n, dtype=bool)
+        block = 1 << 16
+        for start in range(0, n, block):
+            keep[start:start + block] = ~np.isnan(features[start:start + block]).any(axis=1)
+        rows = None if keep.all() else np.flatnonzero(keep)
+        if rows is not None:
+            label_arr = label_arr[rows]
+
+        ends = np.arange(seq_len, len(label_arr))
+        # Label-Grid (n, n_spalten): Fenster nur, wenn alle Spalten ein Label haben
+        invalid = np.isnan(label_arr[ends])
+        if invalid.ndim > 1:
+            invalid = invalid.any(axis=1)
+        ends = ends[~invalid]
+        return cls(features, np.nan_to_num(label_arr, nan=1.0), ends, seq_len, scaler, rows=rows)
+
+    @classmethod
+    def from_npy(cls, features_path: str, labels: np.ndarray, seq_len: int = 60,
+                 scaler=None) -> 'WindowDataset':
+        """Öffnet eine .npy-Feature-Matrix memory-mapped (z.B. aus dem FeatureStore)."""
+        features = np.load(features_path, mmap_mode='r')
+        return cls.from_arrays(features, labels, seq_len, scaler=scaler)
+
+    @classmethod
+    def concat(cls, datasets: list) -> 'WindowDataset':
+        """
+        Fügt mehrere Datasets (z.B. verschiedene Symbole) zusammen. Fenster bleiben
+        innerhalb ihres Ursprungs-Datasets; die Feature-Arrays werden dabei in den
+        Speicher kopiert.
+
+        Teilen sich alle Datasets denselben Scaler, skaliert das Ergebnis weiter beim
+        Batch-Zugriff; sonst wird jeder Teil vorab mit seinem eigenen Scaler skaliert
+        (Ergebnis ohne Scaler).
+        """
+        seq_len = datasets[0].seq_len
+        if any(ds.seq_len != seq_len for ds in datasets):
+            raise ValueError("Alle Datasets müssen dieselbe seq_len haben")
+        scaler = datasets[0].scaler
+        shared_scaler = all(ds.scaler is scaler for ds in datasets)
+        parts = []
+        for ds in datasets:
+            part = ds.features if ds.rows is None else ds.features[ds.rows]
+            if not shared_scaler and ds.scaler is not None:
+                part = ds.scaler.transform(part)  # neue Kopie, Quelle (ggf. memmap) bleibt unverändert
+            parts.append(np.asarray(part, dtype=resolve_dtype()))
+        offsets = np.cumsum([0] + [len(p) for p in parts[:-1]])
+        return cls(
+            np.concatenate(parts),
+            np.concatenate([ds.labels for ds in datasets]),
+            np.concatenate([ds.ends + off for ds, off in zip(datasets, offsets)]),
+            seq_len,
+            scaler=scaler if shared_scaler else None,
+        )
+
+    def subset(self, indices) -> 'WindowDataset':
+        """Teilmenge der Samples auf derselben Feature-Matrix (keine Kopie)."""
+        return WindowDataset(self.features, self.labels, self.ends[indices], self.seq_len, self.scaler,
+                             rows=self.rows)
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    @property
+    def n_features(self) -> int:
+        return self.features.shape[1]
+
+    @property
+    def targets(self) -> np.ndarray:
+        """Labels aller Samples (n_samples,) bzw. (n_samples, n_spalten) bei Label-Grid."""
+        return self.labels[self.ends]
+
+    def windows(self, indices) -> np.ndarray:
+        """Gather der Fenster (batch, seq_len, n_features) im Dtype der Feature-Matrix."""
+        idx = self.ends[indices][..., None] + self._offsets
+        if self.rows is not None:
+            idx = self.rows[idx]
+        X = np.asarray(self.features[idx])
+        if self.scaler is not None:
+            self.scaler.transform(X, out=X)
+        return X
+
+    def __getitem__(self, index):
+        if isinstance(index, (list, tuple)):
+            index = np.asarray(index, dtype=np.int64)
+        X = torch.from_numpy(self.windows(index)).float()  # Modell rechnet in float32
+        y = torch.from_numpy(np.asarray(self.labels[self.ends[index]]))
+        return X, y
+
+    def nbytes_materialized(self) -> int:
+        """Speicherbedarf, den build_sequences für dieselben Fenster bräuchte."""
+        return len(self) * self.seq_len * self.n_features * 4
+
+
+class BatchLoader:
+    """
+    Mini-Batch-Iterator für train_model (Ersatz für DataLoader/TensorDataset).
+
+    Die Indizes werden einmal pro Epoche permutiert; jeder Batch ist ein einziger
+    index_select auf dem zusammenhängenden Tensor (bzw. ein Gather der Fenster bei
+    einem WindowDataset) statt Einzel-Indexierung + collate je Sample.
+
+    Nutzung:
+        loader = BatchLoader(X_t, y_t, batch_size=64)           # X_t: (n, seq_len, features)
+        loader = BatchLoader(window_ds, batch_size=64, drop_last=True)
+        for X_batch, y_batch in loader: ...
+    """
+
+    def __init__(self, X, y: torch.Tensor = None, batch_size: int = 64, shuffle: bool = True,
+                 drop_last: bool = False):
+        """
+        Args:
+            X: (n, seq_len, features)-Tensor oder WindowDataset (dann y=None)
+            y: Labels (n,) bzw. (n, n_heads) als Tensor
+            drop_last: unvollständigen letzten Batch verwerfen
+        """
+        self.lazy = isinstance(X, WindowDataset)
+        self.X = X
+        self.y = X.targets if self.lazy else y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.n = len(X)
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return self.n // self.batch_size
+        return -(-self.n // self.batch_size)
+
+    @property
+    def n_samples(self) -> int:
+        """Samples pro Epoche (ohne verworfenen letzten Batch)."""
+        return min(self.n, len(self) * self.batch_size)
+
+    def __iter__(self):
+        # torch.randperm nutzt den globalen torch-Seed (wie DataLoader(shuffle=True))
+        order = torch.randperm(self.n) if self.shuffle else None
+        for start in range(0, self.n_samples, self.batch_size):
+            stop = min(start + self.batch_size, self.n)
+            if order is None:
+                if self.lazy:
+                    yield self.X[np.arange(start, stop)]
+                else:
+                    yield self.X[start:stop], self.y[start:stop]
+            elif self.lazy:
+                # Sortierte Indizes: Gather läuft vorwärts durch das (ggf. memory-mapped) Array
+                yield self.X[np.sort(order[start:stop].numpy())]
+            else:
+                idx = order[start:stop]
+                yield self.X.index_select(0, idx), self.y.index_select(0, idx)
@@ -0,0 +1,271 @@
+# src/dbot/model/export.py
+# Export von .pt-Checkpoints nach TorchScript / ONNX / int8 und Inference-Backends für den Predictor
+# Ausführung: python -m dbot.model.export --model artifacts/models/BTCUSDTUSDT_4h.pt --format torchscript onnx int8
+import os
+import sys
+import copy
+import glob
+import logging
+import argparse
+import numpy as np
+import torch
+import torch.nn as nn
+
+from dbot.model.trainer import (
+    load_model, save_model, quantize_model, quant_state_path, autocast, DEVICE, QUANT_DYNAMIC_INT8
+)
+from dbot.model.numpy_lstm import NumpyLSTM, NPZ_SUFFIX, export_is_current
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('eager', 'torchscript', 'onnx', 'int8', 'numpy')
+EXPORT_FORMATS = ('torchscript', 'onnx', 'int8', 'numpy')
+
+_SUFFIXES = {'torchscript': '.torchscript.pt', 'onnx': '.onnx', 'int8': '.int8.pt', 'numpy': NPZ_SUFFIX}
+
+
+class ProbaModule(nn.Module):
+    """Modell + Softmax in einem Graphen, damit Exporte direkt Wahrscheinlichkeiten liefern."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.softmax(self.model(x), dim=-1)
+
+
+def artifact_path(model_path: str, backend: str) -> str:
+    """Pfad des Export-Artefakts neben dem Checkpoint, z.B. BTCUSDTUSDT_4h.onnx."""
+    base, _ = os.path.splitext(model_path)
+    return base + _SUFFIXES[backend]
+
+
+def _example_input(model: nn.Module, seq_len: int, batch: int = 2) -> torch.Tensor:
+    return torch.zeros(batch, seq_len, model.n_features, device=DEVICE)
+
+
+def checkpoint_metadata(model_path: str) -> dict:
+    """Metadaten eines .pt-Checkpoints (seq_len, horizon_candles, ...)."""
+    return torch.load(model_path, map_location='cpu', weights_only=True).get('metadata', {})
+
+
+def checkpoint_model_type(model_path: str) -> str:
+    """model_type eines .pt-Checkpoints (Checkpoints vor der Registry: 'lstm')."""
+    return torch.load(model_path, map_location='cpu', weights_only=True).get('model_type', 'lstm')
+
+
+def _checkpoint_seq_len(model_path: str, default: int = 60) -> int:
+    return int(checkpoint_metadata(model_path).get('seq_len', default))
+
+
+def to_torchscript(model: nn.Module, seq_len: int = 60) -> torch.jit.ScriptModule:
+    """
+    Trace + Freeze des Modells (eval, Dropout entfällt). Batch-Größe und seq_len
+    bleiben dynamisch – das LSTM läuft als einzelner aten::lstm-Aufruf.
+    """
+    model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(ProbaModule(model).eval(), _example_input(model, seq_len))
+    return torch.jit.freeze(traced)
+
+
+def export_torchscript(model: nn.Module, path: str, seq_len: int = 60) -> str:
+    scripted = to_torchscript(model, seq_len)
+    tmp = f"{path}.tmp"
+    scripted.save(tmp)
+    os.replace(tmp, path)
+    logger.info(f"TorchScript exportiert: {path}")
+    return path
+
+
+def export_onnx(model: nn.Module, path: str, seq_len: int = 60) -> str:
+    """ONNX-Export mit dynamischer Batch- und Sequenzachse (benötigt das Paket onnx)."""
+    model.eval()
+    tmp = f"{path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            ProbaModule(model).eval(), (_example_input(model, seq_len),), tmp,
+            input_names=['x'], output_names=['probs'],
+            dynamic_axes={'x': {0: 'batch', 1: 'seq_len'}, 'probs': {0: 'batch'}},
+            dynamo=False,
+        )
+    os.replace(tmp, path)
+    logger.info(f"ONNX exportiert: {path}")
+    return path
+
+
+def export_int8(model: nn.Module, path: str, metadata: dict = None) -> str:
+    """Dynamisch int8-quantisierter Checkpoint (lädt über load_model, nur CPU)."""
+    quantized = quantize_model(copy.deepcopy(model))
+    save_model(quantized, path, metadata=metadata, quantization=QUANT_DYNAMIC_INT8)
+    return path
+
+
+def export_model(model_path: str, formats=('torchscript',), seq_len: int = None) -> dict:
+    """
+    Schreibt die gewünschten Export-Artefakte neben den Checkpoint.
+
+    Returns:
+        dict format -> Pfad
+    """
+    model = load_model(model_path)
+    metadata = checkpoint_metadata(model_path)
+    seq_len = seq_len or int(metadata.get('seq_len', 60))
+    paths = {}
+    for fmt in formats:
+        path = artifact_path(model_path, fmt)
+        if fmt == 'int8':
+            paths[fmt] = export_int8(model, path, metadata)
+        elif fmt == 'numpy':
+            NumpyLSTM.from_checkpoint(model_path).save(path)
+            logger.info(f"NumPy-Gewichte exportiert: {path}")
+            paths[fmt] = path
+        elif fmt == 'onnx':
+            paths[fmt] = export_onnx(model, path, seq_len)
+        else:
+            paths[fmt] = export_torchscript(model, path, seq_len)
+    return paths
+
+
+def _torch_infer(module, backend: str, device=DEVICE, precision: str = 'fp32'):
+    def infer(x: np.ndarray) -> np.ndarray:
+        with torch.no_grad(), autocast(precision, device):
+            return module(torch.from_numpy(x).to(device)).float().cpu().numpy()
+    infer.backend = backend
+    infer.precision = precision
+    return infer
+
+
+def eager_step(model: nn.Module, precision: str = 'fp32'):
+    """
+    Zustandsbehaftete Inference-Funktion (batch, T, n_features), state → (probs (batch, T, 3), state)
+    über LSTMModel.forward_sequence; der Zustand (h, c) wird als NumPy-Arrays (fp32) übergeben.
+    """
+    model.eval()
+
+    def step(x: np.ndarray, state: tuple = None) -> tuple:
+        with torch.no_grad(), autocast(precision):
+            if state is not None:
+                state = tuple(torch.from_numpy(np.ascontiguousarray(s, dtype=np.float32)).to(DEVICE)
+                              for s in state)
+            logits, (h, c) = model.forward_sequence(torch.from_numpy(x).to(DEVICE), state)
+            return (torch.softmax(logits.float(), dim=-1).cpu().numpy(),
+                    (h.float().cpu().numpy(), c.float().cpu().numpy()))
+    return step
+
+
+def eager_infer(model: nn.Module, precision: str = 'fp32'):
+    """Inference-Funktion (batch, seq_len, n_features) float32 → (batch, 3) über das eager Modell."""
+    model.eval()
+
+    def predict_proba(x: torch.Tensor) -> torch.Tensor:
+        # Softmax auf fp32-Logits (wie eager_step): unter CPU-Autocast liefe sie in bfloat16
+        return torch.softmax(model(x).float(), dim=-1)
+    return _torch_infer(predict_proba, 'eager', precision=precision)
+
+
+def load_inference_fn(model_path: str, backend: str = 'eager', model: nn.Module = None, precision: str = 'fp32'):
+    """
+    Liefert eine Inference-Funktion für das gewünschte Backend; das tatsächlich
+    genutzte Backend steht in infer.backend.
+
+    precision 'bf16' (Autocast) gilt nur für eager; die Export-Backends rechnen in
+    ihrer eigenen Genauigkeit (torchscript/onnx/numpy fp32, int8).
+
+    'torchscript' nutzt das exportierte Artefakt oder traced den Checkpoint beim Laden;
+    'onnx' benötigt Artefakt und onnxruntime, sonst wird mit Warnung auf eager zurückgefallen;
+    'int8' nutzt den quantisierten Checkpoint oder quantisiert beim Laden (immer auf CPU);
+    'numpy' nutzt den torch-freien Forward-Pass aus dbot.model.numpy_lstm.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unbekanntes Inference-Backend: {backend} (erlaubt: {', '.join(BACKENDS)})")
+    if precision != 'fp32' and backend != 'eager':
+        logger.warning(f"Precision {precision} nur mit eager Backend – {backend} rechnet ohne Autocast.")
+
+    if backend == 'torchscript':
+        path = artifact_path(model_path, 'torchscript')
+        if os.path.exists(path):
+            module = torch.jit.load(path, map_location=DEVICE)
+        else:
+            logger.info(f"Kein TorchScript-Artefakt ({path}), trace Checkpoint beim Laden.")
+            model = model or load_model(model_path)
+            module = to_torchscript(model, _checkpoint_seq_len(model_path))
+        module.eval()
+        return _torch_infer(module, 'torchscript')
+
+    if backend == 'numpy' and not export_is_current(model_path):
+        model_type = model.model_type if model is not None else checkpoint_model_type(model_path)
+        if model_type != 'lstm':
+            logger.warning(f"Modell-Typ {model_type}: Backend numpy nicht unterstützt, nutze eager.")
+            backend = 'eager'
+
+    if backend == 'numpy':
+        numpy_model = NumpyLSTM.from_files(model_path)
+
+        def infer(x: np.ndarray) -> np.ndarray:
+            return numpy_model.predict_proba(x)
+        infer.backend = 'numpy'
+        return infer
+
+    if backend == 'int8':
+        path = artifact_path(model_path, 'int8')
+        # Ältere int8-Artefakte ohne quant_state_path (Gewichte im Checkpoint) werden nicht entpickelt
+        if os.path.exists(path) and os.path.exists(quant_state_path(path)):
+            quantized = load_model(path)
+        else:
+            logger.info(f"Kein int8-Artefakt ({path}), quantisiere Checkpoint beim Laden.")
+            quantized = quantize_model(copy.deepcopy(model or load_model(model_path)))
+        return _torch_infer(quantized.predict_proba, 'int8', device='cpu')
+
+    if backend == 'onnx':
+        path = artifact_path(model_path, 'onnx')
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            ort = None
+            logger.warning("onnxruntime nicht installiert – nutze eager Backend.")
+        if ort is not None and not os.path.exists(path):
+            logger.warning(f"ONNX-Artefakt fehlt ({path}) – nutze eager Backend.")
+        elif ort is not None:
+            session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+
+            def infer(x: np.ndarray) -> np.ndarray:
+                return session.run(None, {'x': np.ascontiguousarray(x, dtype=np.float32)})[0]
+            infer.backend = 'onnx'
+            return infer
+
+    return eager_infer(model or load_model(model_path), precision=precision)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="dbot Modell-Export (TorchScript / ONNX)")
+    parser.add_argument('--model', type=str, help="Pfad zum .pt-Checkpoint")
+    parser.add_argument('--all', action='store_true', help="Alle Checkpoints in artifacts/models exportieren")
+    parser.add_argument('--format', nargs='+', choices=EXPORT_FORMATS, default=['torchscript'])
+    parser.add_argument('--seq-len', type=int, default=None, help="Beispiel-Länge für den Export")
+    args = parser.parse_args()
+
+    if args.all:
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+        paths = [p for p in sorted(glob.glob(os.path.join(project_root, 'artifacts', 'models', '*.pt')))
+                 if not p.endswith((_SUFFIXES['torchscript'], _SUFFIXES['int8']))]
+    elif args.model:
+        paths = [args.model]
+    else:
+        parser.error("--model oder --all angeben")
+
+    failed = 0
+    for path in paths:
+        try:
+            export_model(path, args.format, args.seq_len)
+        except Exception as e:
+            logger.error(f"Export fehlgeschlagen für {path}: {e}")
+            failed += 1
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,17 @@
 # Feature-Erstellung aus OHLCV-Daten für das LSTM
 import numpy as np
 import pandas as pd
-import ta
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
 import pickle
 import os
-from sklearn.preprocessing import RobustScaler
+import copy
+import json
+import math
+from collections import deque
+
+from dbot.model import indicators
+from dbot.model.feature_graph import FeatureGraph
 
 logger = logging.getLogger(__name__)
 
@@ -25,65 +31,374 @@ FEATURE_NAMES = [
     'close_position',  # (Close-Low)/(High-Low) – Kerzenposition
 ]
 
+# Dtype-Policy für Features, Scaler und Fenster (Training/Backtest/Live).
+# Die Indikatoren rechnen intern immer in float64 (Rekursionen, kumulative Summen)
+# und werden einmal beim Zusammensetzen der Feature-Matrix in diesen Typ geschrieben.
+# Überschreibbar per Umgebungsvariable DBOT_FEATURE_DTYPE oder set_feature_dtype().
+FEATURE_DTYPE = np.dtype(os.environ.get('DBOT_FEATURE_DTYPE', 'float32'))
+
+
+def set_feature_dtype(dtype):
+    """Setzt die Dtype-Policy prozessweit (float32 oder float64)."""
+    global FEATURE_DTYPE
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Nicht unterstützter Feature-Dtype: {dtype}")
+    FEATURE_DTYPE = dtype
+
+
+def resolve_dtype(dtype=None) -> np.dtype:
+    """Explizit übergebener Dtype oder die aktuelle Policy."""
+    return FEATURE_DTYPE if dtype is None else np.dtype(dtype)
 
-def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+
+def compute_features(df: pd.DataFrame, dtype=None) -> pd.DataFrame:
     """
     Berechnet alle Features aus einem OHLCV-DataFrame.
 
     Args:
         df: DataFrame mit Spalten [open, high, low, close, volume]
+        dtype: Ausgabe-Dtype (Standard: FEATURE_DTYPE)
 
     Returns:
         DataFrame mit Feature-Spalten (NaN-Zeilen werden getroppt)
     """
-    df = df.copy()
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
 
-    # Log-Return
-    df['close_return'] = np.log(df['close'] / df['close'].shift(1))
+    features = pd.DataFrame(
+        _feature_matrix(high, low, close, volume, dtype=resolve_dtype(dtype)),
+        index=df.index, columns=FEATURE_NAMES,
+    )
 
-    # Volume-Ratio
-    df['volume_ratio'] = df['volume'] / df['volume'].rolling(20).mean()
+    # NaN-Zeilen entfernen
+    return features.dropna()
 
-    # RSI
-    df['rsi_14'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
 
-    # MACD
-    macd_ind = ta.trend.MACD(close=df['close'])
-    df['macd'] = macd_ind.macd()
-    df['macd_signal'] = macd_ind.macd_signal()
+def _feature_matrix(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    volume: np.ndarray, dtype=np.float64) -> np.ndarray:
+    """
+    Berechnet die 12 FEATURE_NAMES über den Feature-Graphen (gemeinsame
+    Zwischenstufen werden nur einmal berechnet).
 
-    # Bollinger Band Breite
-    bb = ta.volatility.BollingerBands(close=df['close'], window=20)
-    bb_mid = bb.bollinger_mavg()
-    bb_width_abs = bb.bollinger_hband() - bb.bollinger_lband()
-    df['bb_width'] = bb_width_abs / bb_mid.replace(0, np.nan)
+    Returns:
+        np.ndarray (..., T, n_features) inkl. NaN-Warmup-Zeilen
+    """
+    return FeatureGraph(high, low, close, volume).matrix(FEATURE_NAMES, dtype=dtype)
+
+
+def compute_features_panel(ohlcv: np.ndarray, dtype=None) -> tuple:
+    """
+    Berechnet alle Features für mehrere Symbole in einem vektorisierten Durchgang.
 
-    # ATR als % vom Close
-    atr = ta.volatility.AverageTrueRange(
-        high=df['high'], low=df['low'], close=df['close'], window=14
-    ).average_true_range()
-    df['atr_pct'] = atr / df['close'].replace(0, np.nan)
+    Args:
+        ohlcv: (n_symbols, T, 5) mit Spalten [open, high, low, close, volume] auf einer
+               gemeinsamen Zeitachse. Führende NaN-Kerzen (Symbol noch nicht gelistet)
+               und NaN am Ende sind erlaubt, Lücken mitten in der Reihe nicht.
+        dtype: Ausgabe-Dtype (Standard: FEATURE_DTYPE)
 
-    # ADX
-    adx_ind = ta.trend.ADXIndicator(high=df['high'], low=df['low'], close=df['close'], window=14)
-    df['adx'] = adx_ind.adx()
+    Returns:
+        (features, valid):
+            features: (n_symbols, T, n_features) inkl. NaN-Warmup je Symbol
+            valid:    (n_symbols, T) bool – Zeilen, die compute_features behalten würde
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    n_features = len(FEATURE_NAMES)
 
-    # EMA20 / EMA50 Abstand
-    ema20 = ta.trend.EMAIndicator(close=df['close'], window=20).ema_indicator()
-    ema50 = ta.trend.EMAIndicator(close=df['close'], window=50).ema_indicator()
-    df['ema20_dist'] = (df['close'] - ema20) / ema20.replace(0, np.nan)
-    df['ema50_dist'] = (df['close'] - ema50) / ema50.replace(0, np.nan)
+    # Jedes Symbol auf seine erste Kerze linksbündig ausrichten, damit der
+    # Indikator-Warmup pro Symbol beginnt
+    start = indicators.first_valid(ohlcv[..., 3])
+    shifted = bool(np.any(start > 0))
+    columns = [ohlcv[..., i] for i in (1, 2, 3, 4)]  # high, low, close, volume
+    if shifted:
+        columns = [indicators.realign(col, start, -1) for col in columns]
 
-    # High-Low Range
-    df['high_low_range'] = (df['high'] - df['low']) / df['close'].replace(0, np.nan)
+    features = _feature_matrix(*columns, dtype=resolve_dtype(dtype))
+    if shifted:
+        offsets = np.repeat(start[:, None], n_features, axis=1)
+        features = np.moveaxis(indicators.realign(np.moveaxis(features, -1, 1), offsets, 1), 1, -1)
 
-    # Close-Position innerhalb der Kerze
-    hl_range = df['high'] - df['low']
-    df['close_position'] = (df['close'] - df['low']) / hl_range.replace(0, np.nan)
+    features = np.ascontiguousarray(features)
+    valid = ~np.isnan(features).any(axis=-1)
+    return features, valid
 
-    # NaN-Zeilen entfernen
-    df = df[FEATURE_NAMES].dropna()
-    return df
+
+def compute_features_multi(dfs: dict, dtype=None) -> dict:
+    """
+    DataFrame-Variante von compute_features_panel.
+
+    Args:
+        dfs: {key: OHLCV-DataFrame}, z.B. {(symbol, timeframe): df}
+
+    Returns:
+        {key: Feature-DataFrame} – identisch zu compute_features(df) je Eintrag
+    """
+    if not dfs:
+        return {}
+    index = dfs[next(iter(dfs))].index
+    for df in dfs.values():
+        index = index.union(df.index)
+
+    panel = np.stack([
+        df.reindex(index)[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+        for df in dfs.values()
+    ])
+    features, valid = compute_features_panel(panel, dtype=dtype)
+
+    result = {}
+    for i, (key, df) in enumerate(dfs.items()):
+        present = np.flatnonzero(index.isin(df.index))
+        if len(present) and present[-1] - present[0] + 1 != len(present):
+            # Lücken in der gemeinsamen Zeitachse → einzeln berechnen
+            result[key] = compute_features(df, dtype=dtype)
+            continue
+        rows = present[valid[i, present]]
+        result[key] = pd.DataFrame(features[i, rows], index=index[rows], columns=FEATURE_NAMES)
+    return result
+
+
+def _div(num: float, den: float) -> float:
+    """Division mit pandas-Semantik: x/0 → ±inf, 0/0 → NaN."""
+    if den == 0:
+        return math.nan if num == 0 or math.isnan(num) else math.copysign(math.inf, num)
+    return num / den
+
+
+def _log(x: float) -> float:
+    """Logarithmus mit numpy-Semantik: 0 → -inf, x < 0 / NaN → NaN (statt ValueError)."""
+    if x > 0:
+        return math.log(x)
+    return -math.inf if x == 0 else math.nan
+
+
+def _div_nonzero(num: float, den: float) -> float:
+    """Division wie `x / y.replace(0, np.nan)`: Nenner 0 → NaN."""
+    return math.nan if den == 0 else num / den
+
+
+class IncrementalFeatureEngine:
+    """
+    Zustandsbehaftete Feature-Berechnung für den Live-Betrieb.
+
+    Statt bei jedem Zyklus alle Indikatoren auf dem kompletten DataFrame neu zu
+    berechnen, hält die Engine die Wilder-/EMA-/Rolling-Fenster-Zustände aller
+    12 FEATURE_NAMES und schreibt sie Kerze für Kerze fort (O(1) pro Kerze).
+    Die Werte entsprechen exakt compute_features (inkl. ta-Warmup-Verhalten),
+    sofern die Engine auf derselben ersten Kerze gestartet wurde.
+
+    Nutzung:
+        engine = IncrementalFeatureEngine.from_dataframe(df_ohlcv, history=60)
+        row = engine.update(high, low, close, volume, timestamp)  # (12,) oder NaN
+        window = engine.window(60)                                 # (60, 12)
+    """
+
+    RSI_WINDOW = 14
+    ATR_WINDOW = 14
+    ADX_WINDOW = 14
+    ROLL_WINDOW = 20   # Volume-Ratio + Bollinger
+    MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+    EMA_SHORT, EMA_LONG = 20, 50
+
+    _SCALAR_STATE = (
+        'n', 'prev_high', 'prev_low', 'prev_close',
+        'rsi_up', 'rsi_down', 'ema_fast', 'ema_slow', 'macd_signal', 'macd_count',
+        'ema_short', 'ema_long', 'tr_sum', 'atr',
+        'trs', 'dip', 'din', 'dx_sum', 'adx',
+    )
+
+    def __init__(self, history: int = 0):
+        self.n = 0
+        self.prev_high = self.prev_low = self.prev_close = math.nan
+        self.rsi_up = self.rsi_down = 0.0
+        self.ema_fast = self.ema_slow = self.macd_signal = 0.0
+        self.macd_count = 0
+        self.ema_short = self.ema_long = 0.0
+        self.tr_sum = self.atr = 0.0
+        self.trs = self.dip = self.din = 0.0
+        self.dx_sum = self.adx = 0.0
+        self.volumes = deque(maxlen=self.ROLL_WINDOW)
+        self.closes = deque(maxlen=self.ROLL_WINDOW)
+        # Letzte gültige (NaN-freie) Feature-Zeilen – entspricht compute_features(...).iloc[-history:]
+        self.history = deque(maxlen=history)
+        self.last_timestamp = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, history: int = 0) -> 'IncrementalFeatureEngine':
+        """Initialisiert die Engine durch Abspielen eines OHLCV-DataFrames."""
+        engine = cls(history=history)
+        engine.extend(df)
+        return engine
+
+    def extend(self, df: pd.DataFrame):
+        """Schreibt die Engine um alle Kerzen eines OHLCV-DataFrames fort."""
+        values = df[['high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+        for ts, (high, low, close, volume) in zip(df.index, values):
+            self.update(high, low, close, volume, ts)
+
+    @staticmethod
+    def _ema_step(prev: float, value: float, span: int, n: int) -> float:
+        if n == 0:
+            return value
+        alpha = 2.0 / (span + 1)
+        return prev + alpha * (value - prev)
+
+    def update(self, high: float, low: float, close: float, volume: float,
+               timestamp=None) -> np.ndarray:
+        """
+        Verarbeitet eine abgeschlossene Kerze und gibt deren Feature-Zeile zurück.
+
+        Returns:
+            np.ndarray (12,) in FEATURE_NAMES-Reihenfolge (NaN während des Warmups)
+        """
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        n = self.n
+        pc, ph, pl = self.prev_close, self.prev_high, self.prev_low
+
+        # Log-Return
+        close_return = _log(_div(close, pc)) if n > 0 else math.nan
+
+        # Rolling-Fenster (Volume-Ratio, Bollinger)
+        self.volumes.append(volume)
+        self.closes.append(close)
+        if len(self.closes) == self.ROLL_WINDOW:
+            volume_ratio = _div(volume, math.fsum(self.volumes) / self.ROLL_WINDOW)
+            bb_mid = math.fsum(self.closes) / self.ROLL_WINDOW
+            bb_std = math.sqrt(math.fsum((c - bb_mid) ** 2 for c in self.closes) / self.ROLL_WINDOW)
+            bb_width = _div_nonzero((bb_mid + 2 * bb_std) - (bb_mid - 2 * bb_std), bb_mid)
+        else:
+            volume_ratio = bb_width = math.nan
+
+        # RSI (Wilder-EMA, alpha = 1/14, Start bei der ersten Kerze mit 0)
+        diff = close - pc if n > 0 else 0.0
+        alpha = 1.0 / self.RSI_WINDOW
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+        if n == 0:
+            self.rsi_up, self.rsi_down = up, down
+        else:
+            self.rsi_up += alpha * (up - self.rsi_up)
+            self.rsi_down += alpha * (down - self.rsi_down)
+        if n + 1 >= self.RSI_WINDOW:
+            rsi = 100.0 if self.rsi_down == 0 else 100.0 - 100.0 / (1.0 + self.rsi_up / self.rsi_down)
+        else:
+            rsi = math.nan
+
+        # MACD (Signal startet mit dem ersten gültigen MACD-Wert)
+        self.ema_fast = self._ema_step(self.ema_fast, close, self.MACD_FAST, n)
+        self.ema_slow = self._ema_step(self.ema_slow, close, self.MACD_SLOW, n)
+        macd = macd_signal = math.nan
+        if n + 1 >= self.MACD_SLOW:
+            macd = self.ema_fast - self.ema_slow
+            self.macd_signal = self._ema_step(self.macd_signal, macd, self.MACD_SIGNAL, self.macd_count)
+            self.macd_count += 1
+            if self.macd_count >= self.MACD_SIGNAL:
+                macd_signal = self.macd_signal
+
+        # EMA20 / EMA50
+        self.ema_short = self._ema_step(self.ema_short, close, self.EMA_SHORT, n)
+        self.ema_long = self._ema_step(self.ema_long, close, self.EMA_LONG, n)
+        ema20_dist = _div_nonzero(close - self.ema_short, self.ema_short) if n + 1 >= self.EMA_SHORT else math.nan
+        ema50_dist = _div_nonzero(close - self.ema_long, self.ema_long) if n + 1 >= self.EMA_LONG else math.nan
+
+        # ATR (ta: Mittelwert der ersten 14 True Ranges, danach Wilder; vorher 0)
+        w = self.ATR_WINDOW
+        tr = high - low if n == 0 else max(high - low, abs(high - pc), abs(low - pc))
+        if n < w:
+            self.tr_sum += tr
+            if n == w - 1:
+                self.atr = self.tr_sum / w
+        else:
+            self.atr = (self.atr * (w - 1) + tr) / w
+        atr_pct = _div_nonzero(self.atr, close)
+
+        # ADX (ta: Wilder-Summen ab Kerze 1, DX ab Kerze 14, ADX ab Kerze 27; vorher 0)
+        w = self.ADX_WINDOW
+        adx = 0.0
+        if n > 0:
+            dm = max(high, pc) - min(low, pc)
+            diff_up, diff_down = high - ph, pl - low
+            pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+            neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+            if n <= w:
+                self.trs += dm
+                self.dip += pos
+                self.din += neg
+            else:
+                self.trs = self.trs - self.trs / w + dm
+                self.dip = self.dip - self.dip / w + pos
+                self.din = self.din - self.din / w + neg
+            if n >= w:
+                di_pos = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+                di_neg = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+                di_sum = di_pos + di_neg
+                dx = 100 * abs((di_pos - di_neg) / di_sum) if di_sum != 0 else 0.0
+                if n < 2 * w - 1:
+                    self.dx_sum += dx
+                elif n == 2 * w - 1:
+                    self.adx = (self.dx_sum + dx) / w
+                else:
+                    self.adx = (self.adx * (w - 1) + dx) / w
+                adx = self.adx if n >= 2 * w - 1 else 0.0
+
+        high_low_range = _div_nonzero(high - low, close)
+        close_position = _div_nonzero(close - low, high - low)
+
+        row = np.array([
+            close_return, volume_ratio, rsi, macd, macd_signal, bb_width,
+            atr_pct, adx, ema20_dist, ema50_dist, high_low_range, close_position,
+        ], dtype=np.float64)
+
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        self.n = n + 1
+        self.last_timestamp = timestamp
+        if not np.isnan(row).any():
+            self.history.append(row)
+        return row
+
+    def peek(self, high: float, low: float, close: float, volume: float) -> np.ndarray:
+        """Berechnet die Feature-Zeile einer (evtl. noch offenen) Kerze ohne den Zustand zu ändern."""
+        return copy.deepcopy(self).update(high, low, close, volume)
+
+    def window(self, seq_len: int) -> np.ndarray:
+        """Gibt die letzten seq_len gültigen Feature-Zeilen zurück (seq_len, n_features)."""
+        rows = list(self.history)[-seq_len:]
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURE_NAMES))
+
+    def to_dict(self) -> dict:
+        """Serialisierbarer Zustand (JSON-kompatibel)."""
+        state = {k: getattr(self, k) for k in self._SCALAR_STATE}
+        state['volumes'] = list(self.volumes)
+        state['closes'] = list(self.closes)
+        state['history_len'] = self.history.maxlen
+        state['history'] = [row.tolist() for row in self.history]
+        state['last_timestamp'] = None if self.last_timestamp is None else str(self.last_timestamp)
+        return state
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'IncrementalFeatureEngine':
+        engine = cls(history=state.get('history_len') or 0)
+        for k in cls._SCALAR_STATE:
+            setattr(engine, k, state[k])
+        engine.volumes.extend(state['volumes'])
+        engine.closes.extend(state['closes'])
+        engine.history.extend(np.array(row, dtype=np.float64) for row in state['history'])
+        engine.last_timestamp = state.get('last_timestamp')
+        return engine
+
+    def save(self, path: str):
+        """Speichert den Engine-Zustand als JSON-Datei."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IncrementalFeatureEngine':
+        """Lädt einen gespeicherten Engine-Zustand."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
 
 
 def create_labels(raw_df: pd.DataFrame, horizon_candles: int = 5,
@@ -104,75 +419,216 @@ def create_labels(raw_df: pd.DataFrame, horizon_candles: int = 5,
     Returns:
         pd.Series mit Integer-Labels (0, 1, 2)
     """
-    close = raw_df['close']
-    future_return = (close.shift(-horizon_candles) - close) / close * 100.0
+    grid = create_label_grid(raw_df, [horizon_candles], [neutral_zone_pct])
+    return grid.iloc[:, 0].astype(int).rename(None)
 
-    labels = pd.Series(1, index=close.index, dtype=int)  # Default: NEUTRAL
-    labels[future_return > neutral_zone_pct] = 0           # LONG
-    labels[future_return < -neutral_zone_pct] = 2          # SHORT
 
-    return labels
+def create_label_grid(raw_df: pd.DataFrame, horizons, neutral_zones) -> pd.DataFrame:
+    """
+    Erstellt Labels für alle Kombinationen aus Horizont × Neutral-Zone in einem Durchgang.
+
+    Die Forward-Returns werden einmal als (n_kerzen, n_horizonte)-Matrix berechnet,
+    die Labels per Broadcasting gegen alle Neutral-Zonen abgeleitet. Spalte
+    (h, nz) ist identisch zu create_labels(raw_df, h, nz).
+
+    Args:
+        raw_df: Original OHLCV-DataFrame (nicht feature-transformiert)
+        horizons: Liste von Horizonten (Kerzen)
+        neutral_zones: Liste von Neutral-Zonen (in %)
+
+    Returns:
+        DataFrame mit MultiIndex-Spalten (horizon, neutral_zone) und int8-Labels (0, 1, 2)
+    """
+    close = raw_df['close'].to_numpy(dtype=np.float64)
+    horizons = np.asarray(horizons, dtype=np.int64)
+    zones = np.asarray(neutral_zones, dtype=np.float64)
+    n = len(close)
+
+    # Forward-Returns (n, H); Kerzen ohne Zukunft im Datensatz → NaN → NEUTRAL
+    future_idx = np.arange(n)[:, None] + horizons[None, :]
+    future_close = np.where(future_idx < n, close[np.minimum(future_idx, n - 1)], np.nan)
+    with np.errstate(invalid='ignore'):
+        future_return = (future_close - close[:, None]) / close[:, None] * 100.0
+
+        # (n, H, Z): 1 = NEUTRAL, -1 → LONG (0), +1 → SHORT (2)
+        ret = future_return[:, :, None]
+        labels = 1 + (ret < -zones).view(np.int8) - (ret > zones).view(np.int8)
+
+    columns = pd.MultiIndex.from_product(
+        [horizons.tolist(), zones.tolist()], names=['horizon', 'neutral_zone'])
+    return pd.DataFrame(labels.reshape(n, len(columns)), index=raw_df.index, columns=columns)
 
 
 def build_sequences(feature_df: pd.DataFrame, labels: pd.Series,
-                    seq_len: int = 60) -> tuple:
+                    seq_len: int = 60, dtype=None) -> tuple:
     """
     Erstellt Sliding-Window-Sequenzen für das LSTM.
 
     Args:
         feature_df: DataFrame mit normalisierten Features (nach fit_scaler)
-        labels: Series mit Labels (gleicher Index wie feature_df)
+        labels: Series mit Labels (gleicher Index wie feature_df) oder DataFrame
+                aus create_label_grid – dann teilen sich alle Label-Spalten dieselben Fenster
         seq_len: Länge des Eingabe-Fensters (Anzahl Kerzen)
+        dtype: Dtype von X (Standard: FEATURE_DTYPE)
 
     Returns:
         (X, y): numpy arrays
-            X: (n_samples, seq_len, n_features)
-            y: (n_samples,) mit Labels 0/1/2
+            X: (n_samples, seq_len, n_features) – read-only Strided-View auf das
+               Feature-Array (ohne Kopie); nur bei ungültigen Labels mitten in der
+               Reihe wird einmalig per Maske kopiert
+            y: (n_samples,) mit Labels 0/1/2, bzw. (n_samples, n_spalten) bei Label-Grid
     """
-    feat_arr = feature_df.values
-    label_arr = labels.reindex(feature_df.index).values
+    dtype = resolve_dtype(dtype)
+    feat_arr = np.ascontiguousarray(feature_df.to_numpy(dtype=dtype))
+    label_arr = labels.reindex(feature_df.index).to_numpy(dtype=np.float64)
+    n_features = feat_arr.shape[1]
 
-    X, y = [], []
-    for i in range(seq_len, len(feat_arr)):
-        # Prüfe ob Label gültig (kein NaN, also Horizon-Ende liegt im Datensatz)
-        if np.isnan(label_arr[i]):
-            continue
-        X.append(feat_arr[i - seq_len:i])
-        y.append(int(label_arr[i]))
+    if len(feat_arr) <= seq_len:
+        return np.empty((0, seq_len, n_features), dtype=dtype), np.empty((0,) + label_arr.shape[1:], dtype=np.int64)
 
-    return np.array(X, dtype=np.float32), np.array(y, dtype=np.int64)
+    # Fenster i endet vor Kerze i: feat_arr[i - seq_len:i] für i in [seq_len, n)
+    windows = sliding_window_view(feat_arr, seq_len, axis=0)[:-1].transpose(0, 2, 1)
+    target = label_arr[seq_len:]
+
+    # Prüfe ob Label gültig (kein NaN, also Horizon-Ende liegt im Datensatz)
+    valid = ~np.isnan(target)
+    if valid.ndim > 1:
+        valid = valid.all(axis=1)
+    if not valid.all():
+        windows = windows[valid]
+    return windows, target[valid].astype(np.int64)
+
+
+class FeatureScaler:
+    """
+    Robust-Scaler als kompaktes Artefakt: (x - center) / scale.
+
+    Ersetzt den gepickelten sklearn-RobustScaler (Median / IQR). Gespeichert wird als
+    .npz (center, scale, feature_names) – Laden ohne Pickle und ohne scikit-learn.
+    center/scale und die Ausgabe von transform() folgen der Dtype-Policy.
+    """
+
+    def __init__(self, center, scale, feature_names=None, dtype=None):
+        self.dtype = resolve_dtype(dtype)
+        self.center = np.ascontiguousarray(center, dtype=self.dtype)
+        self.scale = np.ascontiguousarray(scale, dtype=self.dtype)
+        self.feature_names = list(feature_names) if feature_names is not None else list(FEATURE_NAMES)
+        if not (self.center.shape == self.scale.shape == (len(self.feature_names),)):
+            raise ValueError(
+                f"Scaler-Dimensionen passen nicht: center={self.center.shape}, "
+                f"scale={self.scale.shape}, features={len(self.feature_names)}"
+            )
+
+    @classmethod
+    def fit(cls, values: np.ndarray, feature_names=None, dtype=None) -> 'FeatureScaler':
+        """Median / IQR (25-75%) je Feature wie RobustScaler; IQR 0 → 1."""
+        values = np.asarray(values)
+        percentile = np.nanpercentile if np.isnan(values).any() else np.percentile
+        q25, center, q75 = np.asarray(percentile(values, [25.0, 50.0, 75.0], axis=0), dtype=np.float64)
+        scale = q75 - q25
+        scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+        return cls(center, scale, feature_names, dtype=dtype)
+
+    @classmethod
+    def from_sklearn(cls, scaler, feature_names=None) -> 'FeatureScaler':
+        """Übernimmt center_/scale_ eines gefitteten sklearn-RobustScalers."""
+        n_features = len(scaler.center_)
+        center = scaler.center_ if scaler.with_centering else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_scaling else np.ones(n_features)
+        if feature_names is None:
+            names = getattr(scaler, 'feature_names_in_', None)
+            feature_names = list(names) if names is not None else FEATURE_NAMES[:n_features]
+        return cls(center, scale, feature_names)
+
+    def transform(self, values: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Skaliert (n, n_features) bzw. (..., n_features).
+
+        Mit out=values wird in-place gerechnet (values muss dann self.dtype haben).
+        """
+        if out is None:
+            out = np.array(values, dtype=self.dtype)
+        elif out is not values:
+            out[...] = values
+        out -= self.center
+        out /= self.scale
+        return out
+
+    def inverse_transform(self, values: np.ndarray) -> np.ndarray:
+        return np.asarray(values, dtype=self.dtype) * self.scale + self.center
+
+    def save(self, path: str):
+        """Speichert als .npz (atomar)."""
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, center=self.center, scale=self.scale,
+                 feature_names=np.array(self.feature_names, dtype=str))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureScaler':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['center'], data['scale'], data['feature_names'].tolist())
 
 
 def fit_scaler(feature_df: pd.DataFrame) -> tuple:
     """
-    Fittet einen RobustScaler auf den Feature-DataFrame.
+    Fittet einen FeatureScaler (Median / IQR) auf den Feature-DataFrame.
 
     Returns:
         (scaler, scaled_df)
     """
-    scaler = RobustScaler()
-    scaled_values = scaler.fit_transform(feature_df.values)
-    scaled_df = pd.DataFrame(scaled_values, index=feature_df.index, columns=feature_df.columns)
-    return scaler, scaled_df
+    scaler = FeatureScaler.fit(feature_df.values, list(feature_df.columns))
+    return scaler, apply_scaler(feature_df, scaler)
 
 
-def apply_scaler(feature_df: pd.DataFrame, scaler: RobustScaler) -> pd.DataFrame:
-    """Wendet einen bereits gefitteten Scaler an."""
-    scaled_values = scaler.transform(feature_df.values)
-    return pd.DataFrame(scaled_values, index=feature_df.index, columns=feature_df.columns)
+def apply_scaler(feature_df: pd.DataFrame, scaler: FeatureScaler) -> pd.DataFrame:
+    """Wendet einen bereits gefitteten Scaler an (eine Kopie im Scaler-Dtype, in-place skaliert)."""
+    values = feature_df.to_numpy(dtype=scaler.dtype, copy=True)
+    scaler.transform(values, out=values)
+    return pd.DataFrame(values, index=feature_df.index, columns=feature_df.columns, copy=False)
 
 
-def save_scaler(scaler: RobustScaler, path: str):
-    """Speichert den Scaler als Pickle-Datei."""
+def save_scaler(scaler: FeatureScaler, path: str):
+    """Speichert den Scaler als .npz-Datei."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'wb') as f:
-        pickle.dump(scaler, f)
+    scaler.save(path)
     logger.info(f"Scaler gespeichert: {path}")
 
 
-def load_scaler(path: str) -> RobustScaler:
-    """Lädt einen Scaler aus einer Pickle-Datei."""
-    with open(path, 'rb') as f:
-        scaler = pickle.load(f)
+def legacy_scaler_path(path: str) -> str:
+    """Pfad des alten Pickle-Scalers zu einem .npz-Scaler-Pfad."""
+    return f"{os.path.splitext(path)[0]}.pkl"
+
+
+def scaler_exists(path: str) -> bool:
+    """True, wenn der Scaler oder ein konvertierbarer Pickle-Scaler vorhanden ist."""
+    return os.path.exists(path) or os.path.exists(legacy_scaler_path(path))
+
+
+def convert_legacy_scaler(pkl_path: str, npz_path: str = None) -> FeatureScaler:
+    """
+    Konvertiert einen gepickelten sklearn-RobustScaler (*_scaler.pkl) in das
+    .npz-Format. Benötigt scikit-learn (nur für das Entpickeln).
+    """
+    if npz_path is None:
+        npz_path = f"{os.path.splitext(pkl_path)[0]}.npz"
+    with open(pkl_path, 'rb') as f:
+        legacy = pickle.load(f)
+    scaler = FeatureScaler.from_sklearn(legacy)
+    save_scaler(scaler, npz_path)
+    logger.info(f"Scaler konvertiert: {pkl_path} -> {npz_path}")
+    return scaler
+
+
+def load_scaler(path: str) -> FeatureScaler:
+    """
+    Lädt einen Scaler aus einer .npz-Datei. Existiert nur der alte
+    Pickle-Scaler daneben, wird er einmalig konvertiert.
+    """
+    if path.endswith('.pkl'):
+        path = f"{os.path.splitext(path)[0]}.npz"
+    if not os.path.exists(path) and os.path.exists(legacy_scaler_path(path)):
+        return convert_legacy_scaler(legacy_scaler_path(path), path)
+    scaler = FeatureScaler.load(path)
     logger.info(f"Scaler geladen: {path}")
     return scaler
@@ -0,0 +1,213 @@
+# src/dbot/model/feature_graph.py
+# Feature-Graph: gemeinsame Zwischenstufen (EMA, Rolling-Summen, True Range, ...)
+# werden pro Berechnung nur einmal gebildet und von allen Features geteilt
+import numpy as np
+
+from dbot.model import indicators
+
+# name -> fn(graph, *params); Parameter sind Teil des Cache-Schlüssels
+PRIMITIVES = {}
+# name -> fn(graph); ein Eintrag pro Feature-Spalte
+FEATURES = {}
+
+INPUTS = ('high', 'low', 'close', 'volume')
+
+
+def primitive(name: str):
+    """Registriert eine Zwischenstufe, z.B. @primitive('ema') → graph.get('ema', 'close', 20, 20)."""
+    def register(fn):
+        PRIMITIVES[name] = fn
+        return fn
+    return register
+
+
+def feature(name: str):
+    """Registriert eine Feature-Spalte, die aus Primitiven des Graphen gebildet wird."""
+    def register(fn):
+        FEATURES[name] = fn
+        return fn
+    return register
+
+
+def safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """Division wie `x / y.replace(0, np.nan)`: Nenner 0 → NaN."""
+    return num / np.where(den == 0, np.nan, den)
+
+
+class FeatureGraph:
+    """
+    Memoisierte Feature-Berechnung über OHLCV-Reihen (1D (T,) oder Panel (n, T)).
+
+    Jede Zwischenstufe wird über (name, *params) gecacht, sodass z.B. die True Range
+    für ATR und ADX oder die Fenster-Summen für Bollinger-Mitte und -Breite nur
+    einmal berechnet werden:
+
+        graph = FeatureGraph(high, low, close, volume)
+        graph.get('ema', 'close', 20, 20)
+        graph.matrix(FEATURE_NAMES)   # (..., T, n_features)
+
+    Neue Features werden mit @feature('name') registriert und können alle
+    vorhandenen Primitive wiederverwenden.
+    """
+
+    def __init__(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self._cache = {
+            (name,): np.ascontiguousarray(arr, dtype=np.float64)
+            for name, arr in zip(INPUTS, (high, low, close, volume))
+        }
+
+    def get(self, name: str, *params):
+        key = (name,) + params
+        if key not in self._cache:
+            self._cache[key] = PRIMITIVES[name](self, *params)
+        return self._cache[key]
+
+    def feature(self, name: str) -> np.ndarray:
+        return FEATURES[name](self)
+
+    def matrix(self, names, dtype=np.float64) -> np.ndarray:
+        """
+        Feature-Matrix (..., T, len(names)) inkl. NaN-Warmup-Zeilen.
+
+        Die Spalten werden zeilenweise (Feature-major) direkt in den Ziel-Dtype
+        geschrieben und als transponierte View zurückgegeben – das spart das
+        verschränkte Kopieren; pandas übernimmt das Layout ohne weitere Kopie.
+        """
+        out = np.empty((len(names),) + self.get('close').shape, dtype=dtype)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i, name in enumerate(names):
+                out[i] = self.feature(name)
+        return np.moveaxis(out, 0, -1)
+
+
+# ---------------------------------------------------------------------------
+# Primitive
+# ---------------------------------------------------------------------------
+
+@primitive('prev')
+def _prev(g, src):
+    return indicators.shift(g.get(src), 1)
+
+
+@primitive('hl_range')
+def _hl_range(g):
+    return g.get('high') - g.get('low')
+
+
+@primitive('ema')
+def _ema(g, src, span, min_periods):
+    return indicators.ema(g.get(src), span=span, min_periods=min_periods)
+
+
+@primitive('window_sums')
+def _window_sums(g, src, window):
+    return indicators.window_sums(g.get(src), window)
+
+
+@primitive('rolling_mean')
+def _rolling_mean(g, src, window):
+    return indicators.rolling_mean(g.get(src), window, sums=g.get('window_sums', src, window))
+
+
+@primitive('rolling_std')
+def _rolling_std(g, src, window):
+    return indicators.rolling_std(g.get(src), window, sums=g.get('window_sums', src, window))
+
+
+@primitive('true_range')
+def _true_range(g):
+    return indicators.true_range(g.get('high'), g.get('low'), g.get('close'),
+                                 prev_close=g.get('prev', 'close'), hl=g.get('hl_range'))
+
+
+@primitive('wilder_mean')
+def _wilder_mean(g, src, window):
+    return indicators.wilder_mean(g.get(src), window)
+
+
+@primitive('rsi')
+def _rsi(g, window):
+    return indicators.rsi(g.get('close'), window)
+
+
+@primitive('macd')
+def _macd(g, fast, slow):
+    return g.get('ema', 'close', fast, fast) - g.get('ema', 'close', slow, slow)
+
+
+@primitive('macd_signal')
+def _macd_signal(g, fast, slow, signal):
+    return indicators.ema(g.get('macd', fast, slow), span=signal, min_periods=signal)
+
+
+@primitive('adx')
+def _adx(g, window):
+    return indicators.adx(g.get('high'), g.get('low'), g.get('close'), window, tr=g.get('true_range'))
+
+
+# ---------------------------------------------------------------------------
+# Features (Spalten von FEATURE_NAMES)
+# ---------------------------------------------------------------------------
+
+@feature('close_return')
+def _close_return(g):
+    return np.log(g.get('close') / g.get('prev', 'close'))
+
+
+@feature('volume_ratio')
+def _volume_ratio(g):
+    return g.get('volume') / g.get('rolling_mean', 'volume', 20)
+
+
+@feature('rsi_14')
+def _rsi_14(g):
+    return g.get('rsi', 14)
+
+
+@feature('macd')
+def _macd_feature(g):
+    return g.get('macd', 12, 26)
+
+
+@feature('macd_signal')
+def _macd_signal_feature(g):
+    return g.get('macd_signal', 12, 26, 9)
+
+
+@feature('bb_width')
+def _bb_width(g):
+    bb_mid = g.get('rolling_mean', 'close', 20)
+    bb_std = g.get('rolling_std', 'close', 20)
+    return safe_div((bb_mid + 2 * bb_std) - (bb_mid - 2 * bb_std), bb_mid)
+
+
+@feature('atr_pct')
+def _atr_pct(g):
+    return safe_div(g.get('wilder_mean', 'true_range', 14), g.get('close'))
+
+
+@feature('adx')
+def _adx_feature(g):
+    return g.get('adx', 14)
+
+
+@feature('ema20_dist')
+def _ema20_dist(g):
+    ema20 = g.get('ema', 'close', 20, 20)
+    return safe_div(g.get('close') - ema20, ema20)
+
+
+@feature('ema50_dist')
+def _ema50_dist(g):
+    ema50 = g.get('ema', 'close', 50, 50)
+    return safe_div(g.get('close') - ema50, ema50)
+
+
+@feature('high_low_range')
+def _high_low_range(g):
+    return safe_div(g.get('hl_range'), g.get('close'))
+
+
+@feature('close_position')
+def _close_position(g):
+    return safe_div(g.get('close') - g.get('low'), g.get('hl_range'))
@@ -0,0 +1,173 @@
+# src/dbot/model/feature_store.py
+# Persistenter Feature-Store: berechnete Features pro Symbol/Timeframe auf Festplatte
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dbot.model.feature_engineering import FEATURE_NAMES, _feature_matrix, resolve_dtype
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_STORE_DIR = os.path.join(PROJECT_ROOT, 'artifacts', 'features')
+
+# Bei Änderungen an der Feature-Berechnung erhöhen → alle gespeicherten Matrizen werden neu berechnet
+FEATURE_VERSION = 1
+
+# Kontext-Kerzen beim Anhängen: EMA/Wilder-Zustände sind danach auf float32-Genauigkeit eingeschwungen
+TAIL_CONTEXT = 1000
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def feature_schema_version() -> str:
+    """Schema-Version aus FEATURE_NAMES + FEATURE_VERSION + Dtype-Policy."""
+    payload = json.dumps({'features': FEATURE_NAMES, 'version': FEATURE_VERSION,
+                          'dtype': resolve_dtype().name})
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def candle_hash(df: pd.DataFrame) -> str:
+    """Hash über Zeitstempel + OHLCV-Werte eines DataFrames."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(_index_to_int(df.index)).tobytes())
+    h.update(np.ascontiguousarray(df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def _index_to_int(index: pd.Index) -> np.ndarray:
+    if isinstance(index, pd.DatetimeIndex):
+        return index.as_unit('ns').asi8
+    return np.asarray(index, dtype=np.int64)
+
+
+def _raw_features(df: pd.DataFrame) -> np.ndarray:
+    """Feature-Matrix inkl. NaN-Zeilen (ein Eintrag pro Kerze) im Policy-Dtype, zeilenweise zusammenhängend."""
+    return np.ascontiguousarray(_feature_matrix(
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64),
+        df['close'].to_numpy(dtype=np.float64),
+        df['volume'].to_numpy(dtype=np.float64),
+        dtype=resolve_dtype(),
+    ))
+
+
+def slice_features(feature_df: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """Schneidet Features auf den Zeitraum eines (Teil-)OHLCV-DataFrames zu."""
+    return feature_df.loc[df.index[0]:df.index[-1]]
+
+
+class FeatureStore:
+    """
+    Speichert pro Symbol/Timeframe eine Feature-Matrix im Policy-Dtype (eine Zeile pro Kerze,
+    memory-mappable als .npy) zusammen mit dem Hash der Quell-Kerzen und der
+    Feature-Schema-Version.
+
+    Nutzung:
+        store = FeatureStore()
+        feature_df = store.get(symbol, timeframe, df_ohlcv)   # wie compute_features(df_ohlcv)
+
+    Kommen neue Kerzen hinzu (alter Datensatz ist Präfix des neuen), wird nur der
+    Tail berechnet; bei abweichenden Kerzen oder neuer Schema-Version wird komplett
+    neu berechnet.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _paths(self, symbol: str, timeframe: str) -> dict:
+        safe_name = f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
+        base = os.path.join(self.root, safe_name)
+        return {
+            'features': f"{base}_features.npy",
+            'index': f"{base}_index.npy",
+            'meta': f"{base}_meta.json",
+        }
+
+    def _load_meta(self, paths: dict) -> dict:
+        if not os.path.exists(paths['meta']):
+            return None
+        try:
+            with open(paths['meta']) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('schema') != feature_schema_version():
+            return None
+        if not (os.path.exists(paths['features']) and os.path.exists(paths['index'])):
+            return None
+        return meta
+
+    def load_matrix(self, symbol: str, timeframe: str, mmap: bool = True) -> tuple:
+        """
+        Lädt die gespeicherte Matrix direkt (ohne Hash-Prüfung).
+
+        Returns:
+            (features, index_ns): (n_kerzen, n_features) + int64-Zeitstempel,
+            oder (None, None) falls nicht vorhanden
+        """
+        paths = self._paths(symbol, timeframe)
+        if self._load_meta(paths) is None:
+            return None, None
+        mode = 'r' if mmap else None
+        return np.load(paths['features'], mmap_mode=mode), np.load(paths['index'], mmap_mode=mode)
+
+    def _write(self, paths: dict, features: np.ndarray, index_ns: np.ndarray, df: pd.DataFrame):
+        os.makedirs(self.root, exist_ok=True)
+        for key, arr in (('features', features), ('index', index_ns)):
+            tmp = f"{paths[key]}.tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, paths[key])
+        meta = {
+            'schema': feature_schema_version(),
+            'feature_names': FEATURE_NAMES,
+            'candle_hash': candle_hash(df),
+            'n_rows': int(len(df)),
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        }
+        tmp = f"{paths['meta']}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=4)
+        os.replace(tmp, paths['meta'])
+
+    def get(self, symbol: str, timeframe: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Liefert die Features für df (NaN-Zeilen entfernt, wie compute_features).
+
+        Args:
+            symbol, timeframe: Schlüssel im Store
+            df: OHLCV-DataFrame (Quell-Kerzen)
+
+        Returns:
+            DataFrame (Policy-Dtype) mit FEATURE_NAMES-Spalten
+        """
+        paths = self._paths(symbol, timeframe)
+        meta = self._load_meta(paths)
+        features = None
+
+        if meta is not None:
+            n_stored = meta['n_rows']
+            if n_stored <= len(df) and candle_hash(df.iloc[:n_stored]) == meta['candle_hash']:
+                stored = np.load(paths['features'], mmap_mode='r')
+                if stored.shape == (n_stored, len(FEATURE_NAMES)):
+                    if n_stored == len(df):
+                        features = stored
+                        logger.info(f"Feature-Store Treffer: {symbol} ({timeframe}) | {n_stored} Kerzen")
+                    elif n_stored >= TAIL_CONTEXT:
+                        tail = _raw_features(df.iloc[n_stored - TAIL_CONTEXT:])[TAIL_CONTEXT:]
+                        features = np.concatenate([stored, tail])
+                        self._write(paths, features, _index_to_int(df.index), df)
+                        logger.info(f"Feature-Store erweitert: {symbol} ({timeframe}) | +{len(tail)} Kerzen")
+
+        if features is None:
+            features = _raw_features(df)
+            self._write(paths, features, _index_to_int(df.index), df)
+            logger.info(f"Feature-Store neu berechnet: {symbol} ({timeframe}) | {len(df)} Kerzen")
+
+        feature_df = pd.DataFrame(np.asarray(features), index=df.index, columns=FEATURE_NAMES)
+        return feature_df.dropna()
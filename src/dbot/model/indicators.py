@@ -0,0 +1,293 @@
+# src/dbot/model/indicators.py
+# Vektorisierte NumPy-Indikator-Kernels (Ersatz für `ta` auf den Hot Paths)
+#
+# Alle Kernels arbeiten entlang der letzten Achse (Zeit) und akzeptieren 1D-Arrays
+# (T,) oder 2D-Arrays (n_reihen, T). Rückgabe sind zusammenhängende float64-Arrays.
+# Die Warmup-Semantik entspricht den `ta`-Indikatoren, die compute_features bisher
+# verwendet hat (NaN bzw. 0 während des Warmups). Führende NaN-Werte werden von
+# ema() je Reihe übersprungen; NaN-Lücken mitten in der Reihe propagieren.
+from functools import lru_cache
+
+import numpy as np
+
+# Maximaler Exponent für die blockweise Rekursion: decay^-k bleibt < 1e150
+_MAX_LOG_SCALE = 150 * np.log(10)
+
+
+def _as_float(x) -> np.ndarray:
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Verschiebt entlang der Zeitachse (wie pd.Series.shift), aufgefüllt mit NaN."""
+    x = np.asarray(x)
+    if not np.issubdtype(x.dtype, np.floating):
+        x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if periods > 0:
+        out[..., periods:] = x[..., :-periods]
+    elif periods < 0:
+        out[..., :periods] = x[..., -periods:]
+    else:
+        out[...] = x
+    return out
+
+
+def linear_recurrence(x: np.ndarray, decay: float, init=0.0) -> np.ndarray:
+    """
+    Löst y[t] = decay * y[t-1] + x[t] mit y[-1] = init entlang der letzten Achse.
+
+    Statt einer Python-Schleife pro Kerze wird blockweise über kumulative Summen
+    gerechnet: innerhalb eines Blocks gilt
+        y[s+k] = decay^k * (decay * y[s-1] + sum_{m<=k} x[s+m] * decay^-m).
+    Die Blockgröße wird so gewählt, dass decay^-k nicht überläuft.
+    """
+    x = _as_float(x)
+    y = np.empty_like(x)
+    n = x.shape[-1]
+    if n == 0:
+        return y
+    prev = np.broadcast_to(np.asarray(init, dtype=np.float64), x.shape[:-1]).copy()
+
+    if decay <= 0.0:
+        y[...] = x
+        return y
+    if decay >= 1.0:
+        return np.cumsum(x, axis=-1) + prev[..., None]
+
+    growth, damp = _decay_powers(float(decay))
+    block = min(n, len(growth))
+
+    buf = np.empty(x.shape[:-1] + (block,))
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        m = stop - start
+        cs = buf[..., :m]
+        np.multiply(x[..., start:stop], growth[:m], out=cs)
+        np.cumsum(cs, axis=-1, out=cs)
+        cs += (decay * prev)[..., None]
+        np.multiply(cs, damp[:m], out=y[..., start:stop])
+        prev = y[..., stop - 1]
+    return y
+
+
+@lru_cache(maxsize=64)
+def _decay_powers(decay: float) -> tuple:
+    """(decay^-k, decay^k) für k < maximale Blockgröße; je decay nur einmal berechnet."""
+    log_decay = np.log(decay)
+    k = np.arange(int(max(1, _MAX_LOG_SCALE // -log_decay)))
+    growth = np.exp(-log_decay * k)
+    damp = np.exp(log_decay * k)
+    growth.flags.writeable = False
+    damp.flags.writeable = False
+    return growth, damp
+
+
+def first_valid(x: np.ndarray) -> np.ndarray:
+    """Index des ersten Nicht-NaN-Werts je Reihe (T falls komplett NaN)."""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), x.shape[-1])
+
+
+def realign(x: np.ndarray, offsets: np.ndarray, direction: int) -> np.ndarray:
+    """Verschiebt jede Reihe um ihren Offset nach links (-1) bzw. rechts (+1)."""
+    n = x.shape[-1]
+    offsets = np.broadcast_to(np.minimum(offsets, n), x.shape[:-1])
+    if offsets.size and np.all(offsets == offsets.flat[0]):
+        # Gleicher Offset für alle Reihen → einfacher Slice
+        return shift(x, direction * int(offsets.flat[0]))
+
+    # Beidseitig mit NaN auffüllen; jede Reihe ist dann ein zusammenhängendes
+    # Fenster der Länge n im aufgefüllten Array
+    rows = x.reshape(-1, n)
+    padded = np.full((rows.shape[0], 3 * n), np.nan, dtype=x.dtype)
+    padded[:, n:2 * n] = rows
+    windows = np.lib.stride_tricks.sliding_window_view(padded, n, axis=-1)
+    starts = n + direction * -offsets.reshape(-1)
+    return windows[np.arange(rows.shape[0]), starts].reshape(x.shape)
+
+
+def ema(x: np.ndarray, span: int = None, alpha: float = None, min_periods: int = 0) -> np.ndarray:
+    """
+    Exponentieller gleitender Durchschnitt (pandas ewm, adjust=False).
+
+    Führende NaN-Werte werden je Reihe übersprungen (Start beim ersten gültigen
+    Wert), min_periods zählt ab diesem Startpunkt.
+    """
+    x = _as_float(x)
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    first = first_valid(x)
+    aligned = np.any(first > 0)
+    if aligned:
+        x = realign(x, first, -1)
+
+    if x.shape[-1] == 0:
+        return x.copy()
+    # y[-1] = x[0] ergibt y[0] = x[0] (pandas-Startwert bei adjust=False)
+    y = linear_recurrence(alpha * x, 1.0 - alpha, init=x[..., 0])
+    if min_periods > 1:
+        y[..., :min_periods - 1] = np.nan
+
+    if aligned:
+        y = realign(y, first, 1)
+    return y
+
+
+def window_sums(x: np.ndarray, window: int) -> tuple:
+    """
+    Rolling-Summen von x und x² über kumulative Summen (NaN-Fenster → NaN).
+
+    Returns:
+        (s1, s2, ref): zentrierte Fenster-Summen und Zentrierungswert – gemeinsame
+        Zwischenstufe von rolling_mean und rolling_std
+    """
+    x = _as_float(x)
+    nan_mask = np.isnan(x)
+    # Um einen Referenzwert zentrieren, damit die kumulativen Summen nicht auslöschen
+    ref = np.nanmean(x, axis=-1, keepdims=True) if x.shape[-1] else 0.0
+    ref = np.nan_to_num(ref)
+    xc = np.where(nan_mask, 0.0, x - ref)
+
+    def cumsum0(v):
+        # Kumulative Summe mit führender 0 (Länge T+1) ohne Zwischenkopie
+        out = np.zeros(x.shape[:-1] + (x.shape[-1] + 1,))
+        np.cumsum(v, axis=-1, out=out[..., 1:])
+        return out
+
+    cs1 = cumsum0(xc)
+    cs2 = cumsum0(xc * xc)
+
+    s1 = np.full_like(x, np.nan)
+    s2 = np.full_like(x, np.nan)
+    if x.shape[-1] >= window:
+        np.subtract(cs1[..., window:], cs1[..., :-window], out=s1[..., window - 1:])
+        np.subtract(cs2[..., window:], cs2[..., :-window], out=s2[..., window - 1:])
+        if nan_mask.any():
+            csn = cumsum0(nan_mask)
+            win_nan = (csn[..., window:] - csn[..., :-window]) > 0
+            s1[..., window - 1:][win_nan] = np.nan
+            s2[..., window - 1:][win_nan] = np.nan
+    return s1, s2, ref
+
+
+def rolling_mean(x: np.ndarray, window: int, sums: tuple = None) -> np.ndarray:
+    """Gleitender Mittelwert (min_periods = window). `sums` = window_sums(x, window)."""
+    s1, _, ref = sums if sums is not None else window_sums(x, window)
+    return s1 / window + ref
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 0, sums: tuple = None) -> np.ndarray:
+    """Gleitende Standardabweichung (min_periods = window). `sums` = window_sums(x, window)."""
+    s1, s2, _ = sums if sums is not None else window_sums(x, window)
+    var = (s2 - s1 * s1 / window) / (window - ddof)
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+               prev_close: np.ndarray = None, hl: np.ndarray = None) -> np.ndarray:
+    """True Range; erste Kerze = High - Low (wie ta). prev_close/hl optional vorberechnet."""
+    high, low = _as_float(high), _as_float(low)
+    if prev_close is None:
+        prev_close = shift(close, 1)
+    if hl is None:
+        hl = high - low
+    with np.errstate(invalid='ignore'):
+        tr = np.fmax(hl, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return tr
+
+
+def wilder_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Wilder-Glättung als Mittelwert (ta ATR): Startwert = Mittel der ersten `window`
+    Werte an Index window-1, davor 0.
+    """
+    x = _as_float(x)
+    out = np.zeros_like(x)
+    if x.shape[-1] < window:
+        return out
+    seed = x[..., :window].mean(axis=-1)
+    out[..., window - 1] = seed
+    out[..., window:] = linear_recurrence(x[..., window:] / window, (window - 1) / window, init=seed)
+    return out
+
+
+def wilder_sum(x: np.ndarray, window: int, start: int = 0) -> np.ndarray:
+    """
+    Wilder-Glättung als Summe (ta DMI): s[t] = s[t-1] - s[t-1]/window + x[t],
+    Startwert = Summe von x[start:start+window] an Index start+window-1, davor 0.
+    """
+    x = _as_float(x)
+    out = np.zeros_like(x)
+    first = start + window - 1
+    if x.shape[-1] <= first:
+        return out
+    seed = x[..., start:first + 1].sum(axis=-1)
+    out[..., first] = seed
+    out[..., first + 1:] = linear_recurrence(x[..., first + 1:], 1.0 - 1.0 / window, init=seed)
+    return out
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """RSI mit Wilder-EMA (alpha = 1/window), wie ta.momentum.RSIIndicator."""
+    diff = np.diff(_as_float(close), axis=-1, prepend=np.nan)
+    diff[..., :1] = 0.0
+    up = np.maximum(diff, 0.0)
+    down = np.maximum(-diff, 0.0)
+    ema_up = ema(up, alpha=1.0 / window, min_periods=window)
+    ema_down = ema(down, alpha=1.0 / window, min_periods=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_down))
+    return np.ascontiguousarray(out)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
+    """MACD-Linie und Signal-Linie, wie ta.trend.MACD."""
+    macd_line = ema(close, span=fast, min_periods=fast) - ema(close, span=slow, min_periods=slow)
+    macd_signal = ema(macd_line, span=signal, min_periods=signal)
+    return macd_line, macd_signal
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Average True Range, wie ta.volatility.AverageTrueRange (Warmup = 0)."""
+    return wilder_mean(true_range(high, low, close), window)
+
+
+def directional_movement(high: np.ndarray, low: np.ndarray) -> tuple:
+    """+DM / -DM je Kerze (erste Kerze 0)."""
+    high, low = _as_float(high), _as_float(low)
+    diff_up = high - shift(high, 1)
+    diff_down = shift(low, 1) - low
+    with np.errstate(invalid='ignore'):
+        pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+        neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+    return pos, neg
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14,
+        tr: np.ndarray = None) -> np.ndarray:
+    """
+    Average Directional Index, wie ta.trend.ADXIndicator.adx().
+
+    Wilder-Summen von TR/+DM/-DM ab Kerze 1, DX ab Kerze `window`, ADX ab Kerze
+    2*window-1 (davor 0). `tr` kann übergeben werden, wenn die True Range bereits
+    berechnet wurde.
+    """
+    if tr is None:
+        tr = true_range(high, low, close)
+    pos, neg = directional_movement(high, low)
+
+    trs = wilder_sum(tr, window, start=1)
+    dip = wilder_sum(pos, window, start=1)
+    din = wilder_sum(neg, window, start=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = np.where(trs != 0, 100.0 * dip / trs, 0.0)
+        di_neg = np.where(trs != 0, 100.0 * din / trs, 0.0)
+        di_sum = di_pos + di_neg
+        dx = np.where(di_sum != 0, 100.0 * np.abs((di_pos - di_neg) / di_sum), 0.0)
+
+    # DX beginnt an Index `window`; ADX = Wilder-Mittel darüber
+    out = np.zeros_like(dx)
+    out[..., window:] = wilder_mean(dx[..., window:], window)
+    return out
@@ -1,8 +1,30 @@
 # src/dbot/model/lstm_model.py
-# PyTorch LSTM Modell für 3-Klassen-Klassifikation: Long / Neutral / Short
+# PyTorch Modelle für 3-Klassen-Klassifikation: Long / Neutral / Short
+# (LSTM und kausales TCN, auswählbar über model_config['model_type'])
+import inspect
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
+# model_type -> Modellklasse; create_model / load_model wählen darüber die Architektur
+MODEL_TYPES = {}
+# Per --model-type wählbar: nur Architekturen, die create_model allein aus model_config baut
+# (multihead/shared entstehen über --multi-head bzw. train_shared_model)
+CLI_MODEL_TYPES = []
+
+
+def register_model(name: str, cli: bool = True):
+    """Registriert eine Architektur, z.B. @register_model('tcn') → create_model(n, {'model_type': 'tcn'})."""
+    def register(cls):
+        cls.model_type = name
+        MODEL_TYPES[name] = cls
+        if cli:
+            CLI_MODEL_TYPES.append(name)
+        return cls
+    return register
+
+
+@register_model('lstm')
 class LSTMModel(nn.Module):
     """
     LSTM-Modell für Krypto-Trendvorhersage.
@@ -18,8 +40,12 @@ class LSTMModel(nn.Module):
     def __init__(self, n_features: int, hidden_size: int = 128, num_layers: int = 2,
                  dropout: float = 0.2, fc_hidden: int = 64, n_classes: int = 3):
         super().__init__()
+        self.n_features = n_features
         self.hidden_size = hidden_size
         self.num_layers = num_layers
+        # Konstruktor-Argumente für save_model / load_model
+        self.hparams = {'hidden_size': hidden_size, 'num_layers': num_layers, 'dropout': dropout,
+                        'fc_hidden': fc_hidden, 'n_classes': n_classes}
 
         self.lstm = nn.LSTM(
             input_size=n_features,
@@ -50,15 +76,261 @@ class LSTMModel(nn.Module):
         logits = self.forward(x)
         return torch.softmax(logits, dim=-1)
 
+    def forward_sequence(self, x: torch.Tensor, state: tuple = None) -> tuple:
+        """
+        Zustandsbehaftete Variante: Logits für jeden Zeitschritt + LSTM-Zustand.
+
+        Args:
+            x:     (batch, T, features)
+            state: (h, c) je (num_layers, batch, hidden_size) oder None (Nullzustand)
+
+        Returns:
+            (logits (batch, T, 3), (h, c)) – der Zustand kann in den nächsten Aufruf
+            weitergereicht werden (Truncated BPTT / Kerze-für-Kerze-Inference)
+        """
+        lstm_out, state = self.lstm(x, state)
+        out = self.dropout(lstm_out)
+        out = self.relu(self.fc1(out))
+        out = self.dropout(out)
+        return self.fc2(out), state
+
+
+@register_model('multihead', cli=False)
+class MultiHeadLSTMModel(nn.Module):
+    """
+    Gemeinsamer LSTM-Trunk mit einem 3-Klassen-Kopf je Label-Variante (horizon, neutral_zone).
+
+    Ein Training deckt das komplette Grid ab (Summe der Losses aller Köpfe, Labels aus
+    create_label_grid). forward(x) liefert wie LSTMModel (batch, 3) – die Logits des
+    aktiven Kopfs (select_head); forward_all(x) alle Köpfe als (batch, n_heads, 3).
+    """
+    def __init__(self, n_features: int, head_keys: list, hidden_size: int = 128, num_layers: int = 2,
+                 dropout: float = 0.2, fc_hidden: int = 64, n_classes: int = 3, active_head: int = 0):
+        super().__init__()
+        self.n_features = n_features
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        self.head_keys = [(int(h), float(nz)) for h, nz in head_keys]
+        self.hparams = {'head_keys': [list(k) for k in self.head_keys], 'hidden_size': hidden_size,
+                        'num_layers': num_layers, 'dropout': dropout, 'fc_hidden': fc_hidden,
+                        'n_classes': n_classes, 'active_head': active_head}
+        self.active_head = active_head
+
+        self.lstm = nn.LSTM(
+            input_size=n_features,
+            hidden_size=hidden_size,
+            num_layers=num_layers,
+            batch_first=True,
+            dropout=dropout if num_layers > 1 else 0.0,
+        )
+        self.dropout = nn.Dropout(p=0.3)
+        self.relu = nn.ReLU()
+        self.fc1 = nn.ModuleList([nn.Linear(hidden_size, fc_hidden) for _ in self.head_keys])
+        self.fc2 = nn.ModuleList([nn.Linear(fc_hidden, n_classes) for _ in self.head_keys])
+
+    def head_index(self, horizon: int, neutral_zone_pct: float) -> int:
+        """Index des Kopfs für (horizon, neutral_zone_pct); ValueError, wenn nicht trainiert."""
+        for i, (h, nz) in enumerate(self.head_keys):
+            if h == int(horizon) and abs(nz - float(neutral_zone_pct)) < 1e-9:
+                return i
+        raise ValueError(f"Kein Kopf für horizon={horizon}, neutral_zone={neutral_zone_pct} "
+                         f"(vorhanden: {self.head_keys})")
+
+    def select_head(self, horizon: int, neutral_zone_pct: float) -> 'MultiHeadLSTMModel':
+        """Aktiviert den Kopf für forward / predict_proba (wird mit save_model gespeichert)."""
+        self.active_head = self.head_index(horizon, neutral_zone_pct)
+        self.hparams['active_head'] = self.active_head
+        return self
 
-def create_model(n_features: int, model_config: dict = None) -> LSTMModel:
-    """Erstellt ein LSTM-Modell mit optionaler Konfiguration."""
-    cfg = model_config or {}
-    return LSTMModel(
-        n_features=n_features,
-        hidden_size=cfg.get('hidden_size', 128),
-        num_layers=cfg.get('num_layers', 2),
-        dropout=cfg.get('dropout', 0.2),
-        fc_hidden=cfg.get('fc_hidden', 64),
-        n_classes=3,
-    )
+    def _head(self, i: int, last_hidden: torch.Tensor) -> torch.Tensor:
+        out = self.dropout(last_hidden)
+        out = self.relu(self.fc1[i](out))
+        out = self.dropout(out)
+        return self.fc2[i](out)
+
+    def forward_all(self, x: torch.Tensor) -> torch.Tensor:
+        """Logits aller Köpfe (batch, n_heads, 3)."""
+        lstm_out, _ = self.lstm(x)
+        last_hidden = lstm_out[:, -1, :]
+        return torch.stack([self._head(i, last_hidden) for i in range(len(self.head_keys))], dim=1)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        lstm_out, _ = self.lstm(x)
+        return self._head(self.active_head, lstm_out[:, -1, :])
+
+    def predict_proba(self, x: torch.Tensor) -> torch.Tensor:
+        """Gibt Wahrscheinlichkeiten (Softmax) des aktiven Kopfs zurück."""
+        return torch.softmax(self.forward(x), dim=-1)
+
+
+# Die letzten beiden Eingabe-Spalten eines SharedLSTMModel: Symbol- und Timeframe-Index
+MARKET_COLUMNS = ('_symbol_id', '_timeframe_id')
+
+
+@register_model('shared', cli=False)
+class SharedLSTMModel(nn.Module):
+    """
+    Ein Modell für mehrere Märkte (Symbol × Timeframe): gelernte Symbol- und
+    Timeframe-Embeddings werden an jeden Zeitschritt der Features angehängt.
+
+    Input:  (batch, seq_len, n_features) – die letzten beiden Spalten (MARKET_COLUMNS)
+            enthalten Symbol- und Timeframe-Index, davor die skalierten Features
+    Output: (batch, 3)
+
+    Fenster verschiedener Märkte können so in einem Batch laufen; bind(symbol, timeframe)
+    liefert eine Sicht mit der gewohnten Schnittstelle (nur Features als Eingabe).
+    """
+    def __init__(self, n_features: int, symbols: list, timeframes: list, embed_dim: int = 8,
+                 hidden_size: int = 128, num_layers: int = 2, dropout: float = 0.2, fc_hidden: int = 64,
+                 n_classes: int = 3):
+        super().__init__()
+        self.n_features = n_features
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes)
+        self.hparams = {'symbols': self.symbols, 'timeframes': self.timeframes, 'embed_dim': embed_dim,
+                        'hidden_size': hidden_size, 'num_layers': num_layers, 'dropout': dropout,
+                        'fc_hidden': fc_hidden, 'n_classes': n_classes}
+
+        self.symbol_embedding = nn.Embedding(len(self.symbols), embed_dim)
+        self.timeframe_embedding = nn.Embedding(len(self.timeframes), embed_dim)
+        self.lstm = nn.LSTM(
+            input_size=n_features - len(MARKET_COLUMNS) + 2 * embed_dim,
+            hidden_size=hidden_size,
+            num_layers=num_layers,
+            batch_first=True,
+            dropout=dropout if num_layers > 1 else 0.0,
+        )
+        self.dropout = nn.Dropout(p=0.3)
+        self.fc1 = nn.Linear(hidden_size, fc_hidden)
+        self.relu = nn.ReLU()
+        self.fc2 = nn.Linear(fc_hidden, n_classes)
+
+    def market_index(self, symbol: str, timeframe: str) -> tuple:
+        """(Symbol-Index, Timeframe-Index); ValueError, wenn der Markt nicht trainiert wurde."""
+        if symbol not in self.symbols or timeframe not in self.timeframes:
+            raise ValueError(f"Markt {symbol} ({timeframe}) nicht im gemeinsamen Modell "
+                             f"(Symbole: {self.symbols}, Timeframes: {self.timeframes})")
+        return self.symbols.index(symbol), self.timeframes.index(timeframe)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        features, ids = x[..., :-len(MARKET_COLUMNS)], x[:, -1, -len(MARKET_COLUMNS):].long()
+        emb = torch.cat([self.symbol_embedding(ids[:, 0]), self.timeframe_embedding(ids[:, 1])], dim=-1)
+        lstm_out, _ = self.lstm(torch.cat([features, emb[:, None, :].expand(-1, x.shape[1], -1)], dim=-1))
+        out = self.dropout(lstm_out[:, -1, :])
+        out = self.relu(self.fc1(out))
+        out = self.dropout(out)
+        return self.fc2(out)
+
+    def predict_proba(self, x: torch.Tensor) -> torch.Tensor:
+        """Gibt Wahrscheinlichkeiten (Softmax) zurück."""
+        return torch.softmax(self.forward(x), dim=-1)
+
+    def bind(self, symbol: str, timeframe: str) -> 'MarketBoundModel':
+        return MarketBoundModel(self, symbol, timeframe)
+
+
+class MarketBoundModel(nn.Module):
+    """SharedLSTMModel für einen festen Markt: Input (batch, seq_len, Features) wie LSTMModel."""
+    model_type = 'shared'
+
+    def __init__(self, shared: SharedLSTMModel, symbol: str, timeframe: str):
+        super().__init__()
+        self.shared = shared
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.n_features = shared.n_features - len(MARKET_COLUMNS)
+        self.register_buffer('ids', torch.tensor(shared.market_index(symbol, timeframe), dtype=torch.float32,
+                                                device=shared.fc2.weight.device))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        ids = self.ids.to(x.dtype).expand(x.shape[0], x.shape[1], len(MARKET_COLUMNS))
+        return self.shared(torch.cat([x, ids], dim=-1))
+
+    def predict_proba(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.softmax(self.forward(x), dim=-1)
+
+
+class CausalConvBlock(nn.Module):
+    """
+    Residual-Block aus zwei dilatierten kausalen Conv1d: Ausgabe zum Zeitpunkt t sieht
+    nur Eingaben ≤ t (links mit (kernel_size - 1) · dilation aufgefüllt).
+    """
+    def __init__(self, in_channels: int, out_channels: int, kernel_size: int, dilation: int, dropout: float):
+        super().__init__()
+        self.pad = (kernel_size - 1) * dilation
+        self.conv1 = nn.Conv1d(in_channels, out_channels, kernel_size, dilation=dilation)
+        self.conv2 = nn.Conv1d(out_channels, out_channels, kernel_size, dilation=dilation)
+        self.dropout = nn.Dropout(dropout)
+        self.relu = nn.ReLU()
+        self.downsample = nn.Conv1d(in_channels, out_channels, 1) if in_channels != out_channels else None
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        # x: (batch, channels, seq_len)
+        out = self.dropout(self.relu(self.conv1(F.pad(x, (self.pad, 0)))))
+        out = self.dropout(self.relu(self.conv2(F.pad(out, (self.pad, 0)))))
+        residual = x if self.downsample is None else self.downsample(x)
+        return self.relu(out + residual)
+
+
+@register_model('tcn')
+class TCNModel(nn.Module):
+    """
+    Temporal Convolutional Network: gleiche Schnittstelle wie LSTMModel, aber alle
+    Zeitschritte eines Fensters werden parallel gefaltet statt sequenziell rekurriert.
+
+    Input:  (batch_size, seq_len, n_features)
+    Output: (batch_size, 3)  →  Logits [long, neutral, short]
+
+    Dilatationen 1, 2, 4, ... je Level; rezeptives Feld = 1 + 2 · (kernel_size - 1) · (2^levels - 1)
+    Kerzen (Standard kernel_size=3, levels=4: 61 ≥ seq_len 60). Ältere Kerzen im Fenster
+    gehen nicht in die Vorhersage ein.
+    """
+    def __init__(self, n_features: int, channels: int = 64, kernel_size: int = 3, levels: int = 4,
+                 dropout: float = 0.2, fc_hidden: int = 64, n_classes: int = 3):
+        super().__init__()
+        self.n_features = n_features
+        self.hparams = {'channels': channels, 'kernel_size': kernel_size, 'levels': levels,
+                        'dropout': dropout, 'fc_hidden': fc_hidden, 'n_classes': n_classes}
+        self.receptive_field = 1 + 2 * (kernel_size - 1) * (2 ** levels - 1)
+
+        self.blocks = nn.Sequential(*[
+            CausalConvBlock(n_features if i == 0 else channels, channels, kernel_size, 2 ** i, dropout)
+            for i in range(levels)
+        ])
+        self.dropout = nn.Dropout(p=0.3)
+        self.fc1 = nn.Linear(channels, fc_hidden)
+        self.relu = nn.ReLU()
+        self.fc2 = nn.Linear(fc_hidden, n_classes)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        # x: (batch, seq_len, features) → Conv1d erwartet (batch, features, seq_len)
+        conv_out = self.blocks(x.transpose(1, 2))
+        last = conv_out[:, :, -1]                  # (batch, channels)
+        out = self.dropout(last)
+        out = self.relu(self.fc1(out))
+        out = self.dropout(out)
+        return self.fc2(out)
+
+    def predict_proba(self, x: torch.Tensor) -> torch.Tensor:
+        """Gibt Wahrscheinlichkeiten (Softmax) zurück."""
+        return torch.softmax(self.forward(x), dim=-1)
+
+
+def create_model(n_features: int, model_config: dict = None) -> nn.Module:
+    """
+    Erstellt ein Modell mit optionaler Konfiguration; model_config['model_type']
+    wählt die Architektur (Standard 'lstm'), die übrigen Schlüssel gehen an den
+    Konstruktor (unbekannte werden ignoriert, z.B. hidden_size beim TCN).
+    """
+    cfg = dict(model_config or {})
+    model_type = cfg.pop('model_type', 'lstm')
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"Unbekannter model_type: {model_type} (erlaubt: {', '.join(MODEL_TYPES)})")
+    if model_type == 'lstm':
+        # Bisherige Defaults von create_model
+        cfg = {'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64, **cfg}
+    cls = MODEL_TYPES[model_type]
+    params = inspect.signature(cls).parameters
+    return cls(n_features=n_features, **{k: v for k, v in cfg.items() if k in params})
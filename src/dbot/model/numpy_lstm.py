@@ -0,0 +1,198 @@
+# src/dbot/model/numpy_lstm.py
+# Torch-freie Inference: Forward-Pass von LSTMModel in reinem NumPy (für die Live-Prozesse)
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NPZ_SUFFIX = '.lstm.npz'
+
+_CONFIG_KEYS = ('n_features', 'hidden_size', 'num_layers', 'fc_hidden')
+
+
+def npz_path(model_path: str) -> str:
+    """Pfad der exportierten Gewichte neben dem Checkpoint, z.B. BTCUSDTUSDT_4h.lstm.npz."""
+    base, _ = os.path.splitext(model_path)
+    return base + NPZ_SUFFIX
+
+
+def export_is_current(model_path: str) -> bool:
+    """True, wenn die .lstm.npz existiert und nicht älter als der Checkpoint ist."""
+    path = npz_path(model_path)
+    return os.path.exists(path) and (not os.path.exists(model_path)
+                                     or os.path.getmtime(path) >= os.path.getmtime(model_path))
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # Über tanh: ohne Overflow in exp für große negative Werte
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class NumpyLSTM:
+    """
+    Exakter Nachbau von LSTMModel.predict_proba (eval-Modus, Dropout entfällt).
+
+        gates = x·W_ihᵀ + b_ih + h·W_hhᵀ + b_hh   (Reihenfolge i, f, g, o wie nn.LSTM)
+        c = f·c + i·g,  h = o·tanh(c)
+        logits = fc2(relu(fc1(h_T)))  →  softmax
+
+    Die Eingangs-Projektion wird pro Layer für alle Zeitschritte in einer Matrix-
+    Multiplikation berechnet, nur die Rekurrenz läuft als Schleife über seq_len.
+
+    Nutzung:
+        model = NumpyLSTM.from_files(model_path)   # .lstm.npz oder .pt-Checkpoint
+        probs = model.predict_proba(X)             # X: (batch, seq_len, n_features)
+    """
+
+    def __init__(self, weights: dict, n_features: int, hidden_size: int, num_layers: int,
+                 fc_hidden: int, dtype=np.float32, stateful: bool = False):
+        self.n_features = n_features
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        self.fc_hidden = fc_hidden
+        self.dtype = np.dtype(dtype)
+        # Mit Truncated BPTT trainiert (Metadaten 'stateful'): Kerze-für-Kerze-Inference
+        self.stateful = stateful
+
+        def w(name):
+            return np.ascontiguousarray(weights[name], dtype=self.dtype)
+
+        # Transponiert ablegen: x @ W statt x @ W.T im heißen Pfad
+        self.layers = [
+            (w(f'lstm.weight_ih_l{k}').T.copy(), w(f'lstm.weight_hh_l{k}').T.copy(),
+             w(f'lstm.bias_ih_l{k}') + w(f'lstm.bias_hh_l{k}'))
+            for k in range(num_layers)
+        ]
+        self.fc1 = (w('fc1.weight').T.copy(), w('fc1.bias'))
+        self.fc2 = (w('fc2.weight').T.copy(), w('fc2.bias'))
+
+    @classmethod
+    def from_state_dict(cls, state_dict: dict, config: dict, dtype=np.float32,
+                        stateful: bool = False) -> 'NumpyLSTM':
+        """Aus einem (torch) state_dict + Checkpoint-Konfiguration."""
+        weights = {k: np.asarray(v.detach().cpu().numpy() if hasattr(v, 'detach') else v)
+                   for k, v in state_dict.items()}
+        return cls(weights, **{k: int(config[k]) for k in _CONFIG_KEYS}, dtype=dtype, stateful=stateful)
+
+    @classmethod
+    def from_checkpoint(cls, model_path: str, dtype=np.float32) -> 'NumpyLSTM':
+        """Liest einen .pt-Checkpoint – benötigt torch (nur hier importiert)."""
+        import torch
+        checkpoint = torch.load(model_path, map_location='cpu', weights_only=True)
+        if checkpoint.get('quantization'):
+            raise ValueError(f"Quantisierte Checkpoints werden nicht unterstützt: {model_path}")
+        if checkpoint.get('model_type', 'lstm') != 'lstm':
+            raise ValueError(f"NumPy-Inference nur für LSTM-Checkpoints (model_type="
+                             f"{checkpoint['model_type']}): {model_path}")
+        stateful = bool(checkpoint.get('metadata', {}).get('stateful', False))
+        return cls.from_state_dict(checkpoint['state_dict'], checkpoint, dtype=dtype, stateful=stateful)
+
+    @classmethod
+    def load(cls, path: str, dtype=np.float32) -> 'NumpyLSTM':
+        """Lädt exportierte Gewichte (.lstm.npz) – ohne torch."""
+        with np.load(path, allow_pickle=False) as data:
+            config = {k: int(data[f'config.{k}']) for k in _CONFIG_KEYS}
+            stateful = 'config.stateful' in data.files and bool(data['config.stateful'])
+            weights = {k: data[k] for k in data.files if not k.startswith('config.')}
+        return cls(weights, **config, dtype=dtype, stateful=stateful)
+
+    @classmethod
+    def from_files(cls, model_path: str, dtype=np.float32) -> 'NumpyLSTM':
+        """
+        Bevorzugt die .lstm.npz neben dem Checkpoint (torch-frei); fehlt sie oder ist
+        sie älter als der Checkpoint, wird der .pt-Checkpoint gelesen.
+        """
+        if export_is_current(model_path):
+            return cls.load(npz_path(model_path), dtype=dtype)
+        logger.info(f"Keine aktuelle {NPZ_SUFFIX} für {model_path}, lese Checkpoint (torch).")
+        return cls.from_checkpoint(model_path, dtype=dtype)
+
+    def save(self, path: str):
+        """Speichert Gewichte + Konfiguration als .npz (state_dict-Namen, atomar)."""
+        arrays = {f'config.{k}': np.int64(getattr(self, k)) for k in _CONFIG_KEYS}
+        arrays['config.stateful'] = np.int64(self.stateful)
+        for k, (w_ih, w_hh, bias) in enumerate(self.layers):
+            arrays[f'lstm.weight_ih_l{k}'] = w_ih.T
+            arrays[f'lstm.weight_hh_l{k}'] = w_hh.T
+            # Bias-Summe als bias_ih, bias_hh = 0 (beim Laden ohnehin addiert)
+            arrays[f'lstm.bias_ih_l{k}'] = bias
+            arrays[f'lstm.bias_hh_l{k}'] = np.zeros_like(bias)
+        arrays['fc1.weight'], arrays['fc1.bias'] = self.fc1[0].T, self.fc1[1]
+        arrays['fc2.weight'], arrays['fc2.bias'] = self.fc2[0].T, self.fc2[1]
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def eval(self) -> 'NumpyLSTM':
+        """Kompatibel zur nn.Module-Schnittstelle des Predictors (kein Trainingsmodus)."""
+        return self
+
+    def _lstm(self, x: np.ndarray, state: tuple = None, full: bool = False) -> tuple:
+        """
+        LSTM-Stack über x (batch, T, n_features) ab Zustand state ((h, c) je (layers, batch, H)).
+
+        Returns:
+            (Ausgabe des letzten Layers – (batch, T, H) bei full, sonst nur h_T (batch, H),
+             neuer Zustand (h, c))
+        """
+        x = np.asarray(x, dtype=self.dtype)
+        batch, seq_len, _ = x.shape
+        H = self.hidden_size
+        h_out = np.empty((self.num_layers, batch, H), dtype=self.dtype)
+        c_out = np.empty((self.num_layers, batch, H), dtype=self.dtype)
+        seq = x
+        for k, (w_ih, w_hh, bias) in enumerate(self.layers):
+            keep = full or k < self.num_layers - 1
+            proj = seq @ w_ih + bias                    # (batch, seq_len, 4H)
+            if state is None:
+                h = np.zeros((batch, H), dtype=self.dtype)
+                c = np.zeros((batch, H), dtype=self.dtype)
+            else:
+                h = np.asarray(state[0][k], dtype=self.dtype)
+                c = np.asarray(state[1][k], dtype=self.dtype)
+            out = np.empty((batch, seq_len, H), dtype=self.dtype) if keep else None
+            for t in range(seq_len):
+                gates = proj[:, t] + h @ w_hh
+                i = _sigmoid(gates[:, :H])
+                f = _sigmoid(gates[:, H:2 * H])
+                g = np.tanh(gates[:, 2 * H:3 * H])
+                o = _sigmoid(gates[:, 3 * H:])
+                c = f * c + i * g
+                h = o * np.tanh(c)
+                if out is not None:
+                    out[:, t] = h
+            h_out[k], c_out[k] = h, c
+            seq = out
+        return (seq if full else h), (h_out, c_out)
+
+    def _head(self, h: np.ndarray) -> np.ndarray:
+        hidden = np.maximum(h @ self.fc1[0] + self.fc1[1], 0.0)
+        return hidden @ self.fc2[0] + self.fc2[1]
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """Logits (batch, 3) für x (batch, seq_len, n_features)."""
+        h, _ = self._lstm(x)
+        return self._head(h)
+
+    def forward_sequence(self, x: np.ndarray, state: tuple = None) -> tuple:
+        """Logits je Zeitschritt (batch, T, 3) + Zustand (h, c) wie LSTMModel.forward_sequence."""
+        out, state = self._lstm(x, state, full=True)
+        return self._head(out), state
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Softmax-Wahrscheinlichkeiten (batch, 3)."""
+        return self._softmax(self.forward(x))
+
+    def step_proba(self, x: np.ndarray, state: tuple = None) -> tuple:
+        """Wahrscheinlichkeiten je Zeitschritt (batch, T, 3) + neuer Zustand (zustandsbehaftet)."""
+        logits, state = self.forward_sequence(x, state)
+        return self._softmax(logits), state
+
+    __call__ = predict_proba
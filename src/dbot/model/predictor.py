@@ -2,17 +2,68 @@
 # Lädt Modell + Scaler und generiert Live-Predictions
 import os
 import numpy as np
-import torch
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
 import pandas as pd
 
-from dbot.model.trainer import load_model, DEVICE
 from dbot.model.feature_engineering import (
-    compute_features, apply_scaler, load_scaler, FEATURE_NAMES
+    IncrementalFeatureEngine, load_scaler, scaler_exists, FEATURE_NAMES
 )
+from dbot.model.numpy_lstm import NumpyLSTM, npz_path, export_is_current
 
 logger = logging.getLogger(__name__)
 
+# Standard-Backend für from_files, per Umgebungsvariable umstellbar
+INFERENCE_BACKEND = os.environ.get('DBOT_INFERENCE_BACKEND', 'eager')
+# Rechengenauigkeit der eager-Inference ('fp32' oder 'bf16' = Autocast, siehe trainer.autocast)
+PRECISION = os.environ.get('DBOT_PRECISION', 'fp32')
+
+# Destilliertes Student-Modell neben dem Checkpoint (siehe trainer.distill_model)
+STUDENT_SUFFIX = '.student.pt'
+
+
+def student_path(model_path: str) -> str:
+    """Pfad des Student-Checkpoints, z.B. BTCUSDTUSDT_4h.student.pt."""
+    base, _ = os.path.splitext(model_path)
+    return base + STUDENT_SUFFIX
+
+
+# Gemeinsames Modell über mehrere Märkte (siehe dbot.model.shared)
+SHARED_MODEL_NAME = 'shared'
+
+
+def shared_model_paths(models_dir: str, symbol: str, timeframe: str) -> tuple:
+    """(Checkpoint, Scaler) des gemeinsamen Modells – ein Checkpoint, ein Scaler je Markt."""
+    safe_name = f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
+    return (os.path.join(models_dir, f"{SHARED_MODEL_NAME}.pt"),
+            os.path.join(models_dir, f"{SHARED_MODEL_NAME}_{safe_name}_scaler.npz"))
+
+
+def model_fingerprint(model_path: str) -> str:
+    """Kennung einer Modell-Datei (Name, Größe, mtime) – ändert sich bei jedem Retrain."""
+    stat = os.stat(model_path)
+    return f"{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def predictor_options(config: dict) -> dict:
+    """
+    from_files-Optionen aus einer Strategie-Config: Student-Modell, gemeinsames
+    Modell (shared_model), Precision und – bei Multi-Head-Checkpoints – der Kopf für
+    horizon_candles / neutral_zone_pct.
+    """
+    model_cfg = config.get('model', {})
+    market = config.get('market', {})
+    head = None
+    if 'horizon_candles' in model_cfg and 'neutral_zone_pct' in model_cfg:
+        head = (model_cfg['horizon_candles'], model_cfg['neutral_zone_pct'])
+    return {
+        'use_student': model_cfg.get('use_student', False),
+        'head': head,
+        'shared': model_cfg.get('shared_model', False),
+        'market': (market.get('symbol'), market.get('timeframe')),
+        'precision': model_cfg.get('precision'),
+    }
+
 
 class LSTMPredictor:
     """
@@ -21,25 +72,254 @@ class LSTMPredictor:
     Nutzung:
         predictor = LSTMPredictor.from_files(model_path, scaler_path)
         probs = predictor.predict(df_ohlcv)  # [long_prob, neutral_prob, short_prob]
+
+    Die eigentliche Modell-Auswertung läuft über eine Inference-Funktion
+    (batch, seq_len, n_features) float32 → (batch, 3); Standard ist das eager
+    PyTorch-Modell, alternativ TorchScript, ONNX oder int8 (siehe dbot.model.export).
+    Mit backend='numpy' läuft der Forward-Pass torch-frei (dbot.model.numpy_lstm) –
+    torch wird dann gar nicht importiert (Start-Zeit / Speicher der Live-Prozesse).
+
+    Zustandsbehaftete Modelle (Checkpoint-Metadaten 'stateful', siehe
+    train_stateful_model) rechnen einen LSTM-Schritt pro Kerze: predict_batch ist ein
+    einziger sequenzieller Durchlauf, live wird (h, c) neben dem Feature-State
+    gespeichert und pro Zyklus nur um die neuen Kerzen fortgeschrieben. Der gespeicherte
+    Zustand trägt model_id (model_fingerprint der geladenen Datei) und wird nach einem
+    Retrain verworfen.
+
+    precision='bf16' rechnet die eager-Inference unter Autocast (bfloat16-Matmuls,
+    Ausgabe weiterhin float32); bei übergebener infer-Funktion ohne Wirkung.
     """
 
-    def __init__(self, model, scaler, seq_len: int = 60):
+    def __init__(self, model, scaler, seq_len: int = 60, feature_state_path: str = None,
+                 infer=None, backend: str = 'eager', stateful: bool = False, precision: str = 'fp32',
+                 model_id: str = None):
         self.model = model
         self.scaler = scaler
         self.seq_len = seq_len
+        self.feature_state_path = feature_state_path
+        self.backend = backend
+        self.stateful = stateful
+        self.model_id = model_id or ''
+        self._engine = None
+        self._lstm_state = None
         self.model.eval()
+        numpy_model = isinstance(model, NumpyLSTM)
+        if infer is None:
+            if numpy_model:
+                infer = model.predict_proba
+            else:
+                from dbot.model.export import eager_infer
+                infer = eager_infer(model, precision=precision)
+        self._infer = infer
+        self.precision = getattr(infer, 'precision', 'fp32')
+        self._step = None
+        if stateful:
+            if numpy_model:
+                self._step = model.step_proba
+            else:
+                from dbot.model.export import eager_step
+                self._step = eager_step(model, precision=precision)
 
     @classmethod
-    def from_files(cls, model_path: str, scaler_path: str, seq_len: int = 60) -> 'LSTMPredictor':
-        """Lädt Modell und Scaler von Festplatte."""
-        if not os.path.exists(model_path):
+    def from_files(cls, model_path: str, scaler_path: str, seq_len: int = 60,
+                   feature_state_path: str = None, backend: str = None,
+                   use_student: bool = False, head: tuple = None, shared: bool = False,
+                   market: tuple = None, precision: str = None) -> 'LSTMPredictor':
+        """
+        Lädt Modell und Scaler von Festplatte.
+
+        backend: 'eager', 'torchscript', 'onnx', 'int8' oder 'numpy'
+                 (Standard: DBOT_INFERENCE_BACKEND bzw. eager)
+        use_student: destilliertes Student-Modell (student_path) statt des Checkpoints
+                 laden; fehlt es, wird mit Warnung der Checkpoint genutzt. Der Scaler
+                 ist derselbe wie beim Teacher.
+        head: (horizon_candles, neutral_zone_pct) – wählt bei Multi-Head-Modellen
+                 (model_type 'multihead') den Kopf; bei anderen Modellen ignoriert.
+        shared: gemeinsames Modell (shared_model_paths im Verzeichnis von model_path)
+                 statt des Markt-Checkpoints laden; market = (symbol, timeframe) wählt
+                 Embeddings und Scaler.
+        precision: 'fp32' oder 'bf16' für eager (Standard: DBOT_PRECISION bzw. fp32)
+        """
+        backend = backend or INFERENCE_BACKEND
+        precision = precision or PRECISION
+        if shared:
+            if not market or not all(market):
+                raise ValueError("Gemeinsames Modell benötigt market=(symbol, timeframe)")
+            model_path, scaler_path = shared_model_paths(os.path.dirname(model_path), *market)
+            if backend == 'numpy':
+                logger.warning("Gemeinsames Modell: NumPy-Backend nicht unterstützt, nutze eager.")
+                backend = 'eager'
+        if use_student:
+            path = student_path(model_path)
+            if os.path.exists(path) or (backend == 'numpy' and os.path.exists(npz_path(path))):
+                model_path = path
+            else:
+                logger.warning(f"Kein Student-Modell ({path}) – nutze {model_path}.")
+        # Für 'numpy' genügt die exportierte .lstm.npz
+        if not os.path.exists(model_path) and not (backend == 'numpy' and os.path.exists(npz_path(model_path))):
             raise FileNotFoundError(f"Modell nicht gefunden: {model_path}")
-        if not os.path.exists(scaler_path):
+        if not scaler_exists(scaler_path):
             raise FileNotFoundError(f"Scaler nicht gefunden: {scaler_path}")
 
-        model = load_model(model_path)
         scaler = load_scaler(scaler_path)
-        return cls(model, scaler, seq_len)
+        if backend == 'numpy' and not export_is_current(model_path):
+            # NumpyLSTM rechnet nur LSTMModel – andere Architekturen (multihead, tcn, ...) über eager
+            from dbot.model.export import checkpoint_model_type
+            model_type = checkpoint_model_type(model_path)
+            if model_type != 'lstm':
+                logger.warning(f"Modell-Typ {model_type}: Backend numpy nicht unterstützt, nutze eager.")
+                backend = 'eager'
+        if backend == 'numpy':
+            model = NumpyLSTM.from_files(model_path)
+            model_id = model_fingerprint(model_path if os.path.exists(model_path) else npz_path(model_path))
+            return cls(model, scaler, seq_len, feature_state_path=feature_state_path, backend='numpy',
+                       stateful=model.stateful, model_id=model_id)
+
+        # torch erst hier importieren – der numpy-Pfad bleibt torch-frei
+        from dbot.model.trainer import load_model
+        from dbot.model.export import load_inference_fn, checkpoint_metadata
+        model = load_model(model_path)
+        if model.model_type in ('multihead', 'shared'):
+            if model.model_type == 'shared':
+                model = model.bind(*market)
+            elif head is not None:
+                model.select_head(*head)
+                logger.info(f"Multi-Head-Modell: Kopf {model.head_keys[model.active_head]} aktiv.")
+            if backend != 'eager':
+                logger.warning(f"Modell-Typ {model.model_type}: Backend {backend} nicht unterstützt, nutze eager.")
+            return cls(model, scaler, seq_len, feature_state_path=feature_state_path, precision=precision)
+        if checkpoint_metadata(model_path).get('stateful'):
+            if backend != 'eager':
+                logger.warning(f"Zustandsbehaftetes Modell: Backend {backend} nicht unterstützt, nutze eager.")
+            return cls(model, scaler, seq_len, feature_state_path=feature_state_path, stateful=True,
+                       precision=precision, model_id=model_fingerprint(model_path))
+        infer = load_inference_fn(model_path, backend, model=model, precision=precision)
+        return cls(model, scaler, seq_len, feature_state_path=feature_state_path,
+                   infer=infer, backend=infer.backend)
+
+    @property
+    def lstm_state_path(self) -> str:
+        """LSTM-Zustand (h, c) neben dem Feature-State, z.B. ..._features_lstm.npz."""
+        if not self.feature_state_path:
+            return None
+        return os.path.splitext(self.feature_state_path)[0] + '_lstm.npz'
+
+    def _load_engine(self):
+        """Engine aus dem Speicher oder (falls konfiguriert) aus der State-Datei."""
+        if self._engine is None and self.feature_state_path and os.path.exists(self.feature_state_path):
+            try:
+                self._engine = IncrementalFeatureEngine.load(self.feature_state_path)
+            except Exception as e:
+                logger.warning(f"Feature-State nicht lesbar ({e}), berechne neu.")
+        return self._engine
+
+    def _advance_engine(self, df_ohlcv: pd.DataFrame) -> tuple:
+        """
+        Schreibt die inkrementelle Engine um alle abgeschlossenen Kerzen fort.
+
+        Die letzte (evtl. noch offene) Kerze wird nur berechnet, ohne den Zustand zu
+        verändern. Passt der gespeicherte Zustand nicht zum DataFrame, wird die Engine
+        neu aufgebaut.
+
+        Returns:
+            (engine, closed (DataFrame ohne letzte Kerze), last_row (Features der letzten Kerze))
+        """
+        closed = df_ohlcv.iloc[:-1]
+        engine = self._load_engine()
+
+        start = None
+        if engine is not None and engine.history.maxlen >= self.seq_len and engine.last_timestamp is not None:
+            matches = np.flatnonzero(closed.index.astype(str) == str(engine.last_timestamp))
+            if len(matches):
+                start = matches[-1] + 1
+
+        if start is None:
+            engine = IncrementalFeatureEngine.from_dataframe(closed, history=self.seq_len)
+        elif start < len(closed):
+            engine.extend(closed.iloc[start:])
+        self._engine = engine
+
+        if self.feature_state_path:
+            try:
+                engine.save(self.feature_state_path)
+            except OSError as e:
+                logger.warning(f"Feature-State konnte nicht gespeichert werden: {e}")
+
+        last = df_ohlcv.iloc[-1]
+        last_row = engine.peek(last['high'], last['low'], last['close'], last['volume'])
+        return engine, closed, last_row
+
+    def _latest_features(self, df_ohlcv: pd.DataFrame) -> np.ndarray:
+        """Liefert die letzten seq_len Feature-Zeilen (unskaliert) über die inkrementelle Engine."""
+        engine, _, last_row = self._advance_engine(df_ohlcv)
+        window = engine.window(self.seq_len)
+        if not np.isnan(last_row).any():
+            window = np.vstack([window, last_row])[-self.seq_len:]
+        return window
+
+    def _load_lstm_state(self) -> dict:
+        """LSTM-Zustand aus dem Speicher oder (falls konfiguriert) aus der State-Datei."""
+        path = self.lstm_state_path
+        if self._lstm_state is None and path and os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    model_id = str(data['model_id']) if 'model_id' in data.files else None
+                    if model_id != self.model_id:
+                        # (h, c) stammt von anderen Gewichten (Retrain) → neu aufwärmen
+                        logger.info(f"LSTM-State gehört zu {model_id or 'unbekanntem Modell'}, wärme neu auf.")
+                    else:
+                        self._lstm_state = {k: data[k] for k in ('h', 'c', 'probs')}
+                        self._lstm_state['timestamp'] = str(data['timestamp'])
+            except Exception as e:
+                logger.warning(f"LSTM-State nicht lesbar ({e}), wärme neu auf.")
+        return self._lstm_state
+
+    def _save_lstm_state(self, state: dict):
+        self._lstm_state = state
+        path = self.lstm_state_path
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp.npz"
+            np.savez(tmp, h=state['h'], c=state['c'], probs=state['probs'], timestamp=np.array(state['timestamp']),
+                     model_id=np.array(self.model_id))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"LSTM-State konnte nicht gespeichert werden: {e}")
+
+    def _predict_stateful(self, df_ohlcv: pd.DataFrame) -> np.ndarray:
+        """
+        Ein LSTM-Schritt pro neuer abgeschlossener Kerze ab dem gespeicherten (h, c);
+        die offene Kerze wird nur auf einer Kopie des Zustands ausgewertet.
+        Ohne passenden Zustand wird über die letzten seq_len Feature-Zeilen aufgewärmt.
+        """
+        engine, closed, last_row = self._advance_engine(df_ohlcv)
+        history = engine.window(self.seq_len)
+        state = self._load_lstm_state()
+
+        new_rows = None
+        if state is not None and len(closed):
+            matches = np.flatnonzero(closed.index.astype(str) == state['timestamp'])
+            if len(matches) and len(closed) - matches[-1] - 1 <= len(history):
+                new_rows = history[len(history) - (len(closed) - matches[-1] - 1):]
+        if new_rows is None:
+            state, new_rows = None, history
+
+        hc = None if state is None else (state['h'], state['c'])
+        probs = None if state is None else state['probs']
+        if len(new_rows):
+            step_probs, hc = self._step(self.scaler.transform(new_rows)[np.newaxis].astype(np.float32, copy=False), hc)
+            probs = step_probs[0, -1]
+        if hc is None:
+            return np.array([1/3, 1/3, 1/3])
+        self._save_lstm_state({'h': hc[0], 'c': hc[1], 'probs': probs, 'timestamp': str(closed.index[-1])})
+
+        if not np.isnan(last_row).any():
+            x = self.scaler.transform(last_row[np.newaxis])[np.newaxis].astype(np.float32, copy=False)
+            step_probs, _ = self._step(x, hc)
+            probs = step_probs[0, -1]
+        return probs
 
     def predict(self, df_ohlcv: pd.DataFrame) -> np.ndarray:
         """
@@ -56,22 +336,21 @@ class LSTMPredictor:
             logger.warning(f"Zu wenig Daten für Prediction: {len(df_ohlcv)} < {min_rows}")
             return np.array([1/3, 1/3, 1/3])  # Uninformative Prediction
 
-        # Features berechnen
-        feature_df = compute_features(df_ohlcv)
-        if len(feature_df) < self.seq_len:
-            logger.warning(f"Zu wenig Feature-Zeilen nach Dropna: {len(feature_df)}")
-            return np.array([1/3, 1/3, 1/3])
+        if self.stateful:
+            return self._predict_stateful(df_ohlcv)
 
-        # Scaler anwenden
-        scaled_df = apply_scaler(feature_df, self.scaler)
+        # Features inkrementell fortschreiben (nur neue Kerzen werden berechnet)
+        features = self._latest_features(df_ohlcv)
+        if len(features) < self.seq_len:
+            logger.warning(f"Zu wenig Feature-Zeilen nach Dropna: {len(features)}")
+            return np.array([1/3, 1/3, 1/3])
 
-        # Letztes Fenster extrahieren
-        window = scaled_df.iloc[-self.seq_len:][FEATURE_NAMES].values  # (seq_len, n_features)
-        X = torch.tensor(window[np.newaxis, :, :], dtype=torch.float32).to(DEVICE)  # (1, seq_len, features)
+        # Scaler anwenden (eine Kopie im Policy-Dtype)
+        window = self.scaler.transform(features)  # (seq_len, n_features)
+        X = window[np.newaxis].astype(np.float32, copy=False)  # (1, seq_len, features)
 
         # Prediction
-        with torch.no_grad():
-            probs = self.model.predict_proba(X).cpu().numpy()[0]  # (3,)
+        probs = self._infer(X)[0]  # (3,)
 
         logger.debug(f"LSTM Prediction: long={probs[0]:.3f}, neutral={probs[1]:.3f}, short={probs[2]:.3f}")
         return probs  # [long_prob, neutral_prob, short_prob]
@@ -84,24 +363,25 @@ class LSTMPredictor:
         Returns:
             numpy array (n_samples, 3)
         """
-        feat_arr = feature_df_scaled[FEATURE_NAMES].values
+        # Modell rechnet in float32; bei float32-Policy entsteht hier keine Umwandlung
+        feat_arr = np.ascontiguousarray(feature_df_scaled[FEATURE_NAMES].to_numpy(dtype=np.float32))
         n = len(feat_arr)
-        all_probs = []
-
-        batch_size = 512
-        X_all = []
-        for i in range(self.seq_len, n):
-            X_all.append(feat_arr[i - self.seq_len:i])
-
-        if not X_all:
+        if n <= self.seq_len:
             return np.empty((0, 3))
 
-        X_tensor = torch.tensor(np.array(X_all, dtype=np.float32), dtype=torch.float32)
+        if self.stateful:
+            # Ein sequenzieller Durchlauf: probs[t] ist die Vorhersage nach Kerze t,
+            # das Fenster-Äquivalent zu feat_arr[i - seq_len:i] ist also probs[i - 1]
+            probs, _ = self._step(feat_arr[np.newaxis], None)
+            return probs[0, self.seq_len - 1:n - 1]
 
-        with torch.no_grad():
-            for start in range(0, len(X_tensor), batch_size):
-                batch = X_tensor[start:start + batch_size].to(DEVICE)
-                probs = self.model.predict_proba(batch).cpu().numpy()
-                all_probs.append(probs)
+        # Strided-View statt Python-Schleife: Fenster i = feat_arr[i - seq_len:i]
+        windows = sliding_window_view(feat_arr, self.seq_len, axis=0)[:-1].transpose(0, 2, 1)
+
+        batch_size = 512
+        all_probs = []
+        for start in range(0, len(windows), batch_size):
+            # Kopie erst beim Übergang an das Backend – nur für den aktuellen Batch
+            all_probs.append(self._infer(np.ascontiguousarray(windows[start:start + batch_size])))
 
         return np.vstack(all_probs)  # (n - seq_len, 3)
@@ -0,0 +1,185 @@
+# src/dbot/model/quantile_sketch.py
+# Streaming-Fit des Robust-Scalers über mergebare Quantil-Sketches (Merging-Digest)
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+from dbot.model.feature_engineering import FeatureScaler, FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPRESSION = 2000
+DEFAULT_CHUNK_ROWS = 1 << 16
+
+
+class QuantileSketch:
+    """
+    Mergebarer Quantil-Sketch je Feature (Merging-Digest nach Art des t-Digest).
+
+    Jedes Feature wird durch sortierte Zentroide (Mittelwert, Gewicht) beschrieben.
+    Beim Komprimieren werden benachbarte Werte zusammengefasst, deren Rang-Position
+    in dasselbe Intervall der Breite 1/compression fällt. Es wird eine lineare
+    Skala verwendet (statt der asin-Skala des t-Digest), da für Median und IQR die
+    mittleren Quantile genau sein müssen, nicht die Ränder. Der Rang-Fehler ist
+    damit durch ~1/compression beschränkt; der Speicher pro Feature durch
+    ~compression Zentroide – unabhängig von der Anzahl Zeilen.
+
+    Nutzung:
+        sketch = QuantileSketch(n_features)
+        for chunk in chunks:                   # (n, n_features), NaN wird ignoriert
+            sketch.update(chunk)
+        sketch.merge(other_sketch)             # z.B. pro Symbol / Shard
+        scaler = sketch.to_scaler()            # FeatureScaler (Median / IQR)
+    """
+
+    def __init__(self, n_features: int, compression: int = DEFAULT_COMPRESSION,
+                 feature_names=None):
+        self.n_features = n_features
+        self.compression = compression
+        self.feature_names = list(feature_names) if feature_names is not None else FEATURE_NAMES[:n_features]
+        self.means = [np.empty(0) for _ in range(n_features)]
+        self.weights = [np.empty(0) for _ in range(n_features)]
+        self.mins = np.full(n_features, np.inf)
+        self.maxs = np.full(n_features, -np.inf)
+
+    @property
+    def count(self) -> np.ndarray:
+        """Anzahl (nicht-NaN) Werte je Feature."""
+        return np.array([w.sum() for w in self.weights])
+
+    def _compress(self, i: int, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if len(means) > self.compression and total > 1:
+            # Mittlere Rang-Position je Zentroid → Intervall der Breite 1/compression
+            pos = (np.cumsum(weights) - weights / 2 - 0.5) / (total - 1)
+            bucket = np.floor(pos * self.compression).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            merged_w = np.add.reduceat(weights, starts)
+            means = np.add.reduceat(means * weights, starts) / merged_w
+            weights = merged_w
+        self.means[i], self.weights[i] = means, weights
+
+    def update(self, values) -> 'QuantileSketch':
+        """Nimmt einen Chunk (n, n_features) auf; NaN-Werte werden übersprungen."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != self.n_features:
+            raise ValueError(f"Erwarte (n, {self.n_features}), erhalten {values.shape}")
+        for i in range(self.n_features):
+            col = values[:, i]
+            col = col[~np.isnan(col)]
+            if not len(col):
+                continue
+            self.mins[i] = min(self.mins[i], col.min())
+            self.maxs[i] = max(self.maxs[i], col.max())
+            self._compress(i, np.concatenate([self.means[i], col]),
+                           np.concatenate([self.weights[i], np.ones(len(col))]))
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Führt einen anderen Sketch (gleiche Features) in diesen zusammen."""
+        if other.n_features != self.n_features:
+            raise ValueError("Sketches mit unterschiedlicher Feature-Anzahl")
+        for i in range(self.n_features):
+            self._compress(i, np.concatenate([self.means[i], other.means[i]]),
+                           np.concatenate([self.weights[i], other.weights[i]]))
+        self.mins = np.minimum(self.mins, other.mins)
+        self.maxs = np.maximum(self.maxs, other.maxs)
+        return self
+
+    def quantiles(self, qs) -> np.ndarray:
+        """
+        Quantile (Anteile 0-1) je Feature → (len(qs), n_features).
+        Interpolation wie np.percentile(method='linear'); exakt, solange nicht komprimiert wurde.
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        out = np.full((len(qs), self.n_features), np.nan)
+        for i in range(self.n_features):
+            means, weights = self.means[i], self.weights[i]
+            total = weights.sum()
+            if total == 0:
+                continue
+            if total == 1:
+                out[:, i] = means[0]
+                continue
+            pos = (np.cumsum(weights) - weights / 2 - 0.5) / (total - 1)
+            out[:, i] = np.interp(qs, np.r_[0.0, pos, 1.0], np.r_[self.mins[i], means, self.maxs[i]])
+        return out
+
+    def to_scaler(self, feature_names=None, dtype=None) -> FeatureScaler:
+        """FeatureScaler mit Median / IQR (25-75%) wie FeatureScaler.fit; IQR 0 → 1."""
+        q25, center, q75 = self.quantiles([0.25, 0.5, 0.75])
+        scale = q75 - q25
+        scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+        return FeatureScaler(center, scale, feature_names or self.feature_names, dtype=dtype)
+
+    def save(self, path: str):
+        """Speichert den Sketch als .npz (atomar), z.B. pro Symbol zum späteren Mergen."""
+        sizes = np.array([len(m) for m in self.means], dtype=np.int64)
+        tmp = f"{path}.tmp.npz"
+        np.savez(
+            tmp,
+            means=np.concatenate(self.means), weights=np.concatenate(self.weights), sizes=sizes,
+            mins=self.mins, maxs=self.maxs, compression=np.int64(self.compression),
+            feature_names=np.array(self.feature_names, dtype=str),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'QuantileSketch':
+        with np.load(path, allow_pickle=False) as data:
+            names = data['feature_names'].tolist()
+            sketch = cls(len(names), int(data['compression']), names)
+            splits = np.cumsum(data['sizes'])[:-1]
+            sketch.means = np.split(data['means'], splits)
+            sketch.weights = np.split(data['weights'], splits)
+            sketch.mins, sketch.maxs = data['mins'], data['maxs']
+        return sketch
+
+
+def _iter_chunks(source, chunk_rows: int):
+    """Zeilen-Chunks aus DataFrame, ndarray oder np.memmap (ohne alles zu laden)."""
+    if isinstance(source, pd.DataFrame):
+        source = source.to_numpy()
+    for start in range(0, len(source), chunk_rows):
+        yield source[start:start + chunk_rows]
+
+
+def sketch_features(sources, compression: int = DEFAULT_COMPRESSION,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS, feature_names=None) -> QuantileSketch:
+    """
+    Baut einen Sketch über eine oder mehrere Feature-Matrizen.
+
+    Args:
+        sources: DataFrame / ndarray / np.memmap oder Liste davon (z.B. mehrere Symbole,
+                 FeatureStore.load_matrix); NaN-Warmup-Zeilen werden ignoriert
+        compression: Zentroide je Feature (Genauigkeit vs. Speicher)
+        chunk_rows: Zeilen pro Chunk (beschränkt den Speicherbedarf)
+    """
+    if isinstance(sources, (pd.DataFrame, np.ndarray)):
+        sources = [sources]
+    sketch = None
+    for source in sources:
+        if sketch is None:
+            names = feature_names or (list(source.columns) if isinstance(source, pd.DataFrame) else None)
+            sketch = QuantileSketch(source.shape[1], compression, names)
+        for chunk in _iter_chunks(source, chunk_rows):
+            sketch.update(chunk)
+    if sketch is None:
+        raise ValueError("Keine Feature-Daten für den Sketch")
+    return sketch
+
+
+def fit_scaler_streaming(sources, compression: int = DEFAULT_COMPRESSION,
+                         chunk_rows: int = DEFAULT_CHUNK_ROWS, feature_names=None,
+                         dtype=None) -> FeatureScaler:
+    """
+    Streaming-Gegenstück zu fit_scaler: Median / IQR aus einem Quantil-Sketch,
+    mit beschränktem Speicher auch für out-of-core Matrizen.
+    """
+    sketch = sketch_features(sources, compression, chunk_rows, feature_names)
+    logger.info(f"Scaler per Sketch gefittet: {int(sketch.count.max())} Zeilen, "
+                f"{max(len(m) for m in sketch.means)} Zentroide je Feature")
+    return sketch.to_scaler(dtype=dtype)
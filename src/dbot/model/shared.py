@@ -0,0 +1,197 @@
+# src/dbot/model/shared.py
+# Gemeinsames Modell über mehrere Märkte: gepooltes Training mit Symbol-/Timeframe-Embeddings
+# Ausführung: python -m dbot.model.shared --symbols BTC/USDT:USDT ETH/USDT:USDT --timeframes 1h 4h
+import os
+import sys
+import json
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+
+from dbot.model.feature_engineering import (
+    compute_features, create_labels, fit_scaler, apply_scaler, save_scaler, FEATURE_NAMES
+)
+from dbot.model.dataset import WindowDataset
+from dbot.model.lstm_model import MARKET_COLUMNS, SharedLSTMModel
+from dbot.model.trainer import train_model, save_model, predict_windows, DEVICE
+from dbot.model.predictor import shared_model_paths
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+
+def _safe_name(symbol: str, timeframe: str) -> str:
+    return f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
+
+
+def load_market(symbol: str, timeframe: str, data_dir: str = None, limit: int = 3000) -> pd.DataFrame:
+    """OHLCV eines Marktes: data/<safe_name>.csv (wie train_model.py) oder direkt von der Exchange."""
+    data_dir = data_dir or os.path.join(PROJECT_ROOT, 'data')
+    path = os.path.join(data_dir, f"{_safe_name(symbol, timeframe)}.csv")
+    if os.path.exists(path):
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+    logger.info(f"Keine CSV für {symbol} ({timeframe}) in {data_dir}, lade {limit} Kerzen von der Exchange...")
+    with open(os.path.join(PROJECT_ROOT, 'secret.json')) as f:
+        account = json.load(f).get('dbot', [{}])[0]
+    from dbot.utils.exchange import Exchange
+    return Exchange(account).fetch_recent_ohlcv(symbol, timeframe, limit=limit)
+
+
+def _with_market_columns(scaled_df: pd.DataFrame, symbol_id: int, timeframe_id: int) -> pd.DataFrame:
+    """Hängt die (unskalierten) Markt-Indizes als letzte Spalten an (siehe SharedLSTMModel)."""
+    ids = pd.DataFrame({MARKET_COLUMNS[0]: float(symbol_id), MARKET_COLUMNS[1]: float(timeframe_id)},
+                       index=scaled_df.index)
+    return pd.concat([scaled_df, ids], axis=1)
+
+
+def build_market_datasets(frames: dict, seq_len: int = 60, horizon_candles: int = 5,
+                          neutral_zone_pct: float = 0.3, val_split: float = 0.15) -> tuple:
+    """
+    Gepoolte Trainings-/Validierungs-Fenster über mehrere Märkte.
+
+    Je Markt: Features, Labels, chronologischer Split und eigener Scaler (nur auf dem
+    Train-Teil gefittet – Preisniveaus und Volatilität unterscheiden sich je Symbol).
+    Fenster bleiben innerhalb ihres Marktes (WindowDataset.concat).
+
+    Args:
+        frames: (symbol, timeframe) -> OHLCV-DataFrame
+
+    Returns:
+        (train_ds, val_ds, scalers, val_sets, symbols, timeframes) – scalers und
+        val_sets (Validierungs-Fenster je Markt) mit (symbol, timeframe) als Schlüssel
+    """
+    symbols = sorted({s for s, _ in frames})
+    timeframes = sorted({t for _, t in frames})
+    train_parts, val_parts, scalers, val_sets = [], [], {}, {}
+    for (symbol, timeframe), df in frames.items():
+        feature_df = compute_features(df)
+        labels = create_labels(df, horizon_candles, neutral_zone_pct).reindex(feature_df.index)
+        split = int(len(feature_df) * (1 - val_split))
+        scaler, scaled_train = fit_scaler(feature_df.iloc[:split])
+        scaled_val = apply_scaler(feature_df.iloc[split:], scaler)
+        ids = (symbols.index(symbol), timeframes.index(timeframe))
+        train_parts.append(WindowDataset.from_frames(_with_market_columns(scaled_train, *ids),
+                                                     labels.iloc[:split], seq_len=seq_len))
+        val_ds = WindowDataset.from_frames(_with_market_columns(scaled_val, *ids), labels.iloc[split:],
+                                           seq_len=seq_len)
+        val_parts.append(val_ds)
+        scalers[(symbol, timeframe)] = scaler
+        val_sets[(symbol, timeframe)] = val_ds
+        logger.info(f"  {symbol} ({timeframe}): Train={len(train_parts[-1])} | Val={len(val_ds)} Fenster")
+    return (WindowDataset.concat(train_parts), WindowDataset.concat(val_parts), scalers, val_sets,
+            symbols, timeframes)
+
+
+def train_shared_model(frames: dict, models_dir: str, seq_len: int = 60, horizon_candles: int = 5,
+                       neutral_zone_pct: float = 0.3, model_config: dict = None, epochs: int = 50,
+                       batch_size: int = 64, lr: float = 1e-3, patience: int = 15) -> tuple:
+    """
+    Trainiert ein SharedLSTMModel auf allen Märkten und speichert shared.pt sowie je
+    Markt einen Scaler (Pfade: predictor.shared_model_paths).
+
+    Returns:
+        (model, history, per_market) – per_market: (symbol, timeframe) -> Val Accuracy
+    """
+    train_ds, val_ds, scalers, val_sets, symbols, timeframes = build_market_datasets(
+        frames, seq_len, horizon_candles, neutral_zone_pct)
+    config = {'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64, **(model_config or {}),
+              'model_type': 'shared', 'symbols': symbols, 'timeframes': timeframes}
+    logger.info(f"Gemeinsames Training: {len(frames)} Märkte | Train={len(train_ds)} | Val={len(val_ds)} Fenster")
+    model, history = train_model(train_ds, None, val_ds, None, model_config=config, epochs=epochs,
+                                 batch_size=batch_size, lr=lr, patience=patience)
+
+    per_market = {}
+    for market, ds in val_sets.items():
+        per_market[market] = float((predict_windows(model, ds).argmax(axis=1) == ds.targets).mean()) \
+            if len(ds) else float('nan')
+        logger.info(f"  Val Accuracy {market[0]} ({market[1]}): {per_market[market]:.4f}")
+
+    model_path = None
+    for (symbol, timeframe), scaler in scalers.items():
+        model_path, scaler_path = shared_model_paths(models_dir, symbol, timeframe)
+        save_scaler(scaler, scaler_path)
+    save_model(model, model_path, metadata={
+        'markets': [list(m) for m in frames],
+        'seq_len': seq_len,
+        'horizon_candles': horizon_candles,
+        'neutral_zone_pct': neutral_zone_pct,
+        'n_features': len(FEATURE_NAMES),
+        'feature_names': FEATURE_NAMES,
+        'train_size': len(train_ds),
+        'val_size': len(val_ds),
+        'best_val_acc': max(history['val_acc']),
+        'val_acc_markets': {f"{s}|{t}": acc for (s, t), acc in per_market.items()},
+    })
+    return model, history, per_market
+
+
+def predict_markets(model: SharedLSTMModel, windows: dict) -> dict:
+    """
+    Wahrscheinlichkeiten für mehrere Märkte in einem Forward-Aufruf.
+
+    Args:
+        windows: (symbol, timeframe) -> skaliertes Fenster (seq_len, n_features)
+                 (Scaler des jeweiligen Marktes angewendet)
+
+    Returns:
+        (symbol, timeframe) -> np.ndarray [long_prob, neutral_prob, short_prob]
+    """
+    if not windows:
+        return {}
+    markets = list(windows)
+    X = np.stack([np.asarray(windows[m], dtype=np.float32) for m in markets])
+    ids = np.array([model.market_index(*m) for m in markets], dtype=np.float32)
+    X = np.concatenate([X, np.broadcast_to(ids[:, None, :], (len(markets), X.shape[1], len(MARKET_COLUMNS)))],
+                       axis=-1)
+    model.eval()
+    with torch.no_grad():
+        probs = model.predict_proba(torch.from_numpy(X).to(DEVICE)).cpu().numpy()
+    return dict(zip(markets, probs))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="dbot gemeinsames Modell über mehrere Märkte")
+    parser.add_argument('--symbols', nargs='+', required=True, help="z.B. BTC/USDT:USDT ETH/USDT:USDT")
+    parser.add_argument('--timeframes', nargs='+', required=True, help="z.B. 1h 4h")
+    parser.add_argument('--seq-len', type=int, default=60, help="LSTM Eingabe-Fenster (Kerzen)")
+    parser.add_argument('--horizon', type=int, default=5, help="Vorhersage-Horizont (Kerzen)")
+    parser.add_argument('--neutral-zone', type=float, default=0.3, help="Neutrale Zone in %")
+    parser.add_argument('--epochs', type=int, default=50, help="Training-Epochen")
+    parser.add_argument('--batch-size', type=int, default=64, help="Batch-Größe")
+    parser.add_argument('--embed-dim', type=int, default=8, help="Größe der Symbol-/Timeframe-Embeddings")
+    parser.add_argument('--limit', type=int, default=3000, help="Anzahl Kerzen von der Exchange (ohne CSV)")
+    parser.add_argument('--data-dir', type=str, default=None, help="Verzeichnis der OHLCV-CSVs (Standard: data/)")
+    args = parser.parse_args()
+
+    frames = {}
+    for symbol in args.symbols:
+        for timeframe in args.timeframes:
+            df = load_market(symbol, timeframe, args.data_dir, args.limit)
+            if df is None or len(df) < 300:
+                logger.warning(f"Zu wenig Daten für {symbol} ({timeframe}) – übersprungen.")
+                continue
+            frames[(symbol, timeframe)] = df
+    if not frames:
+        logger.error("Keine Märkte mit ausreichend Daten.")
+        sys.exit(1)
+
+    models_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'models')
+    _, history, per_market = train_shared_model(
+        frames, models_dir, seq_len=args.seq_len, horizon_candles=args.horizon,
+        neutral_zone_pct=args.neutral_zone, model_config={'embed_dim': args.embed_dim},
+        epochs=args.epochs, batch_size=args.batch_size,
+    )
+    print(f"\n{'='*60}")
+    print(f"  Gemeinsames Modell: {len(per_market)} Märkte | Beste Val Accuracy: {max(history['val_acc']):.4f}")
+    for (symbol, timeframe), acc in per_market.items():
+        print(f"    {symbol:<20} {timeframe:<5} {acc:.4f}")
+    print(f"  Aktivieren je Strategie: \"model\": {{\"shared_model\": true}}")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# src/dbot/model/stacked.py
+# Gestapelte Inference: K Checkpoints gleicher Architektur in einem vektorisierten Aufruf
+import os
+import copy
+import logging
+import numpy as np
+import torch
+import torch.nn as nn
+from numpy.lib.stride_tricks import sliding_window_view
+
+from dbot.model.feature_engineering import FEATURE_NAMES
+from dbot.model.trainer import autocast, DEVICE
+
+logger = logging.getLogger(__name__)
+
+# 'auto' = nur auf GPU (dort spart das Stapeln Kernel-Starts; auf CPU sind K einzelne
+# aten::lstm-Aufrufe meist schneller), '1' / '0' erzwingt bzw. deaktiviert das Stapeln
+STACKED_INFERENCE = os.environ.get('DBOT_STACKED_INFERENCE', 'auto')
+
+# fp32-Backends: Stapeln nutzt immer das eager Modell (gleiche Rechnung)
+_STACKABLE_BACKENDS = ('eager', 'torchscript', 'onnx')
+
+
+def stacking_enabled() -> bool:
+    if STACKED_INFERENCE == 'auto':
+        return DEVICE.type == 'cuda'
+    return STACKED_INFERENCE not in ('0', 'false', 'no')
+
+
+def stack_key(predictor) -> tuple:
+    """Gruppierungs-Schlüssel (Architektur, Eingabe-Form, Precision) – None, wenn nicht stapelbar."""
+    model = predictor.model
+    if (predictor.stateful or predictor.backend not in _STACKABLE_BACKENDS or not isinstance(model, nn.Module)
+            or getattr(model, 'model_type', None) not in ('lstm', 'tcn')):
+        return None
+    return (model.model_type, tuple(sorted(model.hparams.items())), model.n_features, predictor.seq_len,
+            predictor.precision)
+
+
+class _StackedLSTM(nn.Module):
+    """
+    K LSTMModel-Gewichtssätze als gestapelte Tensoren; jeder Zeitschritt ist ein
+    baddbmm über alle Modelle (torch.func.vmap hat keine Batching-Regel für aten::lstm).
+    """
+
+    def __init__(self, models: list):
+        super().__init__()
+        self.hidden_size = models[0].hidden_size
+        self.num_layers = models[0].num_layers
+
+        def stack(get):
+            return nn.Parameter(torch.stack([get(m).detach() for m in models]), requires_grad=False)
+
+        for k in range(self.num_layers):
+            setattr(self, f'w_ih_{k}', stack(lambda m: getattr(m.lstm, f'weight_ih_l{k}').T))
+            setattr(self, f'w_hh_{k}', stack(lambda m: getattr(m.lstm, f'weight_hh_l{k}').T))
+            setattr(self, f'b_{k}', stack(lambda m: getattr(m.lstm, f'bias_ih_l{k}')
+                                          + getattr(m.lstm, f'bias_hh_l{k}')))
+        self.fc1_w = stack(lambda m: m.fc1.weight.T)
+        self.fc1_b = stack(lambda m: m.fc1.bias)
+        self.fc2_w = stack(lambda m: m.fc2.weight.T)
+        self.fc2_b = stack(lambda m: m.fc2.bias)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """x: (K, batch, seq_len, n_features) → Logits (K, batch, 3)"""
+        K, batch, seq_len, _ = x.shape
+        H = self.hidden_size
+        seq = x
+        for k in range(self.num_layers):
+            w_ih, w_hh, b = getattr(self, f'w_ih_{k}'), getattr(self, f'w_hh_{k}'), getattr(self, f'b_{k}')
+            # Eingangs-Projektion aller Zeitschritte in einem Aufruf, nur die Rekurrenz als Schleife
+            proj = torch.baddbmm(b[:, None], seq.reshape(K, batch * seq_len, -1), w_ih)
+            proj = proj.view(K, batch, seq_len, 4 * H)
+            h = x.new_zeros(K, batch, H)
+            c = x.new_zeros(K, batch, H)
+            outputs = []
+            for t in range(seq_len):
+                i, f, g, o = torch.baddbmm(proj[:, :, t], h, w_hh).chunk(4, dim=-1)
+                c = torch.sigmoid(f) * c + torch.sigmoid(i) * torch.tanh(g)
+                h = torch.sigmoid(o) * torch.tanh(c)
+                outputs.append(h)
+            seq = torch.stack(outputs, dim=2) if k < self.num_layers - 1 else None
+        hidden = torch.relu(torch.baddbmm(self.fc1_b[:, None], h, self.fc1_w))
+        return torch.baddbmm(self.fc2_b[:, None], hidden, self.fc2_w)
+
+
+class _VmappedModel(nn.Module):
+    """K Modelle über torch.func.stack_module_state + vmap (Architekturen mit Batching-Regeln, z.B. TCN)."""
+
+    def __init__(self, models: list):
+        super().__init__()
+        from torch.func import stack_module_state
+        self.params, self.buffers = stack_module_state(models)
+        self.base = copy.deepcopy(models[0]).to('meta')
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        from torch.func import functional_call, vmap
+
+        def call(params, buffers, xk):
+            return functional_call(self.base, (params, buffers), (xk,))
+        return vmap(call)(self.params, self.buffers, x)
+
+
+class StackedPredictor:
+    """
+    Wertet K Predictors gleicher Architektur (siehe stack_key) in einem Aufruf aus.
+
+    Nutzung:
+        stacked = StackedPredictor([p1, p2, p3])
+        probs = stacked.predict_latest([scaled_df1, scaled_df2, scaled_df3])   # (K, 3)
+        per_model = stacked.predict_batch([scaled_df1, scaled_df2, scaled_df3])  # Liste (n_k - seq_len, 3)
+    """
+
+    def __init__(self, predictors: list):
+        keys = {stack_key(p) for p in predictors}
+        if None in keys or len(keys) != 1:
+            raise ValueError("StackedPredictor benötigt Fenster-Modelle (lstm/tcn) mit identischer "
+                             "Architektur, seq_len und Precision")
+        self.predictors = list(predictors)
+        self.seq_len = predictors[0].seq_len
+        self.precision = predictors[0].precision
+        models = [p.model for p in predictors]
+        # Gestapelte Gewichte liegen auf dem Device der Modelle (load_model: DEVICE)
+        self._stacked = (_StackedLSTM(models) if models[0].model_type == 'lstm' else _VmappedModel(models)).eval()
+
+    def __len__(self) -> int:
+        return len(self.predictors)
+
+    def predict_windows(self, X: np.ndarray) -> np.ndarray:
+        """X: (K, batch, seq_len, n_features) float32 → Wahrscheinlichkeiten (K, batch, 3)."""
+        with torch.no_grad(), autocast(self.precision):
+            logits = self._stacked(torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32)).to(DEVICE))
+            return torch.softmax(logits.float(), dim=-1).cpu().numpy()
+
+    def predict_latest(self, feature_dfs_scaled: list) -> np.ndarray:
+        """Vorhersage für das jeweils letzte Fenster je Modell (Live-Zyklus) → (K, 3)."""
+        X = np.stack([df[FEATURE_NAMES].to_numpy(dtype=np.float32)[-self.seq_len:] for df in feature_dfs_scaled])
+        return self.predict_windows(X[:, None])[:, 0]
+
+    def predict_batch(self, feature_dfs_scaled: list, batch_size: int = 512) -> list:
+        """
+        Wie LSTMPredictor.predict_batch für jedes Modell auf seinem DataFrame. Reihen
+        unterschiedlicher Länge werden je Batch mit Nullen aufgefüllt und danach gekürzt.
+        """
+        arrays = [np.ascontiguousarray(df[FEATURE_NAMES].to_numpy(dtype=np.float32)) for df in feature_dfs_scaled]
+        windows = [sliding_window_view(a, self.seq_len, axis=0)[:-1].transpose(0, 2, 1)
+                   if len(a) > self.seq_len else np.empty((0, self.seq_len, a.shape[1]), dtype=np.float32)
+                   for a in arrays]
+        n_windows = [len(w) for w in windows]
+        out = [np.empty((n, 3), dtype=np.float32) for n in n_windows]
+        for start in range(0, max(n_windows, default=0), batch_size):
+            stop = min(start + batch_size, max(n_windows))
+            X = np.zeros((len(windows), stop - start, self.seq_len, arrays[0].shape[1]), dtype=np.float32)
+            for k, w in enumerate(windows):
+                X[k, :max(0, min(stop, len(w)) - start)] = w[start:stop]
+            probs = self.predict_windows(X)
+            for k, n in enumerate(n_windows):
+                if start < n:
+                    out[k][start:min(stop, n)] = probs[k, :min(stop, n) - start]
+        return out
+
+
+def predict_batch_many(predictors: list, feature_dfs_scaled: list, enabled: bool = None) -> list:
+    """
+    predict_batch für viele Predictors: Gruppen gleicher Architektur laufen gestapelt
+    (StackedPredictor), alle übrigen einzeln. enabled: Standard DBOT_STACKED_INFERENCE.
+
+    Returns:
+        Liste (n_k - seq_len, 3) in der Reihenfolge der Predictors
+    """
+    enabled = stacking_enabled() if enabled is None else enabled
+    results = [None] * len(predictors)
+    groups = {}
+    for i, predictor in enumerate(predictors):
+        key = stack_key(predictor) if enabled else None
+        if key is None:
+            results[i] = predictor.predict_batch(feature_dfs_scaled[i])
+        else:
+            groups.setdefault(key, []).append(i)
+    for key, idx in groups.items():
+        if len(idx) == 1:
+            results[idx[0]] = predictors[idx[0]].predict_batch(feature_dfs_scaled[idx[0]])
+            continue
+        logger.info(f"Gestapelte Inference: {len(idx)} Modelle ({key[0]}) in einem Aufruf")
+        stacked = StackedPredictor([predictors[i] for i in idx])
+        for i, probs in zip(idx, stacked.predict_batch([feature_dfs_scaled[i] for i in idx])):
+            results[i] = probs
+    return results
@@ -1,19 +1,30 @@
 # src/dbot/model/trainer.py
 # Training-Loop für das LSTM-Modell
 import os
+import time
 import logging
 import numpy as np
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
-from sklearn.utils.class_weight import compute_class_weight
 
 from dbot.model.lstm_model import LSTMModel, create_model
+from dbot.model.dataset import WindowDataset, BatchLoader
 
 logger = logging.getLogger(__name__)
 
 DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
+# Rechengenauigkeit für Training und eager-Inference: 'bf16' = Autocast (Matmuls von LSTM
+# und Linear-Layern in bfloat16, Gewichte und Loss bleiben fp32)
+PRECISIONS = ('fp32', 'bf16')
+
+
+def autocast(precision: str = 'fp32', device: torch.device = DEVICE):
+    """Autocast-Kontext für precision ('fp32' = deaktiviert)."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unbekannte Precision: {precision} (erlaubt: {', '.join(PRECISIONS)})")
+    return torch.autocast(device_type=torch.device(device).type, dtype=torch.bfloat16, enabled=precision == 'bf16')
+
 
 def train_model(
     X_train: np.ndarray,
@@ -25,78 +36,139 @@ def train_model(
     batch_size: int = 64,
     lr: float = 1e-3,
     patience: int = 10,
+    precision: str = 'fp32',
+    drop_last: bool = False,
+    val_batch_size: int = 1024,
+    init_model: nn.Module = None,
 ) -> tuple:
     """
     Trainiert das LSTM-Modell mit Early Stopping.
 
     Args:
-        X_train: (n, seq_len, features)
-        y_train: (n,) Labels 0/1/2
-        X_val:   Validierungsdaten
+        X_train: (n, seq_len, features) oder WindowDataset (dann y_train=None)
+        y_train: (n,) Labels 0/1/2 – oder (n, n_heads) aus create_label_grid für
+                 model_type 'multihead' (Loss = Summe über alle Köpfe, Val Acc = Mittel)
+        X_val:   Validierungsdaten oder WindowDataset (dann y_val=None)
         y_val:   Validierungs-Labels
         model_config: Dict mit Modell-Hyperparametern
         epochs: Maximale Epochen
         batch_size: Batch-Größe
         lr: Lernrate
         patience: Early-Stopping-Geduld (Epochen ohne Verbesserung)
+        precision: 'fp32' oder 'bf16' (Forward unter Autocast, Loss in fp32)
+        drop_last: unvollständigen letzten Trainings-Batch je Epoche verwerfen
+        val_batch_size: Fenster je Validierungs-Forward (begrenzt den Speicher unabhängig
+                        von der Länge der Validierungsperiode)
+        init_model: bestehendes Modell weitertrainieren (Warm-Start) statt model_config –
+                    dessen Val Accuracy vor dem Training ist die Basis für das Early Stopping,
+                    ohne Verbesserung bleiben die Gewichte unverändert (history['initial_val_acc'])
 
     Returns:
-        (model, history): trainiertes Modell + Verlaufsdaten
+        (model, history): trainiertes Modell + Verlaufsdaten je Epoche (train_loss, val_loss,
+        val_acc, val_confusion [wahr][vorhergesagt], bei Multi-Head je Kopf und val_acc_heads)
     """
-    n_features = X_train.shape[2]
-    model = create_model(n_features, model_config).to(DEVICE)
+    lazy = isinstance(X_train, WindowDataset)
+    if lazy:
+        y_train = X_train.targets
+    n_features = X_train.n_features if lazy else X_train.shape[2]
+    if init_model is not None and init_model.n_features != n_features:
+        raise ValueError(f"init_model erwartet {init_model.n_features} Features, Daten haben {n_features}.")
+    model = (init_model if init_model is not None else create_model(n_features, model_config)).to(DEVICE)
+    multi_head = np.ndim(y_train) == 2
+    if multi_head != (model.model_type == 'multihead'):
+        raise ValueError("2D-Labels (Label-Grid) erfordern model_type 'multihead' und umgekehrt.")
 
-    # Klassen-gewichtete Loss (ausgeglichen bei ungleicher Verteilung)
-    class_weights = compute_class_weight('balanced', classes=np.array([0, 1, 2]), y=y_train)
-    weights_tensor = torch.tensor(class_weights, dtype=torch.float32).to(DEVICE)
-    criterion = nn.CrossEntropyLoss(weight=weights_tensor)
+    # Klassen-gewichtete Loss (ausgeglichen bei ungleicher Verteilung), je Kopf eigene Gewichte
+    from sklearn.utils.class_weight import compute_class_weight  # nur fürs Training benötigt
+    criteria = []
+    for y_head in (np.asarray(y_train).T if multi_head else [y_train]):
+        head_weights = compute_class_weight('balanced', classes=np.array([0, 1, 2]), y=y_head)
+        weights_tensor = torch.tensor(head_weights, dtype=torch.float32).to(DEVICE)
+        criteria.append(nn.CrossEntropyLoss(weight=weights_tensor))
+    class_weights = torch.stack([criterion.weight for criterion in criteria])  # (n_heads, 3)
+
+    def compute_logits(X):
+        # (batch, 3) bzw. (batch, n_heads, 3); Logits für Loss/Argmax immer in fp32
+        with autocast(precision):
+            logits = model.forward_all(X) if multi_head else model(X)
+        return logits.float()
+
+    def compute_loss(logits, y):
+        if not multi_head:
+            return criteria[0](logits, y)
+        return sum(criterion(logits[:, i], y[:, i]) for i, criterion in enumerate(criteria))
 
     optimizer = torch.optim.Adam(model.parameters(), lr=lr, weight_decay=1e-5)
     scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
         optimizer, mode='max', factor=0.5, patience=5
     )
 
-    # DataLoader
-    X_t = torch.tensor(X_train, dtype=torch.float32)
-    y_t = torch.tensor(y_train, dtype=torch.long)
-    train_ds = TensorDataset(X_t, y_t)
-    train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True, drop_last=False)
+    if lazy:
+        # Fenster werden pro Batch aus dem 2D-Feature-Array gegathert (keine n×seq_len-Kopie)
+        train_loader = BatchLoader(X_train, batch_size=batch_size, drop_last=drop_last)
+    else:
+        # Zusammenhängender Tensor (X_train ist i.d.R. ein Strided-View – hier entsteht die
+        # einzige Kopie), Batches per index_select statt Einzel-Samples + collate
+        X_t = torch.tensor(X_train, dtype=torch.float32)
+        y_t = torch.tensor(y_train, dtype=torch.long)
+        train_loader = BatchLoader(X_t, y_t, batch_size=batch_size, drop_last=drop_last)
+    if len(train_loader) == 0:
+        raise ValueError(f"Weniger Trainings-Fenster ({len(X_train)}) als batch_size ({batch_size}) mit drop_last.")
 
-    X_v = torch.tensor(X_val, dtype=torch.float32).to(DEVICE)
-    y_v = torch.tensor(y_val, dtype=torch.long).to(DEVICE)
+    y_v = np.asarray(X_val.targets if isinstance(X_val, WindowDataset) else y_val, dtype=np.int64)
 
-    history = {'train_loss': [], 'val_acc': []}
+    history = {'train_loss': [], 'val_loss': [], 'val_acc': [], 'val_confusion': []}
+    if multi_head:
+        history['val_acc_heads'] = []
     best_val_acc = 0.0
     best_state = None
     no_improve = 0
+    if init_model is not None:
+        model.eval()
+        with torch.no_grad():
+            val_loss, confusion = _validate(compute_logits, class_weights, X_val, y_v, val_batch_size)
+        best_val_acc = float(np.mean(_head_accuracy(confusion)))
+        best_state = {k: v.cpu().clone() for k, v in model.state_dict().items()}
+        # Ohne Verbesserung bleiben die Start-Gewichte stehen – deren Val-Metriken gehören dazu
+        history['initial_val_acc'] = best_val_acc
+        history['initial_val_loss'] = val_loss
+        history['initial_val_confusion'] = confusion.tolist() if multi_head else confusion[0].tolist()
+        logger.info(f"Warm-Start | Val Acc vor dem Training: {best_val_acc:.4f}")
 
     for epoch in range(epochs):
         model.train()
         total_loss = 0.0
+        epoch_start = time.perf_counter()
         for X_batch, y_batch in train_loader:
             X_batch, y_batch = X_batch.to(DEVICE), y_batch.to(DEVICE)
             optimizer.zero_grad()
-            logits = model(X_batch)
-            loss = criterion(logits, y_batch)
+            logits = compute_logits(X_batch)
+            loss = compute_loss(logits, y_batch)
             loss.backward()
             nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
             optimizer.step()
             total_loss += loss.item() * len(X_batch)
 
-        avg_loss = total_loss / len(X_train)
+        avg_loss = total_loss / train_loader.n_samples
+        samples_s = train_loader.n_samples / (time.perf_counter() - epoch_start)
 
-        # Validierung
+        # Validierung (blockweise, Loss/Accuracy/Confusion im selben Durchlauf)
         model.eval()
         with torch.no_grad():
-            val_logits = model(X_v)
-            val_preds = val_logits.argmax(dim=1)
-            val_acc = (val_preds == y_v).float().mean().item()
+            val_loss, confusion = _validate(compute_logits, class_weights, X_val, y_v, val_batch_size)
+        acc_heads = _head_accuracy(confusion)
+        val_acc = float(np.mean(acc_heads))
 
         scheduler.step(val_acc)
         history['train_loss'].append(avg_loss)
+        history['val_loss'].append(val_loss)
         history['val_acc'].append(val_acc)
+        history['val_confusion'].append(confusion.tolist() if multi_head else confusion[0].tolist())
+        if multi_head:
+            history['val_acc_heads'].append(acc_heads)
 
-        logger.info(f"Epoch {epoch+1:3d}/{epochs} | Loss: {avg_loss:.4f} | Val Acc: {val_acc:.4f}")
+        logger.info(f"Epoch {epoch+1:3d}/{epochs} | Loss: {avg_loss:.4f} | Val Loss: {val_loss:.4f} | "
+                    f"Val Acc: {val_acc:.4f} | {samples_s:.0f} Samples/s")
 
         if val_acc > best_val_acc:
             best_val_acc = val_acc
@@ -117,31 +189,375 @@ def train_model(
     return model, history
 
 
-def save_model(model: LSTMModel, path: str, metadata: dict = None):
-    """Speichert Modell-Gewichte und Metadaten."""
+def _validate(compute_logits, class_weights: torch.Tensor, X, y: np.ndarray, chunk: int = 1024) -> tuple:
+    """
+    Validierung in Blöcken à chunk Fenster: pro Forward liegen nur chunk Fenster (und deren
+    Aktivierungen) auf dem Device, Strided-Views werden erst blockweise kopiert.
+
+    class_weights: (n_heads, 3) Klassen-Gewichte des Trainings-Loss; der Loss ist die Summe
+    der klassen-gewichteten Cross-Entropy je Kopf (wie compute_loss in train_model).
+
+    Returns:
+        (mittlerer Loss, Confusion-Counts (n_heads, 3, 3) als [wahr, vorhergesagt])
+    """
+    n_heads = 1 if y.ndim == 1 else y.shape[1]
+    codes = torch.zeros(n_heads * 9, dtype=torch.long, device=DEVICE)
+    head_offset = torch.arange(n_heads, device=DEVICE) * 9
+    # Gewichteter Loss je Kopf als Summen (Σ w·nll, Σ w): blockweise exakt wie ein Forward
+    # über alle Fenster (CrossEntropyLoss(weight) mittelt über die Gewichte, nicht die Anzahl)
+    loss_sum = torch.zeros(n_heads, dtype=torch.float64, device=DEVICE)
+    weight_sum = torch.zeros(n_heads, dtype=torch.float64, device=DEVICE)
+    head_idx = torch.arange(n_heads, device=DEVICE)
+    for start in range(0, len(y), chunk):
+        idx = np.arange(start, min(start + chunk, len(y)))
+        y_batch = torch.from_numpy(y[idx]).to(DEVICE).view(len(idx), n_heads)
+        logits = compute_logits(_gather_windows(X, idx).to(DEVICE)).view(len(idx), n_heads, 3)
+        nll = nn.functional.cross_entropy(logits.reshape(-1, 3), y_batch.flatten(), reduction='none')
+        weights = class_weights[head_idx, y_batch]
+        loss_sum += (weights * nll.view(len(idx), n_heads)).sum(dim=0).double()
+        weight_sum += weights.sum(dim=0).double()
+        # Ein bincount über alle Köpfe: Code = Kopf * 9 + wahr * 3 + vorhergesagt
+        pair = (y_batch * 3 + logits.argmax(dim=-1)) + head_offset
+        codes += torch.bincount(pair.flatten(), minlength=n_heads * 9)
+    val_loss = float((loss_sum / weight_sum).sum()) if len(y) else 0.0
+    return val_loss, codes.view(n_heads, 3, 3).cpu()
+
+
+def _head_accuracy(confusion: torch.Tensor) -> list:
+    """Accuracy je Kopf aus Confusion-Counts (n_heads, 3, 3)."""
+    return (confusion.diagonal(dim1=1, dim2=2).sum(dim=1) / confusion.sum(dim=(1, 2))).tolist()
+
+
+def stateful_targets(labels: np.ndarray) -> np.ndarray:
+    """
+    Zielwerte je Zeitschritt für die zustandsbehaftete Variante: Schritt t (nach Kerze t)
+    sagt das Label der Folgekerze voraus – wie das Fenster features[e-seq_len:e] → labels[e].
+    """
+    labels = np.asarray(labels, dtype=np.float64)
+    return np.append(labels[1:], np.nan)
+
+
+def stream_predict(model: LSTMModel, features: np.ndarray, state: tuple = None,
+                   chunk: int = 4096) -> tuple:
+    """
+    Sequenzieller Durchlauf über eine Feature-Reihe (T, n_features) mit durchgereichtem
+    Zustand – ein LSTM-Schritt pro Kerze statt seq_len Schritte pro Fenster.
+
+    Returns:
+        (probs (T, 3), (h, c)) – probs[t] ist die Vorhersage nach Kerze t
+    """
+    model.eval()
+    x = torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+    probs = []
+    with torch.no_grad():
+        for start in range(0, len(x), chunk):
+            logits, state = model.forward_sequence(x[None, start:start + chunk].to(DEVICE), state)
+            probs.append(torch.softmax(logits[0], dim=-1).cpu().numpy())
+    return (np.concatenate(probs) if probs else np.empty((0, 3), dtype=np.float32)), state
+
+
+def train_stateful_model(
+    train_features: np.ndarray,
+    train_labels: np.ndarray,
+    val_features: np.ndarray,
+    val_labels: np.ndarray,
+    model_config: dict = None,
+    epochs: int = 50,
+    n_streams: int = 32,
+    segment_len: int = 100,
+    burn_in: int = 60,
+    lr: float = 1e-3,
+    patience: int = 10,
+    seed: int = 0,
+) -> tuple:
+    """
+    Trainiert die zustandsbehaftete Variante mit Truncated BPTT.
+
+    Die (skalierte) Trainingsreihe wird in n_streams zusammenhängende Teilreihen
+    zerlegt, die parallel als Batch laufen. Pro Segment (segment_len Kerzen) wird
+    der Zustand (h, c) ins nächste Segment weitergereicht, der Gradient aber am
+    Segmentanfang abgeschnitten. Die ersten burn_in Kerzen jeder Teilreihe zählen
+    nicht zum Loss (Zustand noch kalt). Pro Epoche wird der Startversatz der
+    Teilreihen zufällig verschoben, damit die Segmentgrenzen wandern.
+
+    Validierung: sequenzieller Durchlauf über die Validierungsreihe (ab Nullzustand),
+    Accuracy auf allen Zeilen ab burn_in – vergleichbar mit build_sequences(seq_len=burn_in).
+
+    Args:
+        train_features / val_features: (T, n_features) skalierte Features (zusammenhängend)
+        train_labels / val_labels: Labels je Zeile (NaN = ohne Label)
+
+    Returns:
+        (model, history)
+    """
+    rng = np.random.default_rng(seed)
+    train_features = np.asarray(train_features, dtype=np.float32)
+    targets = stateful_targets(train_labels)
+    val_targets = stateful_targets(val_labels)
+    n_features = train_features.shape[1]
+    if (model_config or {}).get('model_type', 'lstm') != 'lstm':
+        raise ValueError("Stateful-Training (Truncated BPTT) ist nur für model_type 'lstm' möglich.")
+    model = create_model(n_features, model_config).to(DEVICE)
+
+    from sklearn.utils.class_weight import compute_class_weight  # nur fürs Training benötigt
+    valid = targets[~np.isnan(targets)].astype(np.int64)
+    class_weights = compute_class_weight('balanced', classes=np.array([0, 1, 2]), y=valid)
+    criterion = nn.CrossEntropyLoss(weight=torch.tensor(class_weights, dtype=torch.float32).to(DEVICE))
+
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr, weight_decay=1e-5)
+    scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode='max', factor=0.5, patience=5)
+
+    val_mask = ~np.isnan(val_targets)
+    val_mask[:burn_in] = False
+    y_val = val_targets[val_mask].astype(np.int64)
+
+    history = {'train_loss': [], 'val_acc': []}
+    best_val_acc = 0.0
+    best_state = None
+    no_improve = 0
+
+    for epoch in range(epochs):
+        # Teilreihen mit zufälligem Versatz: (n_streams, stream_len, n_features)
+        offset = int(rng.integers(0, segment_len))
+        stream_len = (len(train_features) - offset) // n_streams
+        usable = slice(offset, offset + stream_len * n_streams)
+        X = torch.from_numpy(train_features[usable].reshape(n_streams, stream_len, n_features)).to(DEVICE)
+        y = targets[usable].reshape(n_streams, stream_len)
+        mask = ~np.isnan(y)
+        mask[:, :burn_in] = False
+        y_t = torch.from_numpy(np.nan_to_num(y, nan=1.0).astype(np.int64)).to(DEVICE)
+        mask_t = torch.from_numpy(mask).to(DEVICE)
+
+        model.train()
+        state = None
+        total_loss, total_count = 0.0, 0
+        for start in range(0, stream_len, segment_len):
+            seg = slice(start, start + segment_len)
+            logits, state = model.forward_sequence(X[:, seg], state)
+            state = tuple(s.detach() for s in state)
+            m = mask_t[:, seg]
+            if not m.any():
+                continue
+            loss = criterion(logits[m], y_t[:, seg][m])
+            optimizer.zero_grad()
+            loss.backward()
+            nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+            optimizer.step()
+            count = int(m.sum())
+            total_loss += loss.item() * count
+            total_count += count
+
+        avg_loss = total_loss / max(total_count, 1)
+        probs, _ = stream_predict(model, val_features)
+        val_acc = float((probs[val_mask].argmax(axis=1) == y_val).mean()) if len(y_val) else 0.0
+
+        scheduler.step(val_acc)
+        history['train_loss'].append(avg_loss)
+        history['val_acc'].append(val_acc)
+        logger.info(f"Epoch {epoch+1:3d}/{epochs} | Loss: {avg_loss:.4f} | Val Acc (stream): {val_acc:.4f}")
+
+        if val_acc > best_val_acc:
+            best_val_acc = val_acc
+            best_state = {k: v.cpu().clone() for k, v in model.state_dict().items()}
+            no_improve = 0
+        else:
+            no_improve += 1
+            if no_improve >= patience:
+                logger.info(f"Early Stopping nach Epoch {epoch+1} (keine Verbesserung seit {patience} Epochen).")
+                break
+
+    if best_state:
+        model.load_state_dict(best_state)
+    model.to(DEVICE)
+    logger.info(f"Stateful-Training abgeschlossen. Beste Val Accuracy (stream): {best_val_acc:.4f}")
+    return model, history
+
+
+def _gather_windows(X, idx: np.ndarray) -> torch.Tensor:
+    """Fenster idx aus einem (n, seq_len, features)-Array (auch Strided-View) oder WindowDataset."""
+    if isinstance(X, WindowDataset):
+        return torch.from_numpy(X.windows(idx)).float()
+    return torch.from_numpy(np.ascontiguousarray(X[idx], dtype=np.float32))
+
+
+def predict_windows(model: nn.Module, X, chunk: int = 4096, temperature: float = 1.0) -> np.ndarray:
+    """
+    Softmax-Wahrscheinlichkeiten (n, 3) für alle Fenster von X, blockweise
+    (ohne X komplett als Tensor zu kopieren). temperature > 1 glättet die Verteilung.
+    """
+    model.eval()
+    probs = []
+    with torch.no_grad():
+        for start in range(0, len(X), chunk):
+            idx = np.arange(start, min(start + chunk, len(X)))
+            logits = model(_gather_windows(X, idx).to(DEVICE))
+            probs.append(torch.softmax(logits / temperature, dim=-1).cpu().numpy())
+    return np.concatenate(probs) if probs else np.empty((0, 3), dtype=np.float32)
+
+
+STUDENT_CONFIG = {'model_type': 'lstm', 'hidden_size': 32, 'num_layers': 1, 'dropout': 0.0, 'fc_hidden': 16}
+
+
+def distill_model(
+    teacher: nn.Module,
+    X_train,
+    X_val,
+    student_config: dict = None,
+    epochs: int = 30,
+    batch_size: int = 256,
+    lr: float = 2e-3,
+    temperature: float = 2.0,
+    patience: int = 5,
+    seed: int = 0,
+) -> tuple:
+    """
+    Knowledge Distillation: trainiert ein kleines Student-Modell auf den weichen
+    Wahrscheinlichkeiten des Teachers über die Trainings-Fenster (keine Labels nötig).
+
+    Loss: KL(teacher_T ‖ student_T) · T² mit Temperatur T auf beiden Seiten.
+    Early Stopping auf der Argmax-Übereinstimmung mit dem Teacher auf X_val.
+
+    Args:
+        teacher: trainiertes Modell (z.B. aus train_model)
+        X_train / X_val: (n, seq_len, features) oder WindowDataset – dieselben Fenster wie im Training
+        student_config: Modell-Konfiguration des Students (Standard: STUDENT_CONFIG, 1 Layer à 32)
+
+    Returns:
+        (student, history) – history mit train_loss und val_agreement je Epoche
+    """
+    # Lokale Zufallsquellen: Init und Shuffling sind reproduzierbar, ohne den globalen
+    # torch-RNG für nachfolgende Trainings (z.B. weitere Optuna-Trials) umzusetzen
+    generator = torch.Generator().manual_seed(seed)
+    teacher.eval()
+    # Teacher-Ziele einmal vorab berechnen (n × 3 statt eines Teacher-Forwards pro Batch)
+    soft_targets = torch.from_numpy(predict_windows(teacher, X_train, temperature=temperature))
+    teacher_val = predict_windows(teacher, X_val).argmax(axis=1)
+
+    n_features = X_train.n_features if isinstance(X_train, WindowDataset) else X_train.shape[2]
+    # Dropout im Student-Training zieht aus dem globalen RNG → eigener Zustand, danach zurückgesetzt
+    with torch.random.fork_rng(devices=[DEVICE.index or 0] if DEVICE.type == 'cuda' else []):
+        torch.manual_seed(seed)
+        student = create_model(n_features, {**STUDENT_CONFIG, **(student_config or {})}).to(DEVICE)
+        optimizer = torch.optim.Adam(student.parameters(), lr=lr)
+        kl = nn.KLDivLoss(reduction='batchmean')
+
+        history = {'train_loss': [], 'val_agreement': []}
+        best_agreement = -1.0
+        best_state = None
+        no_improve = 0
+        for epoch in range(epochs):
+            student.train()
+            total_loss = 0.0
+            order = torch.randperm(len(X_train), generator=generator).numpy()
+            for start in range(0, len(order), batch_size):
+                idx = np.sort(order[start:start + batch_size])
+                X_batch = _gather_windows(X_train, idx).to(DEVICE)
+                optimizer.zero_grad()
+                log_probs = torch.log_softmax(student(X_batch) / temperature, dim=-1)
+                loss = kl(log_probs, soft_targets[idx].to(DEVICE)) * temperature ** 2
+                loss.backward()
+                nn.utils.clip_grad_norm_(student.parameters(), max_norm=1.0)
+                optimizer.step()
+                total_loss += loss.item() * len(idx)
+
+            agreement = float((predict_windows(student, X_val).argmax(axis=1) == teacher_val).mean())
+            history['train_loss'].append(total_loss / len(X_train))
+            history['val_agreement'].append(agreement)
+            logger.info(f"Distill Epoch {epoch+1:3d}/{epochs} | KL: {history['train_loss'][-1]:.4f} | "
+                        f"Übereinstimmung: {agreement:.4f}")
+
+            if agreement > best_agreement:
+                best_agreement = agreement
+                best_state = {k: v.cpu().clone() for k, v in student.state_dict().items()}
+                no_improve = 0
+            else:
+                no_improve += 1
+                if no_improve >= patience:
+                    logger.info(f"Early Stopping nach Epoch {epoch+1}.")
+                    break
+
+    if best_state:
+        student.load_state_dict(best_state)
+    student.to(DEVICE).eval()
+    logger.info(f"Distillation abgeschlossen. Beste Übereinstimmung mit Teacher: {best_agreement:.4f}")
+    return student, history
+
+
+QUANT_DYNAMIC_INT8 = 'dynamic_int8'
+# Gepackte int8-Gewichte lassen sich nicht mit weights_only laden → eigene Datei neben dem
+# Checkpoint, die nur für als quantisiert markierte Checkpoints entpickelt wird
+QUANT_STATE_SUFFIX = '.qstate'
+
+
+def quant_state_path(path: str) -> str:
+    """Pfad der quantisierten Gewichte zu einem Checkpoint, z.B. BTCUSDTUSDT_4h.int8.pt.qstate."""
+    return path + QUANT_STATE_SUFFIX
+
+
+def quantize_model(model: LSTMModel) -> LSTMModel:
+    """
+    Dynamische int8-Quantisierung: Gewichte von LSTM und Linear-Layern als int8,
+    Aktivierungen werden pro Aufruf quantisiert. Nur für CPU-Inference.
+    """
+    from torch.ao.quantization import quantize_dynamic
+    return quantize_dynamic(model.cpu().eval(), {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def save_model(model: nn.Module, path: str, metadata: dict = None, quantization: str = None):
+    """
+    Speichert Modell-Gewichte und Metadaten (quantization: z.B. QUANT_DYNAMIC_INT8).
+
+    model_type + model_config (Konstruktor-Argumente) legen die Architektur fest;
+    LSTM-Checkpoints behalten zusätzlich die bisherigen Schlüssel (hidden_size, ...).
+    """
     os.makedirs(os.path.dirname(path), exist_ok=True)
     checkpoint = {
-        'state_dict': model.state_dict(),
-        'n_features': model.lstm.input_size,
-        'hidden_size': model.hidden_size,
-        'num_layers': model.num_layers,
-        'fc_hidden': model.fc1.out_features,
+        'state_dict': {} if quantization else model.state_dict(),
+        'model_type': model.model_type,
+        'model_config': dict(model.hparams),
+        'n_features': model.n_features,
+        'fc_hidden': model.hparams['fc_hidden'],
         'metadata': metadata or {},
     }
+    if model.model_type == 'lstm':
+        checkpoint['hidden_size'] = model.hidden_size
+        checkpoint['num_layers'] = model.num_layers
+    if quantization:
+        checkpoint['quantization'] = quantization
+        torch.save(model.state_dict(), quant_state_path(path))
     torch.save(checkpoint, path)
     logger.info(f"Modell gespeichert: {path}")
 
 
-def load_model(path: str) -> LSTMModel:
-    """Lädt ein Modell aus einer Checkpoint-Datei."""
-    checkpoint = torch.load(path, map_location=DEVICE)
-    model = LSTMModel(
-        n_features=checkpoint['n_features'],
-        hidden_size=checkpoint['hidden_size'],
-        num_layers=checkpoint['num_layers'],
-        fc_hidden=checkpoint['fc_hidden'],
-    ).to(DEVICE)
-    model.load_state_dict(checkpoint['state_dict'])
+def load_model(path: str) -> nn.Module:
+    """
+    Lädt ein Modell aus einer Checkpoint-Datei (quantisierte Checkpoints auf CPU).
+
+    Der Checkpoint selbst wird immer mit weights_only geladen; nur die Gewichte eines als
+    quantisiert markierten Checkpoints (quant_state_path) werden entpickelt.
+    """
+    checkpoint = torch.load(path, map_location=DEVICE, weights_only=True)
+    if 'model_config' in checkpoint:
+        model = create_model(checkpoint['n_features'],
+                             {**checkpoint['model_config'], 'model_type': checkpoint['model_type']})
+    else:
+        # Checkpoints vor der Architektur-Registry: immer LSTM
+        model = LSTMModel(
+            n_features=checkpoint['n_features'],
+            hidden_size=checkpoint['hidden_size'],
+            num_layers=checkpoint['num_layers'],
+            fc_hidden=checkpoint['fc_hidden'],
+        )
+    quantization = checkpoint.get('quantization')
+    state_dict = checkpoint['state_dict']
+    if quantization == QUANT_DYNAMIC_INT8:
+        model = quantize_model(model)
+        state_dict = torch.load(quant_state_path(path), map_location='cpu', weights_only=False)
+    elif quantization:
+        raise ValueError(f"Unbekannte Quantisierung im Checkpoint: {quantization}")
+    else:
+        model = model.to(DEVICE)
+    model.load_state_dict(state_dict)
     model.eval()
-    logger.info(f"Modell geladen: {path}")
+    logger.info(f"Modell geladen: {path}" + (f" ({quantization})" if quantization else ""))
     return model
@@ -5,7 +5,8 @@ import logging
 import numpy as np
 import pandas as pd
 
-from dbot.model.predictor import LSTMPredictor
+from dbot.model.predictor import LSTMPredictor, INFERENCE_BACKEND, predictor_options, shared_model_paths
+from dbot.model.numpy_lstm import npz_path
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +29,19 @@ def _dynamic_rr(confidence: float, threshold: float, rr_min: float = 1.5, rr_max
     return rr_min + t * (rr_max - rr_min)
 
 
-def _get_predictor(model_path: str, scaler_path: str, seq_len: int) -> LSTMPredictor:
-    """Lädt Predictor aus Cache oder Festplatte."""
-    key = (model_path, scaler_path)
+def _get_predictor(model_path: str, scaler_path: str, seq_len: int,
+                   feature_state_path: str = None, backend: str = None,
+                   options: dict = None) -> LSTMPredictor:
+    """Lädt Predictor aus Cache oder Festplatte (options: siehe predictor_options)."""
+    options = options or {}
+    key = (model_path, scaler_path, backend, tuple(sorted(options.items())))
     if key not in _predictor_cache:
-        logger.info(f"Lade LSTM-Predictor: {model_path}")
-        _predictor_cache[key] = LSTMPredictor.from_files(model_path, scaler_path, seq_len)
+        logger.info(f"Lade LSTM-Predictor: {model_path} (Backend: {backend or INFERENCE_BACKEND}"
+                    f"{', Student' if options.get('use_student') else ''})")
+        _predictor_cache[key] = LSTMPredictor.from_files(
+            model_path, scaler_path, seq_len, feature_state_path=feature_state_path, backend=backend,
+            **options,
+        )
     return _predictor_cache[key]
 
 
@@ -71,11 +79,17 @@ def get_lstm_signal(df: pd.DataFrame, config: dict, artifacts_dir: str) -> dict:
     rr_min = model_cfg.get('rr_min', 1.5)
     rr_max = model_cfg.get('rr_max', 3.0)
     sl_pct = risk_cfg['stop_loss_pct'] / 100.0
+    # 'numpy' = torch-freie Inference (schneller Start der Cron-Prozesse), sonst DBOT_INFERENCE_BACKEND
+    backend = model_cfg.get('inference_backend')
+    # Student-Modell (use_student, vom Optimizer gesetzt) bzw. Kopf eines Multi-Head-Modells
+    options = predictor_options(config)
 
     # Modell und Scaler Pfade
     safe_name = f"{symbol.replace('/', '-').replace(':', '-')}_{timeframe}"
     model_path = os.path.join(artifacts_dir, 'models', f"{safe_name}.pt")
-    scaler_path = os.path.join(artifacts_dir, 'models', f"{safe_name}_scaler.pkl")
+    scaler_path = os.path.join(artifacts_dir, 'models', f"{safe_name}_scaler.npz")
+    # Indikator-Zustand zwischen den Cronjob-Läufen (nur neue Kerzen werden berechnet)
+    feature_state_path = os.path.join(artifacts_dir, 'state', f"{safe_name}_features.json")
 
     # Initialer Return-Wert (kein Signal)
     current_price = float(df['close'].iloc[-1])
@@ -91,14 +105,16 @@ def get_lstm_signal(df: pd.DataFrame, config: dict, artifacts_dir: str) -> dict:
         'regime': 'NO_MODEL',
     }
 
-    # Prüfe ob Modell existiert
-    if not os.path.exists(model_path):
+    # Prüfe ob Modell existiert (gemeinsames Modell: from_files wählt shared.pt + Markt-Scaler)
+    if options['shared']:
+        model_path, scaler_path = shared_model_paths(os.path.dirname(model_path), symbol, timeframe)
+    if not os.path.exists(model_path) and not (backend == 'numpy' and os.path.exists(npz_path(model_path))):
         logger.warning(f"LSTM-Modell nicht gefunden: {model_path}. Bitte zuerst train_model.py ausführen.")
         return no_signal
 
     # Predictor laden (cached)
     try:
-        predictor = _get_predictor(model_path, scaler_path, seq_len)
+        predictor = _get_predictor(model_path, scaler_path, seq_len, feature_state_path, backend, options)
     except Exception as e:
         logger.error(f"Fehler beim Laden des Predictors: {e}")
         return no_signal
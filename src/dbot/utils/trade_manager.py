@@ -8,7 +8,6 @@ import json
 from datetime import datetime
 import sys
 import pandas as pd
-import ta
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 TRACKER_DIR = os.path.join(PROJECT_ROOT, 'artifacts', 'tracker')
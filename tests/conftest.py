@@ -0,0 +1,29 @@
+# tests/conftest.py
+# Gemeinsame Fixtures: synthetische OHLCV-Reihe (Random Walk, reproduzierbar)
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+def make_ohlcv(n: int = 600, seed: int = 0, start_price: float = 30000.0) -> pd.DataFrame:
+    """OHLCV-DataFrame mit n 4h-Kerzen: Log-Random-Walk für Close, High/Low um Open/Close."""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.004, (2, n)))
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+    volume = rng.lognormal(3, 0.5, n)
+    index = pd.date_range('2022-01-01', periods=n, freq='4h', tz='UTC')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume},
+                        index=index)
+
+
+@pytest.fixture
+def ohlcv():
+    return make_ohlcv()
@@ -0,0 +1,86 @@
+# tests/test_batch_loader.py
+# BatchLoader: jede Epoche deckt alle Fenster genau einmal ab, X/y bleiben gepaart
+import numpy as np
+import pytest
+import torch
+
+from dbot.model.dataset import BatchLoader, WindowDataset
+from dbot.model.trainer import train_model
+
+N, SEQ_LEN = 203, 5
+
+
+def tensors():
+    # Sample i ist an seinem Inhalt erkennbar: X[i] == i, y[i] == i
+    X = torch.arange(N, dtype=torch.float32)[:, None, None].expand(N, SEQ_LEN, 2).contiguous()
+    return X, torch.arange(N)
+
+
+def lazy_dataset():
+    # Spalte 0 = Zeilenindex → Fenster i endet in Zeile ends[i] - 1 = i + SEQ_LEN - 1
+    rng = np.random.default_rng(0)
+    features = np.column_stack([np.arange(N + SEQ_LEN, dtype=np.float32), rng.normal(size=N + SEQ_LEN)])
+    labels = rng.integers(0, 3, size=N + SEQ_LEN).astype(np.float64)
+    return WindowDataset.from_arrays(features, labels, seq_len=SEQ_LEN)
+
+
+def sample_ids(loader):
+    """Je Batch die Sample-Indizes (aus dem Fensterinhalt) und Labels."""
+    for X_batch, y_batch in loader:
+        yield (X_batch[:, -1, 0].long() - (SEQ_LEN - 1) if loader.lazy else X_batch[:, 0, 0].long()), y_batch
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['tensor', 'lazy'])
+@pytest.mark.parametrize('batch_size', [1, 64, N, 500])
+def test_epoch_covers_every_sample_once(lazy, batch_size):
+    loader = BatchLoader(lazy_dataset(), batch_size=batch_size) if lazy else \
+        BatchLoader(*tensors(), batch_size=batch_size)
+    targets = loader.X.targets if lazy else loader.y.numpy()
+
+    batches = list(sample_ids(loader))
+    ids = torch.cat([ids for ids, _ in batches]).numpy()
+
+    assert len(batches) == len(loader) == -(-N // batch_size)
+    assert loader.n_samples == N
+    assert all(len(ids) == batch_size for ids, _ in batches[:-1])
+    np.testing.assert_array_equal(np.sort(ids), np.arange(N))
+    for ids, y_batch in batches:
+        np.testing.assert_array_equal(y_batch.numpy(), targets[ids.numpy()])
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['tensor', 'lazy'])
+def test_drop_last_yields_full_batches(lazy):
+    loader = BatchLoader(lazy_dataset(), batch_size=64, drop_last=True) if lazy else \
+        BatchLoader(*tensors(), batch_size=64, drop_last=True)
+
+    batches = list(sample_ids(loader))
+    ids = torch.cat([ids for ids, _ in batches]).numpy()
+
+    assert len(batches) == len(loader) == N // 64
+    assert loader.n_samples == len(ids) == N // 64 * 64
+    assert all(len(ids) == 64 for ids, _ in batches)
+    assert len(np.unique(ids)) == len(ids)
+
+
+def test_shuffle_follows_torch_seed():
+    loader = BatchLoader(*tensors(), batch_size=32)
+
+    torch.manual_seed(0)
+    first = torch.cat([ids for ids, _ in sample_ids(loader)])
+    second = torch.cat([ids for ids, _ in sample_ids(loader)])
+    torch.manual_seed(0)
+    again = torch.cat([ids for ids, _ in sample_ids(loader)])
+
+    assert torch.equal(first, again)
+    assert not torch.equal(first, second)
+    ordered = BatchLoader(*tensors(), batch_size=32, shuffle=False)
+    np.testing.assert_array_equal(torch.cat([ids for ids, _ in sample_ids(ordered)]).numpy(), np.arange(N))
+
+
+def test_train_model_rejects_empty_epoch():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, SEQ_LEN, 3)).astype(np.float32)
+    y = np.arange(40) % 3
+    with pytest.raises(ValueError):
+        train_model(X, y, X, y, model_config={'hidden_size': 8, 'num_layers': 1, 'fc_hidden': 4},
+                    epochs=1, batch_size=64, drop_last=True)
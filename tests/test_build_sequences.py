@@ -0,0 +1,65 @@
+# tests/test_build_sequences.py
+# build_sequences (Strided-View) vs. Fenster-Schleife
+import numpy as np
+import pandas as pd
+import pytest
+
+from dbot.model.feature_engineering import build_sequences, compute_features, create_labels
+
+SEQ_LEN = 20
+
+
+def sequences_loop(feature_df, labels, seq_len):
+    """Referenz: ein Fenster pro Kerze i >= seq_len, Kerzen ohne Label werden übersprungen."""
+    feat_arr = feature_df.to_numpy(dtype=np.float32)
+    label_arr = labels.reindex(feature_df.index).to_numpy(dtype=np.float64)
+    X, y = [], []
+    for i in range(seq_len, len(feat_arr)):
+        if np.isnan(label_arr[i]):
+            continue
+        X.append(feat_arr[i - seq_len:i])
+        y.append(int(label_arr[i]))
+    return np.array(X, dtype=np.float32).reshape(-1, seq_len, feat_arr.shape[1]), np.array(y, dtype=np.int64)
+
+
+@pytest.fixture
+def features(ohlcv):
+    return compute_features(ohlcv)
+
+
+def assert_same(features, labels, seq_len=SEQ_LEN):
+    X, y = build_sequences(features, labels, seq_len=seq_len, dtype=np.float32)
+    X_ref, y_ref = sequences_loop(features, labels, seq_len)
+    assert X.shape == X_ref.shape and y.shape == y_ref.shape
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+    return X, y
+
+
+def test_matches_loop(features, ohlcv):
+    X, _ = assert_same(features, create_labels(ohlcv).astype(float))
+    assert not X.flags.writeable  # Strided-View ohne Kopie
+
+
+def test_nan_labels_are_skipped(features, ohlcv):
+    labels = create_labels(ohlcv).astype(float)
+    labels.iloc[-5:] = np.nan                                   # Horizont-Ende außerhalb der Daten
+    labels.loc[features.index[[SEQ_LEN, 100, 101, 250]]] = np.nan  # Lücken mitten in der Reihe
+    X, y = assert_same(features, labels)
+    assert len(y) == len(features) - SEQ_LEN - 5 - 4
+
+
+def test_labels_missing_from_index(features, ohlcv):
+    # reindex: Kerzen ohne Eintrag in labels zählen als NaN
+    assert_same(features, create_labels(ohlcv).astype(float).iloc[::2])
+
+
+@pytest.mark.parametrize('n_rows', [0, 1, SEQ_LEN - 1, SEQ_LEN, SEQ_LEN + 1])
+def test_short_frames(features, ohlcv, n_rows):
+    X, y = assert_same(features.iloc[:n_rows], create_labels(ohlcv).astype(float))
+    assert len(X) == max(n_rows - SEQ_LEN, 0)
+
+
+def test_all_labels_nan(features):
+    X, y = assert_same(features, pd.Series(np.nan, index=features.index))
+    assert X.shape == (0, SEQ_LEN, features.shape[1])
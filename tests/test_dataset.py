@@ -0,0 +1,52 @@
+# tests/test_dataset.py
+# WindowDataset.concat: Fenster und Skalierung je Ursprungs-Dataset
+import numpy as np
+import pytest
+
+from dbot.model.dataset import WindowDataset
+from dbot.model.feature_engineering import FeatureScaler, compute_features, create_labels
+from conftest import make_ohlcv
+
+SEQ_LEN = 20
+
+
+def raw_dataset(seed, scaler=None):
+    """Unskalierte Feature-Matrix (wie aus dem Feature-Store) mit eigenem Scaler."""
+    df = make_ohlcv(300, seed=seed, start_price=100.0 * (seed + 1))
+    features = compute_features(df)
+    labels = create_labels(df).reindex(features.index)
+    if scaler is None:
+        scaler = FeatureScaler.fit(features.to_numpy())
+    return WindowDataset.from_frames(features, labels, seq_len=SEQ_LEN, scaler=scaler)
+
+
+def expected_windows(datasets):
+    return np.concatenate([ds.windows(np.arange(len(ds))) for ds in datasets])
+
+
+def test_concat_applies_each_scaler():
+    datasets = [raw_dataset(0), raw_dataset(1)]
+    assert datasets[0].scaler is not datasets[1].scaler
+
+    merged = WindowDataset.concat(datasets)
+
+    assert merged.scaler is None
+    np.testing.assert_allclose(merged.windows(np.arange(len(merged))), expected_windows(datasets), rtol=1e-6)
+    np.testing.assert_array_equal(merged.targets, np.concatenate([ds.targets for ds in datasets]))
+
+
+def test_concat_keeps_shared_scaler():
+    first = raw_dataset(0)
+    datasets = [first, raw_dataset(1, scaler=first.scaler)]
+
+    merged = WindowDataset.concat(datasets)
+
+    assert merged.scaler is first.scaler
+    np.testing.assert_allclose(merged.windows(np.arange(len(merged))), expected_windows(datasets), rtol=1e-6)
+
+
+def test_concat_rejects_mixed_seq_len():
+    short = raw_dataset(0)
+    short.seq_len = SEQ_LEN - 1
+    with pytest.raises(ValueError):
+        WindowDataset.concat([raw_dataset(0), short])
@@ -0,0 +1,62 @@
+# tests/test_feature_dtype.py
+# Dtype-Policy: float32-Pipeline (Standard) vs. float64 für Features, Scaler und Predictions
+import numpy as np
+import pytest
+import torch
+
+from dbot.model import feature_engineering
+from dbot.model.feature_engineering import (
+    compute_features, fit_scaler, apply_scaler, set_feature_dtype, FEATURE_NAMES
+)
+from dbot.model.lstm_model import create_model
+from dbot.model.predictor import LSTMPredictor
+
+SEQ_LEN = 30
+
+
+@pytest.fixture
+def restore_dtype():
+    previous = feature_engineering.FEATURE_DTYPE
+    yield
+    set_feature_dtype(previous)
+
+
+def run_pipeline(df, dtype, model):
+    """Features → Scaler (auf den ersten 2/3 gefittet) → predict_batch unter der Policy dtype."""
+    set_feature_dtype(dtype)
+    features = compute_features(df)
+    split = len(features) * 2 // 3
+    scaler, _ = fit_scaler(features.iloc[:split])
+    scaled = apply_scaler(features, scaler)
+    probs = LSTMPredictor(model, scaler, seq_len=SEQ_LEN).predict_batch(scaled)
+    return features.to_numpy(), scaled.to_numpy(), probs
+
+
+def max_rel_diff(a, b):
+    """Maximale Abweichung je Feature relativ zur Größenordnung der float64-Spalte."""
+    scale = np.maximum(np.abs(b).max(axis=0), np.finfo(np.float64).tiny)
+    return float((np.abs(a - b).max(axis=0) / scale).max())
+
+
+def test_set_feature_dtype_rejects_other_types(restore_dtype):
+    with pytest.raises(ValueError):
+        set_feature_dtype(np.float16)
+
+
+def test_float32_policy_matches_float64(ohlcv, restore_dtype):
+    torch.manual_seed(0)
+    model = create_model(len(FEATURE_NAMES), {'hidden_size': 32, 'num_layers': 1, 'fc_hidden': 16})
+
+    f32, s32, p32 = run_pipeline(ohlcv, np.float32, model)
+    f64, s64, p64 = run_pipeline(ohlcv, np.float64, model)
+
+    assert f32.dtype == s32.dtype == np.float32
+    assert f64.dtype == s64.dtype == np.float64
+    assert f32.shape == f64.shape and p32.shape == p64.shape == (len(f64) - SEQ_LEN, 3)
+
+    # Indikatoren rechnen intern in float64 → nur die Rundung beim Schreiben der Matrix
+    assert max_rel_diff(f32, f64) < 1e-6
+    # Skalierte Werte sind O(1); Median/IQR werden aus den gerundeten Features gefittet
+    assert max_rel_diff(s32, s64) < 1e-5
+    # Das Modell rechnet in beiden Fällen in float32
+    assert np.abs(p32 - p64).max() < 1e-5
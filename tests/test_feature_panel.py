@@ -0,0 +1,58 @@
+# tests/test_feature_panel.py
+# compute_features_panel / compute_features_multi vs. compute_features je Symbol
+import numpy as np
+import pytest
+
+from dbot.model.feature_engineering import (
+    compute_features, compute_features_multi, compute_features_panel, FEATURE_NAMES
+)
+from conftest import make_ohlcv
+
+# Einzel- und Panel-Pfad rechnen in float64, Unterschiede nur durch Summationsreihenfolge
+RTOL, ATOL = 1e-9, 1e-9
+
+
+@pytest.fixture
+def staggered():
+    """Drei Symbole auf einer 4h-Achse, gelistet zu unterschiedlichen Zeitpunkten, eines endet früher."""
+    base = make_ohlcv(800, seed=0)
+    return {
+        ('AAA', '4h'): base,
+        ('BBB', '4h'): make_ohlcv(800, seed=1, start_price=50.0).iloc[137:],
+        ('CCC', '4h'): make_ohlcv(800, seed=2, start_price=2.0).iloc[400:-25],
+    }
+
+
+def test_multi_matches_single_with_staggered_listings(staggered):
+    result = compute_features_multi(staggered, dtype=np.float64)
+
+    assert list(result) == list(staggered)
+    for key, df in staggered.items():
+        expected = compute_features(df, dtype=np.float64)
+        assert result[key].index.equals(expected.index), key
+        np.testing.assert_allclose(result[key].to_numpy(), expected.to_numpy(), rtol=RTOL, atol=ATOL,
+                                   err_msg=str(key))
+
+
+def test_panel_valid_rows_match_single(staggered):
+    index = staggered[('AAA', '4h')].index
+    panel = np.stack([df.reindex(index)[['open', 'high', 'low', 'close', 'volume']].to_numpy()
+                      for df in staggered.values()])
+
+    features, valid = compute_features_panel(panel, dtype=np.float64)
+
+    assert features.shape == (len(staggered), len(index), len(FEATURE_NAMES))
+    for i, df in enumerate(staggered.values()):
+        expected = compute_features(df, dtype=np.float64)
+        assert index[valid[i]].equals(expected.index)
+        np.testing.assert_allclose(features[i, valid[i]], expected.to_numpy(), rtol=RTOL, atol=ATOL)
+
+
+def test_multi_with_gap_falls_back_to_single(staggered):
+    gapped = staggered[('BBB', '4h')].drop(staggered[('BBB', '4h')].index[300:310])
+    frames = {**staggered, ('BBB', '4h'): gapped}
+
+    result = compute_features_multi(frames, dtype=np.float64)
+
+    np.testing.assert_allclose(result[('BBB', '4h')].to_numpy(),
+                               compute_features(gapped, dtype=np.float64).to_numpy(), rtol=RTOL, atol=ATOL)
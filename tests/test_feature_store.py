@@ -0,0 +1,97 @@
+# tests/test_feature_store.py
+# FeatureStore: Treffer, Anhängen per TAIL_CONTEXT und Invalidierung (Kerzen-Hash / Schema)
+import logging
+
+import numpy as np
+import pytest
+
+from dbot.model import feature_store
+from dbot.model.feature_engineering import compute_features
+from dbot.model.feature_store import FeatureStore, TAIL_CONTEXT
+from conftest import make_ohlcv
+
+SYMBOL, TIMEFRAME = 'TST/USDT:USDT', '4h'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(str(tmp_path / 'features'))
+
+
+@pytest.fixture
+def candles():
+    return make_ohlcv(TAIL_CONTEXT + 800, seed=3)
+
+
+def get(store, df, caplog):
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger=feature_store.__name__):
+        features = store.get(SYMBOL, TIMEFRAME, df)
+    return features, caplog.text
+
+
+def assert_matches_batch(features, df, rtol=0.0, atol=0.0):
+    expected = compute_features(df)
+    assert features.index.equals(expected.index)
+    assert features.dtypes.eq(expected.dtypes).all()
+    np.testing.assert_allclose(features.to_numpy(), expected.to_numpy(), rtol=rtol, atol=atol)
+
+
+def test_first_call_and_hit_equal_compute_features(store, candles, caplog):
+    features, log = get(store, candles, caplog)
+    assert 'neu berechnet' in log
+    assert_matches_batch(features, candles)
+
+    features, log = get(store, candles, caplog)
+    assert 'Treffer' in log
+    assert_matches_batch(features, candles)
+
+
+def test_append_matches_full_computation(store, candles, caplog):
+    get(store, candles.iloc[:TAIL_CONTEXT + 300], caplog)
+
+    features, log = get(store, candles, caplog)
+
+    assert 'erweitert' in log and '+500 Kerzen' in log
+    # Tail mit TAIL_CONTEXT Kerzen Kontext: EMA/Wilder-Zustände auf float32-Genauigkeit eingeschwungen
+    assert_matches_batch(features, candles, rtol=1e-5, atol=1e-6)
+    matrix, index_ns = store.load_matrix(SYMBOL, TIMEFRAME)
+    assert len(matrix) == len(index_ns) == len(candles)
+
+
+def test_short_history_is_recomputed_instead_of_appended(store, candles, caplog):
+    get(store, candles.iloc[:TAIL_CONTEXT - 1], caplog)
+
+    features, log = get(store, candles, caplog)
+
+    assert 'neu berechnet' in log
+    assert_matches_batch(features, candles)
+
+
+def test_rewritten_history_invalidates(store, candles, caplog):
+    get(store, candles.iloc[:TAIL_CONTEXT + 300], caplog)
+    rewritten = candles.copy()
+    rewritten.iloc[50, rewritten.columns.get_loc('close')] *= 1.01   # korrigierte alte Kerze
+
+    features, log = get(store, rewritten, caplog)
+
+    assert 'neu berechnet' in log
+    assert_matches_batch(features, rewritten)
+
+
+def test_shorter_data_invalidates(store, candles, caplog):
+    get(store, candles, caplog)
+
+    features, log = get(store, candles.iloc[:-10], caplog)
+
+    assert 'neu berechnet' in log
+    assert_matches_batch(features, candles.iloc[:-10])
+
+
+def test_schema_change_invalidates(store, candles, caplog, monkeypatch):
+    get(store, candles, caplog)
+    monkeypatch.setattr(feature_store, 'FEATURE_VERSION', feature_store.FEATURE_VERSION + 1)
+
+    assert store.load_matrix(SYMBOL, TIMEFRAME) == (None, None)
+    _, log = get(store, candles, caplog)
+    assert 'neu berechnet' in log
@@ -0,0 +1,112 @@
+# tests/test_finetune.py
+# Warm-Start (--finetune): neue Fenster + Replay sowie Fallback auf volles Training
+import importlib.util
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dbot.model.export import checkpoint_metadata
+from dbot.model.feature_engineering import build_sequences, compute_features, create_labels, fit_scaler
+from conftest import make_ohlcv
+
+SEQ_LEN = 20
+SCRIPT = Path(__file__).resolve().parents[1] / 'train_model.py'
+
+
+@pytest.fixture(scope='module')
+def scaled():
+    df = make_ohlcv(600, seed=5)
+    _, scaled_df = fit_scaler(compute_features(df))
+    return scaled_df, create_labels(df).reindex(scaled_df.index)
+
+
+@pytest.fixture
+def train_script(tmp_path):
+    """train_model.py als Kopie in tmp_path: Log, Daten und Artefakte landen dort statt im Repo."""
+    shutil.copy(SCRIPT, tmp_path / 'train_model.py')
+    (tmp_path / 'logs').mkdir()
+    spec = importlib.util.spec_from_file_location('train_model_under_test', tmp_path / 'train_model.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('replay_ratio', [0.0, 0.5, 1.0, 100.0])
+def test_finetune_windows_new_and_replay(train_script, scaled, replay_ratio):
+    scaled_df, labels = scaled
+    trained_until = scaled_df.index[400]
+    X_all, y_all = build_sequences(scaled_df, labels, seq_len=SEQ_LEN)
+    n_old = 401 - SEQ_LEN  # Label-Kerzen seq_len..400
+
+    X, y, n_new, n_replay = train_script.finetune_windows(scaled_df, labels, trained_until, SEQ_LEN,
+                                                          replay_ratio=replay_ratio)
+
+    # Neue Fenster: genau die mit Label-Kerze nach trained_until, in voller Länge (Kontext davor)
+    assert n_new == len(X_all) - n_old
+    np.testing.assert_array_equal(X[:n_new], X_all[n_old:])
+    np.testing.assert_array_equal(y[:n_new], y_all[n_old:])
+
+    # Replay: Stichprobe ohne Wiederholung aus den älteren Fenstern
+    assert n_replay == min(n_old, int(round(replay_ratio * n_new)))
+    assert len(X) == len(y) == n_new + n_replay
+    old = {window.tobytes(): label for window, label in zip(X_all[:n_old], y_all[:n_old])}
+    replay = [window.tobytes() for window in X[n_new:]]
+    assert len(set(replay)) == n_replay
+    assert all(old[key] == label for key, label in zip(replay, y[n_new:]))
+
+
+def test_finetune_windows_lazy_matches_eager(train_script, scaled):
+    scaled_df, labels = scaled
+    trained_until = scaled_df.index[450]
+
+    X, y, n_new, n_replay = train_script.finetune_windows(scaled_df, labels, trained_until, SEQ_LEN, seed=3)
+    dataset, y_lazy, n_new_lazy, n_replay_lazy = train_script.finetune_windows(
+        scaled_df, labels, trained_until, SEQ_LEN, lazy=True, seed=3)
+
+    assert y_lazy is None
+    assert (n_new_lazy, n_replay_lazy) == (n_new, n_replay)
+    np.testing.assert_array_equal(dataset.windows(np.arange(len(dataset))), X)
+    np.testing.assert_array_equal(dataset.targets, y)
+
+
+def test_finetune_windows_without_new_candles(train_script, scaled):
+    scaled_df, labels = scaled
+
+    X, y, n_new, n_replay = train_script.finetune_windows(scaled_df, labels, scaled_df.index[-1], SEQ_LEN)
+
+    assert n_new == n_replay == len(X) == len(y) == 0
+
+
+def run_training(module, monkeypatch, data_file, *extra):
+    monkeypatch.setattr(sys, 'argv', [
+        'train_model.py', '--symbol', 'TST/USDT:USDT', '--timeframe', '4h', '--data-file', str(data_file),
+        '--seq-len', str(SEQ_LEN), '--val-split', '0.3', '--epochs', '1', '--finetune-epochs', '1', *extra,
+    ])
+    module.main()
+    return checkpoint_metadata(str(Path(module.PROJECT_ROOT) / 'artifacts' / 'models' / 'TSTUSDTUSDT_4h.pt'))
+
+
+def test_finetune_falls_back_to_full_training(train_script, tmp_path, monkeypatch):
+    df = make_ohlcv(700, seed=6)
+    short_file, long_file = tmp_path / 'short.csv', tmp_path / 'long.csv'
+    df.iloc[:600].to_csv(short_file)
+    df.to_csv(long_file)
+
+    first = run_training(train_script, monkeypatch, short_file)
+    assert first['training_mode'] == 'full' and first['version'] == 1
+
+    # Gleiche Kerzen: keine neuen Trainings-Fenster → volles Training statt Warm-Start
+    again = run_training(train_script, monkeypatch, short_file, '--finetune')
+    assert again['training_mode'] == 'full' and again['version'] == 2
+    assert again['trained_until'] == first['trained_until']
+
+    # Neue Kerzen: Warm-Start auf den neuen Fenstern plus Replay (Degradation-Fallback abgeschaltet)
+    tuned = run_training(train_script, monkeypatch, long_file, '--finetune', '--max-degradation', '1.0')
+    assert tuned['training_mode'] == 'finetune' and tuned['version'] == 3
+    assert pd.Timestamp(tuned['trained_until']) > pd.Timestamp(first['trained_until'])
+    assert tuned['finetune_new_windows'] > 0
+    assert tuned['finetune_replay_windows'] == tuned['finetune_new_windows']
@@ -0,0 +1,90 @@
+# tests/test_grid.py
+# Grid-Runner: Kern-Gruppen, Ergebnis-Tabelle je Kombination (sequenziell und im Prozess-Pool)
+import json
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('optuna')
+
+from dbot.analysis import grid, optimizer
+from dbot.model.export import checkpoint_metadata
+from dbot.model.feature_store import FeatureStore
+from dbot.model.trainer import load_model
+from conftest import make_ohlcv
+
+SYMBOL, TIMEFRAME = 'TST/USDT:USDT', '4h'
+HORIZONS, ZONES = (3, 5), (0.2, 0.5)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Alle Artefakt-Pfade (Grid, Modelle, Configs, Feature-Store) unter tmp_path, Kerzen aus make_ohlcv."""
+    calls = []
+
+    def load_data(symbol, timeframe, start_date, end_date):
+        calls.append((symbol, timeframe))
+        return make_ohlcv(500, seed=8)
+
+    monkeypatch.setattr(grid, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(grid, 'GRID_DIR', str(tmp_path / 'artifacts' / 'grid'))
+    monkeypatch.setattr(optimizer, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(grid, 'load_data', load_data)
+    monkeypatch.setattr(grid, 'FeatureStore', lambda: FeatureStore(str(tmp_path / 'features')))
+    return tmp_path, calls
+
+
+def run(workers, **options):
+    return grid.run_grid(SYMBOL, TIMEFRAME, None, None, horizons=HORIZONS, neutral_zones=ZONES, workers=workers,
+                         threads=1, n_trials=2, epochs=1, seq_len=20, **options)
+
+
+def test_core_groups_are_disjoint():
+    cores = sorted(os.sched_getaffinity(0))
+    threads = max(1, len(cores) // 2)
+    groups = grid.core_groups(len(cores) // threads, threads)
+
+    assert all(len(group) == threads for group in groups)
+    assert sorted(c for group in groups for c in group) == cores[:len(groups) * threads]
+
+
+@pytest.mark.parametrize('workers', [1, 2], ids=['sequential', 'pool'])
+def test_grid_collects_every_combo(project, workers):
+    root, calls = project
+
+    results = run(workers)
+
+    # Kerzen einmal geladen und mit allen Kombinationen geteilt
+    assert calls == [(SYMBOL, TIMEFRAME)]
+    assert list(results.columns) == grid.RESULT_COLUMNS
+    assert sorted(zip(results['horizon'], results['neutral_zone'])) == [(h, nz) for h in HORIZONS for nz in ZONES]
+    assert results['error'].isna().all()
+    assert results['pnl_pct'].is_monotonic_decreasing
+    assert results['best_val_acc'].between(0, 1).all()
+    pd.testing.assert_frame_equal(pd.read_csv(root / 'artifacts' / 'grid' / 'TSTUSDTUSDT_4h_results.csv'), results,
+                                  check_dtype=False)
+
+    # Beste Kombination als Standard-Modell + Config übernommen, Zwischen-Artefakte entfernt
+    best = results.iloc[0]
+    with open(optimizer.config_path_for(SYMBOL, TIMEFRAME)) as f:
+        config = json.load(f)
+    assert (config['model']['horizon_candles'], config['model']['neutral_zone_pct']) == \
+        (best['horizon'], best['neutral_zone'])
+    assert config['_backtest_metrics']['pnl_pct'] == pytest.approx(best['pnl_pct'], abs=0.005)
+    assert checkpoint_metadata(str(root / 'artifacts' / 'models' / 'TSTUSDTUSDT_4h.pt'))['horizon_candles'] == \
+        best['horizon']
+    assert not (root / 'artifacts' / 'grid' / 'TSTUSDTUSDT_4h').exists()
+
+
+def test_multihead_grid_trains_once(project):
+    root, _ = project
+
+    results = run(2, multihead=True)
+
+    assert results['error'].isna().all() and len(results) == len(HORIZONS) * len(ZONES)
+    model = load_model(str(root / 'artifacts' / 'models' / 'TSTUSDTUSDT_4h.pt'))
+    assert model.model_type == 'multihead'
+    assert sorted(model.head_keys) == [(h, nz) for h in HORIZONS for nz in ZONES]
+    # Alle Kombinationen nutzen denselben Checkpoint → gleiche Val Accuracy des Haupt-Kopfs
+    assert results['best_val_acc'].nunique() == 1
@@ -0,0 +1,88 @@
+# tests/test_incremental_features.py
+# IncrementalFeatureEngine (Live, Kerze für Kerze) vs. compute_features (Batch)
+import numpy as np
+import pytest
+
+from dbot.model.feature_engineering import IncrementalFeatureEngine, compute_features, FEATURE_NAMES
+
+SEQ_LEN = 60
+# Engine und Batch rechnen beide in float64, nur die Summationsreihenfolge unterscheidet sich
+RTOL, ATOL = 1e-9, 1e-9
+
+
+def replay(engine, df):
+    """Spielt df Kerze für Kerze ab und liefert alle Feature-Zeilen (inkl. NaN-Warmup)."""
+    return np.array([
+        engine.update(row.high, row.low, row.close, row.volume, ts)
+        for ts, row in zip(df.index, df.itertuples())
+    ])
+
+
+def assert_rows_match(rows, expected):
+    for i, name in enumerate(FEATURE_NAMES):
+        np.testing.assert_allclose(rows[:, i], expected[:, i], rtol=RTOL, atol=ATOL, err_msg=name)
+
+
+def test_replay_matches_batch_features(ohlcv):
+    batch = compute_features(ohlcv, dtype=np.float64)
+    rows = replay(IncrementalFeatureEngine(history=SEQ_LEN), ohlcv)
+
+    # Warmup: genau die Zeilen, die compute_features verwirft, sind NaN
+    valid = ~np.isnan(rows).any(axis=1)
+    assert ohlcv.index[valid].equals(batch.index)
+    assert_rows_match(rows[valid], batch.to_numpy())
+
+
+def test_window_matches_batch_tail(ohlcv):
+    engine = IncrementalFeatureEngine.from_dataframe(ohlcv, history=SEQ_LEN)
+    expected = compute_features(ohlcv, dtype=np.float64).iloc[-SEQ_LEN:].to_numpy()
+    window = engine.window(SEQ_LEN)
+
+    assert window.shape == (SEQ_LEN, len(FEATURE_NAMES))
+    assert_rows_match(window, expected)
+
+
+def test_peek_does_not_change_state(ohlcv):
+    engine = IncrementalFeatureEngine.from_dataframe(ohlcv.iloc[:-1], history=SEQ_LEN)
+    last = ohlcv.iloc[-1]
+    before = engine.to_dict()
+
+    peeked = engine.peek(last.high, last.low, last.close, last.volume)
+
+    assert engine.to_dict() == before
+    np.testing.assert_array_equal(peeked, engine.update(last.high, last.low, last.close, last.volume))
+
+
+@pytest.mark.parametrize('split', [10, 30, 300])
+def test_save_load_resumes_replay(ohlcv, tmp_path, split):
+    """Zustand mitten im Stream (auch im Warmup) speichern, laden und weiterspielen."""
+    path = str(tmp_path / 'state' / 'engine.json')
+    IncrementalFeatureEngine.from_dataframe(ohlcv.iloc[:split], history=SEQ_LEN).save(path)
+
+    engine = IncrementalFeatureEngine.load(path)
+    assert engine.last_timestamp == str(ohlcv.index[split - 1])
+    rows = replay(engine, ohlcv.iloc[split:])
+
+    expected = replay(IncrementalFeatureEngine(history=SEQ_LEN), ohlcv)[split:]
+    np.testing.assert_array_equal(np.isnan(rows), np.isnan(expected))
+    np.testing.assert_array_equal(rows, expected)
+
+    batch = compute_features(ohlcv, dtype=np.float64)
+    assert_rows_match(engine.window(SEQ_LEN), batch.iloc[-SEQ_LEN:].to_numpy())
+
+
+@pytest.mark.parametrize('bad_close', [0.0, -5.0])
+def test_non_positive_close_matches_batch(ohlcv, bad_close):
+    """Kaputte Kerzen (Close <= 0) lösen keinen ValueError aus, Log-Return wie np.log (-inf/NaN)."""
+    df = ohlcv.copy()
+    df.iloc[300, df.columns.get_loc('close')] = bad_close
+    df.iloc[301, df.columns.get_loc('close')] = 0.0
+    batch = compute_features(df, dtype=np.float64)
+    rows = replay(IncrementalFeatureEngine(history=SEQ_LEN), df)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.log(df.close.to_numpy()[300:302] / df.close.to_numpy()[299:301])
+    np.testing.assert_array_equal(rows[300:302, 0], expected)
+    valid = ~np.isnan(rows).any(axis=1)
+    assert df.index[valid].equals(batch.index)
+    assert_rows_match(rows[valid], batch.to_numpy())
@@ -0,0 +1,100 @@
+# tests/test_indicators.py
+# Vektorisierte Indikatoren (linear_recurrence & Co.) vs. Python-Schleife / pandas ewm / ta
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+from dbot.model import indicators
+from dbot.model.indicators import linear_recurrence, _decay_powers
+
+WILDER = 14
+
+
+def recurrence_loop(x, decay, init=0.0):
+    """Referenz: y[t] = decay * y[t-1] + x[t] Kerze für Kerze."""
+    y = np.empty(len(x))
+    prev = init
+    for t, value in enumerate(x):
+        prev = decay * prev + value
+        y[t] = prev
+    return y
+
+
+def block_size(decay):
+    return len(_decay_powers(decay)[0])
+
+
+@pytest.mark.parametrize('decay', [0.05, 0.5, 0.9, 1.0 - 1.0 / WILDER])
+def test_linear_recurrence_across_block_boundaries(decay):
+    block = block_size(decay)
+    # n kein Vielfaches der Blockgröße: mehrere volle Blöcke plus ein Rest
+    n = 2 * block + block // 3 + 1
+    x = np.random.default_rng(0).normal(size=n)
+
+    y = linear_recurrence(x, decay, init=1.5)
+
+    assert n % block != 0
+    np.testing.assert_allclose(y, recurrence_loop(x, decay, init=1.5), rtol=1e-10, atol=1e-10)
+
+
+def test_linear_recurrence_batched_rows():
+    decay = 0.5
+    n = block_size(decay) + 7
+    x = np.random.default_rng(1).normal(size=(3, n))
+    init = np.array([0.0, -2.0, 4.0])
+
+    y = linear_recurrence(x, decay, init=init)
+
+    for row, start in enumerate(init):
+        np.testing.assert_allclose(y[row], recurrence_loop(x[row], decay, init=start), rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.parametrize('decay', [0.0, 1.0])
+def test_linear_recurrence_degenerate_decay(decay):
+    x = np.arange(5, dtype=np.float64)
+    np.testing.assert_array_equal(linear_recurrence(x, decay, init=2.0), recurrence_loop(x, decay, init=2.0))
+
+
+@pytest.mark.parametrize('n_nan', [0, 5, 40])
+def test_ema_wilder_alpha_matches_pandas(n_nan):
+    """Wilder-Glättung (alpha = 1/14) mit NaN-Warmup, länger als ein Block."""
+    alpha = 1.0 / WILDER
+    n = block_size(1.0 - alpha) + 1000
+    x = np.random.default_rng(2).normal(size=n)
+    x[:n_nan] = np.nan
+
+    y = indicators.ema(x, alpha=alpha, min_periods=WILDER)
+    expected = pd.Series(x).ewm(alpha=alpha, adjust=False, min_periods=WILDER).mean().to_numpy()
+
+    np.testing.assert_array_equal(np.isnan(y), np.isnan(expected))
+    assert np.isnan(y[:n_nan + WILDER - 1]).all()
+    np.testing.assert_allclose(y, expected, rtol=1e-10, atol=1e-10)
+
+
+def test_ema_span_matches_pandas():
+    x = np.random.default_rng(3).normal(size=1500).cumsum()
+    y = indicators.ema(x, span=26, min_periods=26)
+    expected = pd.Series(x).ewm(span=26, adjust=False, min_periods=26).mean().to_numpy()
+    np.testing.assert_allclose(y, expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+def test_wilder_indicators_match_ta(ohlcv):
+    high, low, close = (ohlcv[c].to_numpy() for c in ('high', 'low', 'close'))
+
+    np.testing.assert_allclose(
+        indicators.rsi(close, WILDER),
+        ta.momentum.RSIIndicator(ohlcv['close'], window=WILDER).rsi().to_numpy(),
+        rtol=1e-9, atol=1e-9, equal_nan=True,
+    )
+    np.testing.assert_allclose(
+        indicators.atr(high, low, close, WILDER),
+        ta.volatility.AverageTrueRange(ohlcv['high'], ohlcv['low'], ohlcv['close'], window=WILDER)
+        .average_true_range().to_numpy(),
+        rtol=1e-9, atol=1e-9,
+    )
+    np.testing.assert_allclose(
+        indicators.adx(high, low, close, WILDER),
+        ta.trend.ADXIndicator(ohlcv['high'], ohlcv['low'], ohlcv['close'], window=WILDER).adx().to_numpy(),
+        rtol=1e-9, atol=1e-9,
+    )
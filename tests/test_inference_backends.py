@@ -0,0 +1,138 @@
+# tests/test_inference_backends.py
+# Export-/Inference-Backends vs. eager PyTorch (Wahrscheinlichkeiten je Fenster)
+import numpy as np
+import pytest
+import torch
+
+from dbot.model.export import export_model, load_inference_fn, artifact_path, BACKENDS
+from dbot.model.feature_engineering import compute_features, fit_scaler, save_scaler, FEATURE_NAMES
+from dbot.model.lstm_model import create_model
+from dbot.model.predictor import LSTMPredictor
+from dbot.model.trainer import save_model
+
+SEQ_LEN = 30
+# Max. absolute Abweichung der Wahrscheinlichkeiten zu eager
+TOLERANCES = {
+    'torchscript': 1e-6,
+    'numpy': 1e-5,
+    'onnx': 1e-5,
+    'int8': 5e-3,    # dynamische int8-Quantisierung der LSTM-/Linear-Gewichte
+}
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    torch.manual_seed(0)
+    model = create_model(len(FEATURE_NAMES), {'hidden_size': 32, 'num_layers': 2, 'fc_hidden': 16})
+    path = str(tmp_path / 'TSTUSDTUSDT_4h.pt')
+    save_model(model, path, metadata={'seq_len': SEQ_LEN})
+    return path
+
+
+@pytest.fixture(scope='module')
+def windows():
+    # Skalierte Features sind ~O(1) (Median/IQR)
+    return np.random.default_rng(0).normal(size=(64, SEQ_LEN, len(FEATURE_NAMES))).astype(np.float32)
+
+
+def backend_params():
+    for backend in TOLERANCES:
+        marks = []
+        if backend == 'onnx':
+            marks.append(pytest.mark.skipif(not _has_onnx(), reason='onnx/onnxruntime nicht installiert'))
+        yield pytest.param(backend, marks=marks)
+
+
+def _has_onnx():
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize('exported', [True, False], ids=['artifact', 'on_load'])
+@pytest.mark.parametrize('backend', backend_params())
+def test_backend_matches_eager(checkpoint, windows, backend, exported):
+    if exported:
+        export_model(checkpoint, formats=(backend,))
+    elif backend == 'onnx':
+        pytest.skip('onnx braucht das exportierte Artefakt')
+    reference = load_inference_fn(checkpoint, 'eager')(windows)
+
+    infer = load_inference_fn(checkpoint, backend)
+    probs = infer(windows)
+
+    assert infer.backend == backend
+    assert probs.shape == reference.shape == (len(windows), 3)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, atol=1e-5)
+    assert np.abs(probs - reference).max() < TOLERANCES[backend]
+
+
+ARCHITECTURES = {
+    'multihead': {'head_keys': [[5, 0.3], [10, 0.5]], 'hidden_size': 16, 'num_layers': 1, 'fc_hidden': 8},
+    'tcn': {'channels': 8, 'levels': 3, 'fc_hidden': 8},
+}
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('model_type', sorted(ARCHITECTURES))
+def test_predictor_falls_back_for_other_architectures(tmp_path, ohlcv, model_type, backend):
+    """Backends, die eine Architektur nicht rechnen können (numpy: nur LSTM), fallen auf eager zurück."""
+    torch.manual_seed(0)
+    model = create_model(len(FEATURE_NAMES), {**ARCHITECTURES[model_type], 'model_type': model_type})
+    model_path = str(tmp_path / 'TSTUSDTUSDT_4h.pt')
+    scaler_path = str(tmp_path / 'TSTUSDTUSDT_4h_scaler.npz')
+    save_model(model, model_path, metadata={'seq_len': SEQ_LEN})
+    scaler, scaled = fit_scaler(compute_features(ohlcv))
+    save_scaler(scaler, scaler_path)
+
+    predictor = LSTMPredictor.from_files(model_path, scaler_path, SEQ_LEN, backend=backend)
+    reference = LSTMPredictor.from_files(model_path, scaler_path, SEQ_LEN, backend='eager')
+
+    assert predictor.backend != 'numpy'
+    probs = predictor.predict(ohlcv)
+    assert probs.shape == (3,)
+    np.testing.assert_allclose(probs, reference.predict(ohlcv), atol=TOLERANCES.get(predictor.backend, 1e-6))
+    np.testing.assert_allclose(predictor.predict_batch(scaled), reference.predict_batch(scaled),
+                               atol=TOLERANCES.get(predictor.backend, 1e-6))
+
+
+def test_torchscript_keeps_dynamic_shapes(checkpoint):
+    path = export_model(checkpoint, formats=('torchscript',))['torchscript']
+    assert path == artifact_path(checkpoint, 'torchscript')
+    windows = np.random.default_rng(1).normal(size=(1, SEQ_LEN + 15, len(FEATURE_NAMES))).astype(np.float32)
+
+    # Getraced mit batch=2 / seq_len=SEQ_LEN, genutzt mit anderen Größen
+    probs = load_inference_fn(checkpoint, 'torchscript')(windows)
+
+    np.testing.assert_allclose(probs, load_inference_fn(checkpoint, 'eager')(windows), atol=TOLERANCES['torchscript'])
+
+
+def test_onnx_without_artifact_falls_back_to_eager(checkpoint, windows):
+    infer = load_inference_fn(checkpoint, 'onnx')
+
+    assert infer.backend == 'eager'
+    np.testing.assert_array_equal(infer(windows), load_inference_fn(checkpoint, 'eager')(windows))
+
+
+def test_unknown_backend_raises(checkpoint):
+    with pytest.raises(ValueError):
+        load_inference_fn(checkpoint, 'tensorrt')
+
+
+@pytest.mark.parametrize('backend', backend_params())
+def test_predictor_backend_matches_eager(tmp_path, checkpoint, ohlcv, backend):
+    scaler_path = str(tmp_path / 'TSTUSDTUSDT_4h_scaler.npz')
+    scaler, scaled = fit_scaler(compute_features(ohlcv))
+    save_scaler(scaler, scaler_path)
+    export_model(checkpoint, formats=(backend,))
+
+    predictor = LSTMPredictor.from_files(checkpoint, scaler_path, SEQ_LEN, backend=backend)
+    reference = LSTMPredictor.from_files(checkpoint, scaler_path, SEQ_LEN, backend='eager')
+
+    assert predictor.backend == backend
+    np.testing.assert_allclose(predictor.predict(ohlcv), reference.predict(ohlcv), atol=TOLERANCES[backend])
+    np.testing.assert_allclose(predictor.predict_batch(scaled), reference.predict_batch(scaled),
+                               atol=TOLERANCES[backend])
@@ -0,0 +1,49 @@
+# tests/test_labels.py
+# create_label_grid (alle Horizont × Neutral-Zone-Kombinationen) vs. Labels einzeln per pandas
+import numpy as np
+import pandas as pd
+import pytest
+
+from dbot.model.feature_engineering import create_labels, create_label_grid, build_sequences
+
+HORIZONS = [1, 5, 12]
+NEUTRAL_ZONES = [0.0, 0.3, 1.5]
+
+
+def labels_reference(raw_df, horizon, neutral_zone):
+    """Label-Definition per shift (0 = LONG, 1 = NEUTRAL, 2 = SHORT; ohne Zukunft NEUTRAL)."""
+    close = raw_df['close']
+    future_return = (close.shift(-horizon) - close) / close * 100.0
+    labels = pd.Series(1, index=close.index, dtype=int)
+    labels[future_return > neutral_zone] = 0
+    labels[future_return < -neutral_zone] = 2
+    return labels
+
+
+def test_label_grid_columns_match_single_labels(ohlcv):
+    grid = create_label_grid(ohlcv, HORIZONS, NEUTRAL_ZONES)
+
+    assert list(grid.columns) == [(h, nz) for h in HORIZONS for nz in NEUTRAL_ZONES]
+    assert grid.index.equals(ohlcv.index)
+    for h in HORIZONS:
+        for nz in NEUTRAL_ZONES:
+            expected = labels_reference(ohlcv, h, nz)
+            np.testing.assert_array_equal(grid[(h, nz)].to_numpy(), expected.to_numpy(), err_msg=f"{h}/{nz}")
+            pd.testing.assert_series_equal(create_labels(ohlcv, h, nz), expected)
+
+
+def test_label_grid_without_future_is_neutral(ohlcv):
+    grid = create_label_grid(ohlcv, [12], [0.3])
+    assert (grid.iloc[-12:] == 1).all().all()
+
+
+@pytest.mark.parametrize('n_rows', [10, 20])
+def test_build_sequences_empty_keeps_label_grid_shape(ohlcv, n_rows):
+    seq_len = 20
+    features = ohlcv[['open', 'high', 'low', 'close', 'volume']].iloc[:n_rows]
+    grid = create_label_grid(ohlcv, HORIZONS, NEUTRAL_ZONES)
+
+    X, y = build_sequences(features, grid, seq_len=seq_len)
+
+    assert X.shape == (0, seq_len, 5)
+    assert y.shape == (0, len(HORIZONS) * len(NEUTRAL_ZONES))
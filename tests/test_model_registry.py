@@ -0,0 +1,94 @@
+# tests/test_model_registry.py
+# Architektur-Registry: gleiche Ein-/Ausgabe für alle model_types, Save/Load, kausales TCN
+import pytest
+import torch
+
+from dbot.model.lstm_model import CausalConvBlock, CLI_MODEL_TYPES, MODEL_TYPES, create_model
+from dbot.model.trainer import DEVICE, load_model, save_model
+
+N_FEATURES, SEQ_LEN = 12, 60
+CONFIGS = {
+    'lstm': {'hidden_size': 16, 'num_layers': 2, 'fc_hidden': 8},
+    'tcn': {'channels': 8, 'kernel_size': 3, 'levels': 3, 'fc_hidden': 8},
+    'multihead': {'head_keys': [[5, 0.3], [10, 0.5]], 'hidden_size': 16, 'num_layers': 1, 'fc_hidden': 8},
+}
+
+
+def windows(batch=8, seq_len=SEQ_LEN, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(batch, seq_len, N_FEATURES, generator=generator)
+
+
+def test_cli_types_are_registered():
+    assert {'lstm', 'tcn'} <= set(CLI_MODEL_TYPES) <= set(MODEL_TYPES)
+
+
+def test_unknown_model_type_raises():
+    with pytest.raises(ValueError):
+        create_model(N_FEATURES, {'model_type': 'transformer'})
+
+
+@pytest.mark.parametrize('model_type', sorted(CONFIGS))
+def test_save_load_roundtrip(tmp_path, model_type):
+    torch.manual_seed(0)
+    model = create_model(N_FEATURES, {**CONFIGS[model_type], 'model_type': model_type}).eval()
+    path = str(tmp_path / f'{model_type}.pt')
+    save_model(model, path, metadata={'seq_len': SEQ_LEN})
+
+    loaded = load_model(path)
+    x = windows()
+    with torch.no_grad():
+        probs = loaded.predict_proba(x.to(DEVICE)).cpu()
+        expected = model.predict_proba(x)
+
+    assert type(loaded) is MODEL_TYPES[model_type]
+    assert loaded.hparams == model.hparams
+    assert probs.shape == (len(x), 3)
+    torch.testing.assert_close(probs.sum(dim=1), torch.ones(len(x)))
+    torch.testing.assert_close(probs, expected)
+
+
+def test_legacy_checkpoint_loads_as_lstm(tmp_path):
+    torch.manual_seed(0)
+    model = create_model(N_FEATURES, CONFIGS['lstm']).eval()
+    path = str(tmp_path / 'legacy.pt')
+    torch.save({'state_dict': model.state_dict(), 'n_features': N_FEATURES, 'hidden_size': 16,
+                'num_layers': 2, 'fc_hidden': 8, 'metadata': {}}, path)
+
+    loaded = load_model(path)
+
+    assert loaded.model_type == 'lstm'
+    x = windows()
+    with torch.no_grad():
+        torch.testing.assert_close(loaded.predict_proba(x.to(DEVICE)).cpu(), model.predict_proba(x))
+
+
+def test_causal_block_ignores_future_steps():
+    torch.manual_seed(0)
+    block = CausalConvBlock(N_FEATURES, 8, kernel_size=3, dilation=4, dropout=0.0).eval()
+    x = windows(batch=2).transpose(1, 2)
+    changed = x.clone()
+    changed[:, :, 40:] += 1.0
+
+    with torch.no_grad():
+        out, out_changed = block(x), block(changed)
+
+    torch.testing.assert_close(out[:, :, :40], out_changed[:, :, :40], rtol=0, atol=0)
+    assert not torch.allclose(out[:, :, 40:], out_changed[:, :, 40:])
+
+
+def test_tcn_receptive_field():
+    torch.manual_seed(0)
+    model = create_model(N_FEATURES, {**CONFIGS['tcn'], 'model_type': 'tcn'}).eval()
+    field = model.receptive_field
+    assert field == 1 + 2 * (3 - 1) * (2 ** 3 - 1) < SEQ_LEN
+    x = windows()
+
+    with torch.no_grad():
+        reference = model(x)
+        outside, inside = x.clone(), x.clone()
+        outside[:, :SEQ_LEN - field] += 1.0       # älter als das rezeptive Feld
+        inside[:, SEQ_LEN - field] += 1.0         # älteste Kerze im rezeptiven Feld
+
+        torch.testing.assert_close(model(outside), reference, rtol=0, atol=0)
+        assert not torch.allclose(model(inside), reference)
@@ -0,0 +1,68 @@
+# tests/test_precision.py
+# bf16-Autocast (Training und eager-Inference) vs. fp32
+import numpy as np
+import pytest
+import torch
+
+from dbot.model.feature_engineering import build_sequences, compute_features, create_labels, fit_scaler, FEATURE_NAMES
+from dbot.model.lstm_model import create_model
+from dbot.model.predictor import LSTMPredictor
+from dbot.model.trainer import autocast, train_model
+from conftest import make_ohlcv
+
+SEQ_LEN = 30
+CONFIGS = {
+    'lstm': {'hidden_size': 32, 'num_layers': 2, 'fc_hidden': 16},
+    'tcn': {'model_type': 'tcn', 'channels': 16, 'levels': 4, 'fc_hidden': 16},
+}
+# bfloat16 hat 8 Mantissen-Bits: Wahrscheinlichkeiten weichen um ~1e-3 ab
+PROBS_ATOL = 1e-2
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = make_ohlcv(1200, seed=3)
+    _, scaled = fit_scaler(compute_features(df))
+    return df, scaled
+
+
+def test_autocast_rejects_unknown_precision():
+    with pytest.raises(ValueError):
+        autocast('fp16')
+
+
+@pytest.mark.parametrize('model_type', sorted(CONFIGS))
+def test_bf16_inference_matches_fp32(data, model_type):
+    df, scaled = data
+    torch.manual_seed(0)
+    model = create_model(len(FEATURE_NAMES), CONFIGS[model_type]).eval()
+    fp32 = LSTMPredictor(model, None, seq_len=SEQ_LEN)
+    bf16 = LSTMPredictor(model, None, seq_len=SEQ_LEN, precision='bf16')
+
+    reference, probs = fp32.predict_batch(scaled), bf16.predict_batch(scaled)
+
+    assert bf16.precision == 'bf16'
+    assert probs.dtype == np.float32 and probs.shape == reference.shape
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, atol=1e-5)
+    assert np.abs(probs - reference).max() < PROBS_ATOL
+    assert (probs.argmax(axis=1) == reference.argmax(axis=1)).mean() >= 0.98
+
+
+def test_bf16_training_matches_fp32(data):
+    df, scaled = data
+    X, y = build_sequences(scaled, create_labels(df), seq_len=SEQ_LEN)
+    split = int(len(X) * 0.8)
+
+    results = {}
+    for precision in ('fp32', 'bf16'):
+        torch.manual_seed(0)
+        results[precision] = train_model(X[:split], y[:split], X[split:], y[split:],
+                                         model_config={'hidden_size': 32, 'num_layers': 1, 'fc_hidden': 16},
+                                         epochs=5, patience=5, precision=precision)
+
+    (_, fp32), (model, bf16) = results['fp32'], results['bf16']
+    # Gewichte und Loss bleiben fp32, nur die Matmuls laufen in bfloat16
+    assert all(p.dtype == torch.float32 for p in model.parameters())
+    np.testing.assert_allclose(bf16['train_loss'], fp32['train_loss'], rtol=1e-3)
+    np.testing.assert_allclose(bf16['val_loss'], fp32['val_loss'], rtol=1e-2)
+    assert abs(max(bf16['val_acc']) - max(fp32['val_acc'])) <= 0.05
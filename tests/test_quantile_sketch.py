@@ -0,0 +1,105 @@
+# tests/test_quantile_sketch.py
+# QuantileSketch: Rang-Fehler nach Kompression/Merge, save/load und Streaming-Scaler vs. FeatureScaler.fit
+import numpy as np
+import pytest
+
+from dbot.model.feature_engineering import FeatureScaler, compute_features
+from dbot.model.quantile_sketch import QuantileSketch, sketch_features, fit_scaler_streaming
+from conftest import make_ohlcv
+
+QS = [0.05, 0.25, 0.5, 0.75, 0.95]
+COMPRESSION = 200
+
+
+@pytest.fixture
+def shards():
+    """Drei Shards mit unterschiedlichen Verteilungen (Normal, schief, mit NaN)."""
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(20000, 3))
+    b = np.column_stack([rng.lognormal(size=15000), rng.normal(2, 3, 15000), rng.exponential(size=15000)])
+    c = rng.standard_t(3, size=(10000, 3))
+    c[::7, 1] = np.nan
+    return [a, b, c]
+
+
+def rank_error(values, estimates, qs):
+    """|empirischer Rang des Schätzwerts - q| je Quantil und Feature."""
+    errors = []
+    for j in range(values.shape[1]):
+        col = np.sort(values[~np.isnan(values[:, j]), j])
+        ranks = np.searchsorted(col, estimates[:, j]) / len(col)
+        errors.append(np.abs(ranks - qs))
+    return np.max(errors)
+
+
+def sketch_of(values):
+    return QuantileSketch(values.shape[1], COMPRESSION).update(values)
+
+
+def test_rank_error_bounded_by_compression(shards):
+    values = shards[0]
+    sketch = QuantileSketch(3, COMPRESSION)
+    for start in range(0, len(values), 3000):
+        sketch.update(values[start:start + 3000])
+
+    assert max(len(m) for m in sketch.means) <= COMPRESSION + 1
+    assert rank_error(values, sketch.quantiles(QS), np.array(QS)) <= 2.0 / COMPRESSION
+
+
+def test_merge_matches_concatenated_data(shards):
+    merged = sketch_of(shards[0]).merge(sketch_of(shards[1])).merge(sketch_of(shards[2]))
+    everything = np.concatenate(shards)
+
+    np.testing.assert_array_equal(merged.count, (~np.isnan(everything)).sum(axis=0))
+    assert rank_error(everything, merged.quantiles(QS), np.array(QS)) <= 2.0 / COMPRESSION
+    # Merge ≈ Sketch über die konkatenierten Daten
+    direct = sketch_of(everything).quantiles(QS)
+    spread = np.nanpercentile(everything, 95, axis=0) - np.nanpercentile(everything, 5, axis=0)
+    assert np.max(np.abs(merged.quantiles(QS) - direct) / spread) < 1e-2
+
+
+def test_exact_without_compression():
+    values = np.random.default_rng(1).normal(size=(500, 2))
+    sketch = QuantileSketch(2, compression=1000).update(values)
+    np.testing.assert_allclose(sketch.quantiles(QS), np.percentile(values, np.array(QS) * 100, axis=0),
+                               rtol=1e-12)
+
+
+def test_save_load_round_trip(shards, tmp_path):
+    sketch = sketch_of(shards[1])
+    path = str(tmp_path / 'sketch.npz')
+    sketch.save(path)
+
+    loaded = QuantileSketch.load(path)
+
+    assert loaded.feature_names == sketch.feature_names and loaded.compression == COMPRESSION
+    np.testing.assert_array_equal(loaded.quantiles(QS), sketch.quantiles(QS))
+    # Geladener Sketch bleibt mergebar
+    np.testing.assert_array_equal(loaded.merge(sketch_of(shards[2])).quantiles(QS),
+                                  sketch_of(shards[1]).merge(sketch_of(shards[2])).quantiles(QS))
+
+
+def test_streaming_scaler_matches_feature_scaler_fit():
+    frames = [compute_features(make_ohlcv(3000, seed=s, start_price=100.0 * (s + 1)), dtype=np.float64)
+              for s in range(3)]
+    values = np.concatenate([f.to_numpy() for f in frames])
+
+    exact = FeatureScaler.fit(values, dtype=np.float64)
+    streamed = fit_scaler_streaming(frames, compression=COMPRESSION, chunk_rows=1000, dtype=np.float64)
+    merged = sketch_features(frames[0], COMPRESSION)
+    for frame in frames[1:]:
+        merged.merge(sketch_features(frame, COMPRESSION))
+
+    for scaler in (streamed, merged.to_scaler(dtype=np.float64)):
+        assert scaler.feature_names == exact.feature_names
+        # Abweichung in Einheiten des exakten IQR (= Fehler der skalierten Werte)
+        assert np.max(np.abs(scaler.center - exact.center) / exact.scale) < 5e-3
+        assert np.max(np.abs(scaler.scale - exact.scale) / exact.scale) < 5e-3
+
+
+def test_default_compression_merged_quartiles():
+    values = np.random.default_rng(2).normal(size=(200000, 3))
+    merged = QuantileSketch(3).update(values[:100000]).merge(QuantileSketch(3).update(values[100000:]))
+
+    expected = np.percentile(values, [25, 50, 75], axis=0)
+    assert np.abs(merged.quantiles([0.25, 0.5, 0.75]) - expected).max() < 5e-4
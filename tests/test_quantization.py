@@ -0,0 +1,63 @@
+# tests/test_quantization.py
+# int8-Checkpoints: sicheres Laden (weights_only) und Übereinstimmung mit fp32
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from dbot.analysis.evaluation import backend_agreement_report
+from dbot.model.export import export_model, artifact_path, checkpoint_metadata
+from dbot.model.feature_engineering import compute_features, fit_scaler, save_scaler, FEATURE_NAMES
+from dbot.model.lstm_model import create_model
+from dbot.model.trainer import save_model, load_model, quant_state_path, QUANT_DYNAMIC_INT8
+
+SEQ_LEN = 30
+
+
+@pytest.fixture
+def files(tmp_path, ohlcv):
+    torch.manual_seed(0)
+    model = create_model(len(FEATURE_NAMES), {'hidden_size': 32, 'num_layers': 2, 'fc_hidden': 16})
+    model_path = str(tmp_path / 'TSTUSDTUSDT_4h.pt')
+    scaler_path = str(tmp_path / 'TSTUSDTUSDT_4h_scaler.npz')
+    save_model(model, model_path, metadata={'seq_len': SEQ_LEN, 'horizon_candles': 5, 'neutral_zone_pct': 0.3})
+    scaler, _ = fit_scaler(compute_features(ohlcv))
+    save_scaler(scaler, scaler_path)
+    return model_path, scaler_path
+
+
+def test_int8_artifact_keeps_checkpoint_weights_only(files):
+    model_path, _ = files
+    path = export_model(model_path, formats=('int8',))['int8']
+
+    # Checkpoint (Konfiguration + Metadaten) ohne Pickle lesbar, gepackte Gewichte separat
+    checkpoint = torch.load(path, map_location='cpu', weights_only=True)
+    assert checkpoint['quantization'] == QUANT_DYNAMIC_INT8
+    assert checkpoint['state_dict'] == {}
+    assert os.path.exists(quant_state_path(path))
+    assert checkpoint_metadata(path)['seq_len'] == SEQ_LEN
+
+    windows = torch.from_numpy(np.random.default_rng(0).normal(
+        size=(16, SEQ_LEN, len(FEATURE_NAMES))).astype(np.float32))
+    with torch.no_grad():
+        delta = (load_model(path).predict_proba(windows) - load_model(model_path).cpu().predict_proba(windows))
+    assert delta.abs().max() < 5e-3
+
+
+@pytest.mark.parametrize('exported', [True, False], ids=['artifact', 'on_load'])
+def test_int8_agreement_report(files, ohlcv, exported):
+    model_path, scaler_path = files
+    if exported:
+        export_model(model_path, formats=('int8',))
+        assert os.path.exists(artifact_path(model_path, 'int8'))
+
+    report = backend_agreement_report(model_path, scaler_path, ohlcv, backend='int8', seq_len=SEQ_LEN,
+                                      holdout=0.3)
+
+    assert report['backend'] == 'int8'
+    assert report['n'] > 100
+    assert report['argmax_agreement'] >= 0.98
+    assert report['signal_flip_rate'] <= 0.02
+    assert report['max_abs_delta'] < 5e-3
+    assert abs(report['accuracy'] - report['ref_accuracy']) <= 0.02
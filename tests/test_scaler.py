@@ -0,0 +1,70 @@
+# tests/test_scaler.py
+# FeatureScaler (.npz) vs. sklearn RobustScaler und Konvertierung alter .pkl-Scaler
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from dbot.model.feature_engineering import (
+    FeatureScaler, compute_features, fit_scaler, load_scaler, legacy_scaler_path, FEATURE_NAMES
+)
+
+sklearn_preprocessing = pytest.importorskip('sklearn.preprocessing')
+
+
+@pytest.fixture
+def features(ohlcv):
+    return compute_features(ohlcv, dtype=np.float64)
+
+
+def test_fit_matches_sklearn_robust_scaler(features):
+    values = features.to_numpy()
+    reference = sklearn_preprocessing.RobustScaler().fit(values)
+
+    scaler = FeatureScaler.fit(values, FEATURE_NAMES, dtype=np.float64)
+
+    np.testing.assert_allclose(scaler.center, reference.center_, rtol=1e-12)
+    np.testing.assert_allclose(scaler.scale, reference.scale_, rtol=1e-12)
+    np.testing.assert_allclose(scaler.transform(values), reference.transform(values), rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(scaler.inverse_transform(scaler.transform(values)), values, rtol=1e-10)
+
+
+def test_fit_scaler_float32_policy_close_to_sklearn(features):
+    reference = sklearn_preprocessing.RobustScaler().fit(features.to_numpy())
+
+    scaler, scaled = fit_scaler(features.astype(np.float32))
+
+    assert scaled.dtypes.eq(np.float32).all()
+    np.testing.assert_allclose(scaled.to_numpy(), reference.transform(features.to_numpy()), rtol=1e-4, atol=1e-5)
+
+
+def test_save_load_round_trip(features, tmp_path):
+    scaler = FeatureScaler.fit(features.to_numpy(), FEATURE_NAMES)
+    path = str(tmp_path / 'TST_scaler.npz')
+    scaler.save(path)
+
+    loaded = load_scaler(path)
+
+    assert loaded.feature_names == FEATURE_NAMES
+    np.testing.assert_array_equal(loaded.center, scaler.center)
+    np.testing.assert_array_equal(loaded.scale, scaler.scale)
+
+
+def test_legacy_pickle_is_converted(features, tmp_path):
+    values = features.to_numpy()
+    reference = sklearn_preprocessing.RobustScaler().fit(features)
+    path = str(tmp_path / 'models' / 'TST_scaler.npz')
+    os.makedirs(os.path.dirname(path))
+    with open(legacy_scaler_path(path), 'wb') as f:
+        pickle.dump(reference, f)
+
+    converted = load_scaler(path)
+
+    # Einmalig konvertiert: die .npz liegt daneben und lädt ohne Pickle identisch
+    assert os.path.exists(path)
+    reloaded = FeatureScaler.load(path)
+    assert converted.feature_names == reloaded.feature_names == FEATURE_NAMES
+    expected = reference.transform(features)
+    np.testing.assert_allclose(converted.transform(values), expected, rtol=1e-4, atol=1e-5)
+    np.testing.assert_array_equal(reloaded.transform(values), converted.transform(values))
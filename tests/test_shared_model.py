@@ -0,0 +1,77 @@
+# tests/test_shared_model.py
+# Gemeinsames Modell über mehrere Märkte: Batch über alle Märkte vs. Predictor je Markt
+import numpy as np
+import pytest
+import torch
+
+from dbot.model.feature_engineering import apply_scaler, compute_features, load_scaler
+from dbot.model.lstm_model import MARKET_COLUMNS
+from dbot.model.predictor import LSTMPredictor, shared_model_paths
+from dbot.model.shared import predict_markets, train_shared_model
+from dbot.model.trainer import load_model
+from conftest import make_ohlcv
+
+SEQ_LEN = 30
+MARKETS = [('BTC/USDT:USDT', '4h'), ('ETH/USDT:USDT', '4h'), ('ETH/USDT:USDT', '1h')]
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return {market: make_ohlcv(400, seed=i, start_price=100.0 * (i + 1)) for i, market in enumerate(MARKETS)}
+
+
+@pytest.fixture(scope='module')
+def trained(frames, tmp_path_factory):
+    models_dir = str(tmp_path_factory.mktemp('models'))
+    torch.manual_seed(0)
+    model, history, per_market = train_shared_model(
+        frames, models_dir, seq_len=SEQ_LEN, model_config={'hidden_size': 16, 'num_layers': 1, 'fc_hidden': 8},
+        epochs=1)
+    return models_dir, model.eval(), per_market
+
+
+def latest_window(models_dir, market, df):
+    scaler = load_scaler(shared_model_paths(models_dir, *market)[1])
+    return apply_scaler(compute_features(df), scaler).to_numpy()[-SEQ_LEN:]
+
+
+def test_one_checkpoint_and_scaler_per_market(trained):
+    models_dir, model, per_market = trained
+
+    assert set(per_market) == set(MARKETS)
+    loaded = load_model(shared_model_paths(models_dir, *MARKETS[0])[0])
+    assert loaded.model_type == 'shared'
+    assert loaded.symbols == ['BTC/USDT:USDT', 'ETH/USDT:USDT'] and loaded.timeframes == ['1h', '4h']
+    assert loaded.n_features == model.n_features
+
+
+def test_batched_markets_match_per_market_predictor(trained, frames):
+    models_dir, model, _ = trained
+    windows = {market: latest_window(models_dir, market, df) for market, df in frames.items()}
+
+    batched = predict_markets(model, windows)
+
+    for market, df in frames.items():
+        predictor = LSTMPredictor.from_files(*shared_model_paths(models_dir, *market), SEQ_LEN,
+                                             shared=True, market=market)
+        np.testing.assert_allclose(batched[market], predictor.predict(df), atol=1e-6)
+
+
+def test_embeddings_distinguish_markets(trained):
+    _, model, _ = trained
+    generator = torch.Generator().manual_seed(0)
+    features = torch.randn(1, SEQ_LEN, model.n_features - len(MARKET_COLUMNS), generator=generator)
+
+    with torch.no_grad():
+        probs = [model.bind(*market).predict_proba(features) for market in MARKETS]
+
+    assert not torch.allclose(probs[0], probs[1])
+    assert not torch.allclose(probs[1], probs[2])
+
+
+def test_unknown_market_raises(trained):
+    models_dir, model, _ = trained
+    with pytest.raises(ValueError):
+        model.market_index('SOL/USDT:USDT', '4h')
+    with pytest.raises(ValueError):
+        LSTMPredictor.from_files(*shared_model_paths(models_dir, *MARKETS[0]), SEQ_LEN, shared=True)
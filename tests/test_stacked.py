@@ -0,0 +1,70 @@
+# tests/test_stacked.py
+# Gestapelte Inference (K Modelle in einem Aufruf) vs. einzelne LSTMPredictor
+import numpy as np
+import pytest
+import torch
+
+from dbot.model.feature_engineering import compute_features, fit_scaler, FEATURE_NAMES
+from dbot.model.lstm_model import create_model
+from dbot.model.predictor import LSTMPredictor
+from dbot.model.stacked import StackedPredictor, predict_batch_many, stack_key
+from dbot.model.trainer import DEVICE
+from conftest import make_ohlcv
+
+SEQ_LEN = 30
+CONFIGS = {
+    'lstm': {'hidden_size': 16, 'num_layers': 2, 'fc_hidden': 8},
+    'tcn': {'model_type': 'tcn', 'channels': 8, 'levels': 3, 'fc_hidden': 8},
+}
+
+
+@pytest.fixture(scope='module')
+def frames():
+    # Unterschiedliche Längen: predict_batch füllt je Batch auf und kürzt danach
+    return [fit_scaler(compute_features(make_ohlcv(n, seed=n)))[1] for n in (300, 360, 420)]
+
+
+def predictors(model_type, k=3, seed=0):
+    result = []
+    for i in range(k):
+        torch.manual_seed(seed + i)
+        model = create_model(len(FEATURE_NAMES), CONFIGS[model_type]).to(DEVICE).eval()
+        result.append(LSTMPredictor(model, None, seq_len=SEQ_LEN))
+    return result
+
+
+@pytest.mark.parametrize('model_type', sorted(CONFIGS))
+def test_stacked_matches_individual(frames, model_type):
+    group = predictors(model_type)
+    stacked = StackedPredictor(group)
+    expected = [p.predict_batch(df) for p, df in zip(group, frames)]
+
+    per_model = stacked.predict_batch(frames, batch_size=64)
+    latest = stacked.predict_latest(frames)
+
+    assert len(stacked) == len(group)
+    for probs, reference in zip(per_model, expected):
+        assert probs.shape == reference.shape
+        np.testing.assert_allclose(probs, reference, atol=1e-5)
+    # Letztes Fenster inkl. der jüngsten Kerze (predict_batch endet eine Kerze davor)
+    for p, df, probs in zip(group, frames, latest):
+        window = torch.from_numpy(df[FEATURE_NAMES].to_numpy(dtype=np.float32)[-SEQ_LEN:][None]).to(DEVICE)
+        with torch.no_grad():
+            np.testing.assert_allclose(probs, p.model.predict_proba(window)[0].cpu().numpy(), atol=1e-5)
+
+
+def test_mixed_architectures_are_rejected():
+    mixed = predictors('lstm', k=1) + predictors('tcn', k=1)
+    assert stack_key(mixed[0]) != stack_key(mixed[1])
+    with pytest.raises(ValueError):
+        StackedPredictor(mixed)
+
+
+def test_predict_batch_many_groups_by_architecture(frames):
+    group = [*predictors('lstm', k=2), *predictors('tcn', k=1), *predictors('lstm', k=1, seed=10)]
+    dfs = [frames[0], frames[1], frames[2], frames[2]]
+
+    results = predict_batch_many(group, dfs, enabled=True)
+
+    for p, df, probs in zip(group, dfs, results):
+        np.testing.assert_allclose(probs, p.predict_batch(df), atol=1e-5)
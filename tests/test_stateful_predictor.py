@@ -0,0 +1,58 @@
+# tests/test_stateful_predictor.py
+# Live-Zustand (h, c) zustandsbehafteter Modelle: Wiederverwendung und Reset nach Retrain
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from dbot.model.feature_engineering import compute_features, fit_scaler, save_scaler, FEATURE_NAMES
+from dbot.model.lstm_model import create_model
+from dbot.model.predictor import LSTMPredictor
+from dbot.model.trainer import save_model
+
+SEQ_LEN = 30
+
+
+def save_stateful(path, seed):
+    torch.manual_seed(seed)
+    model = create_model(len(FEATURE_NAMES), {'hidden_size': 16, 'num_layers': 1, 'fc_hidden': 8})
+    save_model(model, path, metadata={'seq_len': SEQ_LEN, 'stateful': True})
+
+
+@pytest.fixture
+def files(tmp_path, ohlcv):
+    model_path = str(tmp_path / 'models' / 'TSTUSDTUSDT_4h.pt')
+    scaler_path = str(tmp_path / 'models' / 'TSTUSDTUSDT_4h_scaler.npz')
+    save_stateful(model_path, seed=0)
+    scaler, _ = fit_scaler(compute_features(ohlcv))
+    save_scaler(scaler, scaler_path)
+    return model_path, scaler_path, str(tmp_path / 'state' / 'TSTUSDTUSDT_4h_features.json')
+
+
+def load(files, state=True):
+    model_path, scaler_path, state_path = files
+    return LSTMPredictor.from_files(model_path, scaler_path, SEQ_LEN, feature_state_path=state_path if state else None)
+
+
+def test_state_is_reused_for_same_checkpoint(files, ohlcv):
+    load(files).predict(ohlcv.iloc[:-1])
+    predictor = load(files)
+
+    assert predictor.stateful
+    assert predictor._load_lstm_state() is not None
+    predictor.predict(ohlcv)
+
+
+def test_state_is_reset_after_retrain(files, ohlcv):
+    load(files).predict(ohlcv.iloc[:-1])
+    model_path = files[0]
+    mtime = os.stat(model_path).st_mtime_ns
+    save_stateful(model_path, seed=1)
+    os.utime(model_path, ns=(mtime + 10**9, mtime + 10**9))
+
+    predictor = load(files)
+    probs = predictor.predict(ohlcv)
+
+    # Gespeichertes (h, c) stammt vom alten Modell → Aufwärmen wie ohne State-Datei
+    np.testing.assert_allclose(probs, load(files, state=False).predict(ohlcv), atol=1e-6)
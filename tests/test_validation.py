@@ -0,0 +1,89 @@
+# tests/test_validation.py
+# Blockweise Validierung in train_model: gleiche Metriken wie ein Forward über alle Fenster
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+from dbot.model.dataset import WindowDataset
+from dbot.model.feature_engineering import compute_features, create_labels, create_label_grid, fit_scaler
+from dbot.model.lstm_model import create_model
+from dbot.model.trainer import _validate, train_model
+from conftest import make_ohlcv
+
+SEQ_LEN = 20
+HEAD_KEYS = [[5, 0.3], [10, 0.3]]
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = make_ohlcv(500, seed=2)
+    _, scaled = fit_scaler(compute_features(df))
+    return df, scaled
+
+
+def reference_metrics(model, X, y, class_weights):
+    """Ein Forward über alle Fenster: klassen-gewichteter Loss je Kopf, Confusion per np.add.at."""
+    with torch.no_grad():
+        logits = model.forward_all(torch.from_numpy(X)) if y.ndim == 2 else model(torch.from_numpy(X))
+    logits = logits.view(len(X), -1, 3)
+    y_heads = y.reshape(len(X), -1)
+    loss = sum(nn.CrossEntropyLoss(weight=class_weights[i])(logits[:, i], torch.from_numpy(y_heads[:, i]))
+               for i in range(y_heads.shape[1]))
+    confusion = np.zeros((y_heads.shape[1], 3, 3), dtype=np.int64)
+    for i in range(y_heads.shape[1]):
+        np.add.at(confusion[i], (y_heads[:, i], logits[:, i].argmax(dim=-1).numpy()), 1)
+    return loss.item(), confusion
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 64, 10_000])
+@pytest.mark.parametrize('multi_head', [False, True], ids=['single', 'multihead'])
+def test_chunked_validate_matches_single_forward(data, chunk, multi_head):
+    df, scaled = data
+    labels = create_label_grid(df, [5, 10], [0.3]) if multi_head else create_labels(df)
+    dataset = WindowDataset.from_frames(scaled, labels, seq_len=SEQ_LEN)
+    X = dataset.windows(np.arange(len(dataset))).astype(np.float32)
+    y = dataset.targets
+    torch.manual_seed(0)
+    config = {'hidden_size': 16, 'num_layers': 1, 'fc_hidden': 8}
+    model = create_model(X.shape[2], {**config, 'model_type': 'multihead', 'head_keys': HEAD_KEYS}
+                         if multi_head else config).eval()
+
+    # Deutlich ungleiche Gewichte: Mittel über Gewichte ≠ Mittel über Fenster
+    class_weights = torch.tensor([[0.5, 3.0, 1.0], [2.0, 0.7, 1.3]])[:len(HEAD_KEYS) if multi_head else 1]
+
+    def compute_logits(X_batch):
+        return model.forward_all(X_batch) if multi_head else model(X_batch)
+
+    expected_loss, expected_confusion = reference_metrics(model, X, y, class_weights)
+    with torch.no_grad():
+        loss, confusion = _validate(compute_logits, class_weights, X, y, chunk=chunk)
+        lazy_loss, lazy_confusion = _validate(compute_logits, class_weights, dataset, y, chunk=chunk)
+
+    np.testing.assert_array_equal(confusion.numpy(), expected_confusion)
+    np.testing.assert_array_equal(lazy_confusion.numpy(), expected_confusion)
+    assert confusion.sum() == len(y) * (len(HEAD_KEYS) if multi_head else 1)
+    assert loss == pytest.approx(expected_loss, rel=1e-5)
+    assert lazy_loss == pytest.approx(expected_loss, rel=1e-5)
+
+
+def test_val_batch_size_does_not_change_training(data):
+    df, scaled = data
+    dataset = WindowDataset.from_frames(scaled, create_labels(df), seq_len=SEQ_LEN)
+    split = int(len(dataset) * 0.8)
+    X = dataset.windows(np.arange(len(dataset))).astype(np.float32)
+    y = dataset.targets
+
+    histories = []
+    for val_batch_size in (13, 4096):
+        torch.manual_seed(0)
+        _, history = train_model(X[:split], y[:split], X[split:], y[split:],
+                                 model_config={'hidden_size': 16, 'num_layers': 1, 'fc_hidden': 8},
+                                 epochs=3, patience=3, val_batch_size=val_batch_size)
+        histories.append(history)
+
+    small, full = histories
+    assert small['val_acc'] == full['val_acc']
+    assert small['val_confusion'] == full['val_confusion']
+    np.testing.assert_allclose(small['val_loss'], full['val_loss'], rtol=1e-5)
+    np.testing.assert_allclose(small['train_loss'], full['train_loss'], rtol=1e-6)
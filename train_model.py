@@ -15,11 +15,18 @@ sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from dbot.model.feature_engineering import (
     compute_features, create_labels, build_sequences,
-    fit_scaler, apply_scaler, save_scaler, FEATURE_NAMES
+    fit_scaler, apply_scaler, save_scaler, load_scaler, scaler_exists, set_feature_dtype, FEATURE_NAMES
 )
-from dbot.model.trainer import train_model, save_model
+from dbot.model.lstm_model import CLI_MODEL_TYPES
+from dbot.model.trainer import (
+    train_model, train_stateful_model, save_model, load_model, distill_model, PRECISIONS
+)
+from dbot.model.export import checkpoint_metadata
+from dbot.analysis.evaluation import prediction_accuracy, distillation_report
+from dbot.model.dataset import WindowDataset
+from dbot.model.quantile_sketch import fit_scaler_streaming
 from dbot.analysis.backtester import run_backtest
-from dbot.model.predictor import LSTMPredictor
+from dbot.model.predictor import LSTMPredictor, student_path
 
 logging.basicConfig(
     level=logging.INFO,
@@ -67,6 +74,80 @@ def load_data_from_exchange(symbol, timeframe, limit=3000):
     return df
 
 
+def kept_validation(history):
+    """
+    Val-Metriken der Gewichte, die train_model behalten hat: beste Epoche bzw. beim Warm-Start
+    die Start-Gewichte, wenn keine Epoche sie übertroffen hat (train_model übernimmt nur bei >).
+
+    Returns:
+        dict mit best_val_acc sowie val_loss/val_confusion (falls im History vorhanden)
+    """
+    best_epoch = int(np.argmax(history['val_acc']))
+    if history.get('initial_val_acc', -1.0) >= history['val_acc'][best_epoch]:
+        kept = {'best_val_acc': history['initial_val_acc']}
+        if 'initial_val_confusion' in history:
+            kept.update(val_loss=history['initial_val_loss'], val_confusion=history['initial_val_confusion'])
+        return kept
+    kept = {'best_val_acc': history['val_acc'][best_epoch]}
+    if 'val_confusion' in history:
+        # Loss + Confusion der besten Epoche (fallen in der blockweisen Validierung ohne Extra-Durchlauf an)
+        kept.update(val_loss=history['val_loss'][best_epoch], val_confusion=history['val_confusion'][best_epoch])
+    return kept
+
+
+def make_windows(scaled_df, labels, seq_len, lazy=False):
+    """Fenster (X, y) wie build_sequences bzw. als WindowDataset (lazy, y=None)."""
+    if lazy:
+        return WindowDataset.from_frames(scaled_df, labels, seq_len=seq_len), None
+    return build_sequences(scaled_df, labels, seq_len=seq_len)
+
+
+def finetune_windows(scaled_train, labels_train, trained_until, seq_len, replay_ratio=1.0, lazy=False, seed=0):
+    """
+    Trainings-Fenster für den Warm-Start: alle Fenster, deren Label-Kerze nach trained_until
+    liegt, plus eine zufällige Replay-Stichprobe (replay_ratio je neuem Fenster) aus den
+    älteren Fenstern, damit frühere Marktphasen nicht vergessen werden.
+
+    Returns:
+        (X, y, n_new, n_replay)
+    """
+    k = int(scaled_train.index.searchsorted(trained_until, side='right'))
+    start = max(k - seq_len, 0)  # Kontext vor der ersten neuen Kerze
+    X_new, y_new = make_windows(scaled_train.iloc[start:], labels_train.iloc[start:], seq_len, lazy)
+    X_old, y_old = make_windows(scaled_train.iloc[:k], labels_train.iloc[:k], seq_len, lazy)
+    n_replay = min(len(X_old), int(round(replay_ratio * len(X_new))))
+    idx = np.sort(np.random.default_rng(seed).choice(len(X_old), n_replay, replace=False))
+    if lazy:
+        return WindowDataset.concat([X_new, X_old.subset(idx)]), None, len(X_new), n_replay
+    return np.concatenate([X_new, X_old[idx]]), np.concatenate([y_new, y_old[idx]]), len(X_new), n_replay
+
+
+def load_finetune_base(model_path, scaler_path, args):
+    """
+    Bestehendes Modell + Scaler für --finetune, wenn der Checkpoint zu den Trainings-Argumenten
+    passt – sonst None (Grund im Log), dann wird voll trainiert.
+    """
+    if not os.path.exists(model_path) or not scaler_exists(scaler_path):
+        logger.info("Kein bestehendes Modell – volles Training statt Warm-Start.")
+        return None
+    meta = checkpoint_metadata(model_path)
+    model = load_model(model_path)
+    mismatches = [
+        (meta.get('trained_until') is None, "Checkpoint ohne trained_until"),
+        (meta.get('stateful', False), "zustandsbehaftetes Modell"),
+        (model.model_type != args.model_type, f"model_type {model.model_type} statt {args.model_type}"),
+        (meta.get('seq_len') != args.seq_len, f"seq_len {meta.get('seq_len')} statt {args.seq_len}"),
+        (meta.get('horizon_candles') != args.horizon or meta.get('neutral_zone_pct') != args.neutral_zone,
+         "andere Label-Parameter (horizon / neutral_zone)"),
+        (meta.get('feature_names') != FEATURE_NAMES, "anderes Feature-Schema"),
+    ]
+    for mismatch, reason in mismatches:
+        if mismatch:
+            logger.info(f"Warm-Start nicht möglich ({reason}) – volles Training.")
+            return None
+    return model, load_scaler(scaler_path)
+
+
 def main():
     os.makedirs(os.path.join(PROJECT_ROOT, 'logs'), exist_ok=True)
 
@@ -78,11 +159,51 @@ def main():
     parser.add_argument('--neutral-zone', type=float, default=0.3, help="Neutrale Zone in %")
     parser.add_argument('--epochs', type=int, default=50, help="Training-Epochen")
     parser.add_argument('--batch-size', type=int, default=64, help="Batch-Größe")
+    parser.add_argument('--drop-last', action='store_true',
+                        help="Unvollständigen letzten Trainings-Batch je Epoche verwerfen")
+    parser.add_argument('--val-batch-size', type=int, default=1024,
+                        help="Fenster je Validierungs-Forward (begrenzt den Speicher bei langen Val-Perioden)")
     parser.add_argument('--lr', type=float, default=1e-3, help="Lernrate")
     parser.add_argument('--val-split', type=float, default=0.15, help="Validierungs-Anteil")
     parser.add_argument('--data-file', type=str, help="Lokale CSV-Datei statt Exchange")
     parser.add_argument('--limit', type=int, default=3000, help="Anzahl Kerzen von Exchange")
+    parser.add_argument('--lazy-windows', action='store_true',
+                        help="Fenster pro Batch bilden statt X komplett im RAM zu halten (große Datensätze)")
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default=None,
+                        help="Dtype für Features/Scaler/Fenster (Standard: DBOT_FEATURE_DTYPE bzw. float32)")
+    parser.add_argument('--model-type', choices=sorted(CLI_MODEL_TYPES), default='lstm',
+                        help="Architektur: lstm (rekurrent) oder tcn (kausale Faltungen, parallel über die Zeit)")
+    parser.add_argument('--stateful', action='store_true',
+                        help="Zustandsbehaftete Variante (Truncated BPTT, ein LSTM-Schritt pro Kerze)")
+    parser.add_argument('--tbptt-len', type=int, default=100, help="Segment-Länge für Truncated BPTT")
+    parser.add_argument('--streams', type=int, default=32, help="Parallele Teilreihen beim Stateful-Training")
+    parser.add_argument('--distill', action='store_true',
+                        help="Nach dem Training ein kleines Student-Modell destillieren (<name>.student.pt)")
+    parser.add_argument('--student-hidden', type=int, default=32, help="Hidden-Größe des Student-Modells")
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp32',
+                        help="bf16 = Training unter Autocast (bfloat16-Matmuls, Loss in fp32)")
+    parser.add_argument('--streaming-scaler', action='store_true',
+                        help="Scaler chunkweise über Quantil-Sketch fitten (beschränkter Speicher)")
+    parser.add_argument('--finetune', action='store_true',
+                        help="Bestehendes Modell + Scaler weitertrainieren (neue Kerzen + Replay) statt neu "
+                             "zu trainieren; volles Training als Fallback")
+    parser.add_argument('--finetune-epochs', type=int, default=5, help="Epochen beim Warm-Start")
+    parser.add_argument('--finetune-lr', type=float, default=2e-4, help="Lernrate beim Warm-Start")
+    parser.add_argument('--replay-ratio', type=float, default=1.0,
+                        help="Ältere Fenster (Replay) je neuem Fenster beim Warm-Start")
+    parser.add_argument('--max-degradation', type=float, default=0.02,
+                        help="Max. Verlust an Val Accuracy gegenüber dem bisherigen Modell, sonst volles Training")
     args = parser.parse_args()
+    if args.dtype:
+        set_feature_dtype(args.dtype)
+    if args.stateful and args.model_type != 'lstm':
+        parser.error("--stateful ist nur mit --model-type lstm möglich")
+    if args.stateful and args.distill:
+        parser.error("--distill ist nur für Fenster-Modelle möglich (nicht mit --stateful)")
+    if args.stateful and args.precision != 'fp32':
+        parser.error("--precision bf16 ist nur für Fenster-Modelle möglich (nicht mit --stateful)")
+    if args.stateful and args.finetune:
+        parser.error("--finetune ist nur für Fenster-Modelle möglich (nicht mit --stateful)")
 
     symbol = args.symbol
     timeframe = args.timeframe
@@ -90,8 +211,9 @@ def main():
 
     logger.info(f"{'='*60}")
     logger.info(f"  dbot LSTM Training: {symbol} ({timeframe})")
-    logger.info(f"  seq_len={args.seq_len} | horizon={args.horizon} | neutral_zone={args.neutral_zone}%")
-    logger.info(f"  epochs={args.epochs} | batch_size={args.batch_size} | lr={args.lr}")
+    logger.info(f"  seq_len={args.seq_len} | horizon={args.horizon} | neutral_zone={args.neutral_zone}% | "
+                f"model_type={args.model_type}")
+    logger.info(f"  epochs={args.epochs} | batch_size={args.batch_size} | lr={args.lr} | precision={args.precision}")
     logger.info(f"{'='*60}")
 
     # 1. Daten laden
@@ -138,41 +260,133 @@ def main():
 
     logger.info(f"Split: Train={len(feature_train)} | Val={len(feature_val)} | Test={len(feature_test)}")
 
-    # 5. Scaler fitten (nur auf Trainingsdaten!)
-    logger.info("Fitte RobustScaler auf Trainingsdaten...")
-    scaler, scaled_train = fit_scaler(feature_train)
-    scaled_val = apply_scaler(feature_val, scaler)
-
-    # 6. Sequenzen erstellen
-    logger.info(f"Erstelle Sliding-Window-Sequenzen (seq_len={args.seq_len})...")
-    X_train, y_train = build_sequences(scaled_train, labels_train, seq_len=args.seq_len)
-    X_val, y_val = build_sequences(scaled_val, labels_val, seq_len=args.seq_len)
-
-    logger.info(f"Train: X={X_train.shape}, y={y_train.shape}")
-    logger.info(f"Val:   X={X_val.shape}, y={y_val.shape}")
-
-    if len(X_train) < 50 or len(X_val) < 10:
-        logger.error("Zu wenig Sequenzen für Training. Mehr Daten oder kleineres seq_len verwenden.")
-        sys.exit(1)
-
-    # 7. Modell trainieren
-    logger.info("Starte LSTM-Training...")
-    model, history = train_model(
-        X_train, y_train, X_val, y_val,
-        model_config={'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2, 'fc_hidden': 64},
-        epochs=args.epochs,
-        batch_size=args.batch_size,
-        lr=args.lr,
-        patience=15,
-    )
+    models_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'models')
+    model_path = os.path.join(models_dir, f"{safe_name}.pt")
+    scaler_path = os.path.join(models_dir, f"{safe_name}_scaler.npz")
+    previous = checkpoint_metadata(model_path) if os.path.exists(model_path) else {}
+    training_info = {'training_mode': 'full'}
+
+    # 4b. Warm-Start: bestehendes Modell + Scaler auf den neuen Kerzen (plus Replay) weitertrainieren
+    model = None
+    base = load_finetune_base(model_path, scaler_path, args) if args.finetune else None
+    if base is not None:
+        base_model, scaler = base
+        scaled_train = apply_scaler(feature_train, scaler)
+        scaled_val = apply_scaler(feature_val, scaler)
+        X_train, y_train, n_new, n_replay = finetune_windows(
+            scaled_train, labels_train, pd.Timestamp(previous['trained_until']), args.seq_len,
+            args.replay_ratio, args.lazy_windows)
+        X_val, y_val = make_windows(scaled_val, labels_val, args.seq_len, args.lazy_windows)
+        logger.info(f"Warm-Start ab {previous['trained_until']}: {n_new} neue Fenster + {n_replay} Replay | "
+                    f"Val: {len(X_val)} Fenster")
+        if n_new == 0 or len(X_val) < 10:
+            logger.warning("Keine neuen Trainings-Fenster bzw. zu wenig Validierung – volles Training.")
+        else:
+            model, history = train_model(
+                X_train, y_train, X_val, y_val,
+                epochs=args.finetune_epochs,
+                batch_size=args.batch_size,
+                lr=args.finetune_lr,
+                patience=args.finetune_epochs,
+                precision=args.precision,
+                drop_last=args.drop_last,
+                val_batch_size=args.val_batch_size,
+                init_model=base_model,
+            )
+            # Fallback, wenn das Modell auf der aktuellen Val-Periode deutlich unter seiner letzten
+            # Val Accuracy liegt (Regime-Wechsel: Weitertrainieren reicht nicht mehr)
+            reference = previous.get('best_val_acc', 0.0)
+            kept_acc = kept_validation(history)['best_val_acc']
+            if kept_acc < reference - args.max_degradation:
+                logger.warning(f"Val Accuracy nach Warm-Start {kept_acc:.4f} < "
+                               f"{reference:.4f} - {args.max_degradation} – volles Training.")
+                model = None
+            else:
+                train_size, val_size = len(X_train), len(X_val)
+                training_info = {
+                    'training_mode': 'finetune',
+                    'finetune_new_windows': n_new,
+                    'finetune_replay_windows': n_replay,
+                    'initial_val_acc': history['initial_val_acc'],
+                }
+
+    if model is None:
+        # 5. Scaler fitten (nur auf Trainingsdaten!)
+        logger.info("Fitte RobustScaler auf Trainingsdaten...")
+        if args.streaming_scaler:
+            scaler = fit_scaler_streaming(feature_train)
+            scaled_train = apply_scaler(feature_train, scaler)
+        else:
+            scaler, scaled_train = fit_scaler(feature_train)
+        scaled_val = apply_scaler(feature_val, scaler)
+
+        model_config = {'model_type': args.model_type, 'hidden_size': 128, 'num_layers': 2, 'dropout': 0.2,
+                        'fc_hidden': 64}
+
+        if args.stateful:
+            # 6./7. Zustandsbehaftet: zusammenhängende Reihen statt Fenster (Truncated BPTT)
+            logger.info(f"Starte Stateful-Training (TBPTT={args.tbptt_len}, Streams={args.streams}, "
+                        f"Burn-in={args.seq_len})...")
+            model, history = train_stateful_model(
+                scaled_train.to_numpy(), labels_train.to_numpy(), scaled_val.to_numpy(), labels_val.to_numpy(),
+                model_config=model_config,
+                epochs=args.epochs,
+                n_streams=args.streams,
+                segment_len=args.tbptt_len,
+                burn_in=args.seq_len,
+                lr=args.lr,
+                patience=15,
+            )
+            train_size, val_size = len(scaled_train), len(scaled_val)
+
+            # Vergleich mit dem bisherigen Fenster-Modell auf denselben Validierungs-Zeilen
+            feature_train_val = feature_df.iloc[:test_split_idx]
+            stateful_acc = prediction_accuracy(LSTMPredictor(model, scaler, args.seq_len, stateful=True),
+                                               feature_train_val, aligned_labels, start=val_split_idx)
+            logger.info(f"Val Accuracy stateful (stream): {stateful_acc['accuracy']:.4f} ({stateful_acc['n']} Kerzen)")
+            if (os.path.exists(model_path) and scaler_exists(scaler_path)
+                    and not checkpoint_metadata(model_path).get('stateful')):
+                windowed = LSTMPredictor(load_model(model_path), load_scaler(scaler_path), args.seq_len)
+                windowed_acc = prediction_accuracy(windowed, feature_train_val, aligned_labels, start=val_split_idx)
+                logger.info(f"Val Accuracy Fenster-Modell (bestehend): {windowed_acc['accuracy']:.4f} "
+                            f"({windowed_acc['n']} Kerzen)")
+        else:
+            # 6. Sequenzen erstellen
+            logger.info(f"Erstelle Sliding-Window-Sequenzen (seq_len={args.seq_len})...")
+            if args.lazy_windows:
+                X_train = WindowDataset.from_frames(scaled_train, labels_train, seq_len=args.seq_len)
+                X_val = WindowDataset.from_frames(scaled_val, labels_val, seq_len=args.seq_len)
+                y_train = y_val = None
+                logger.info(f"Train: {len(X_train)} Fenster (lazy, statt {X_train.nbytes_materialized() / 1e6:.0f} MB)")
+                logger.info(f"Val:   {len(X_val)} Fenster (lazy)")
+            else:
+                X_train, y_train = build_sequences(scaled_train, labels_train, seq_len=args.seq_len)
+                X_val, y_val = build_sequences(scaled_val, labels_val, seq_len=args.seq_len)
+                logger.info(f"Train: X={X_train.shape}, y={y_train.shape}")
+                logger.info(f"Val:   X={X_val.shape}, y={y_val.shape}")
+
+            if len(X_train) < 50 or len(X_val) < 10:
+                logger.error("Zu wenig Sequenzen für Training. Mehr Daten oder kleineres seq_len verwenden.")
+                sys.exit(1)
+
+            # 7. Modell trainieren
+            logger.info("Starte LSTM-Training...")
+            model, history = train_model(
+                X_train, y_train, X_val, y_val,
+                model_config=model_config,
+                epochs=args.epochs,
+                batch_size=args.batch_size,
+                lr=args.lr,
+                patience=15,
+                precision=args.precision,
+                drop_last=args.drop_last,
+                val_batch_size=args.val_batch_size,
+            )
+            train_size, val_size = len(X_train), len(X_val)
 
     # 8. Modell + Scaler speichern
-    models_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'models')
     os.makedirs(models_dir, exist_ok=True)
 
-    model_path = os.path.join(models_dir, f"{safe_name}.pt")
-    scaler_path = os.path.join(models_dir, f"{safe_name}_scaler.pkl")
-
     metadata = {
         'symbol': symbol,
         'timeframe': timeframe,
@@ -181,9 +395,15 @@ def main():
         'neutral_zone_pct': args.neutral_zone,
         'n_features': len(FEATURE_NAMES),
         'feature_names': FEATURE_NAMES,
-        'train_size': len(X_train),
-        'val_size': len(X_val),
-        'best_val_acc': max(history['val_acc']),
+        'train_size': train_size,
+        'val_size': val_size,
+        'stateful': args.stateful,
+        'precision': args.precision,
+        # Letzte Trainings-Kerze: der nächste Warm-Start trainiert ab hier (--finetune)
+        'trained_until': str(feature_train.index[-1]),
+        'version': previous.get('version', 1 if previous else 0) + 1,
+        **training_info,
+        **kept_validation(history),
     }
 
     save_model(model, model_path, metadata=metadata)
@@ -192,11 +412,37 @@ def main():
     logger.info(f"Modell gespeichert: {model_path}")
     logger.info(f"Scaler gespeichert: {scaler_path}")
 
+    # 8b. Optional: kleines Student-Modell auf den weichen Teacher-Wahrscheinlichkeiten
+    if args.distill:
+        logger.info(f"Destilliere Student-Modell (hidden={args.student_hidden}, 1 Layer)...")
+        student, _ = distill_model(model, X_train, X_val, student_config={'hidden_size': args.student_hidden},
+                                   epochs=args.epochs)
+        report = distillation_report(model, student, X_val, y_val)
+        save_model(student, student_path(model_path), metadata={
+            **metadata,
+            'distilled_from': os.path.basename(model_path),
+            'teacher_agreement': report['argmax_agreement'],
+            'signal_flip_rate': report['signal_flip_rate'],
+            'best_val_acc': report['accuracy'],
+        })
+        logger.info(f"Student gespeichert: {student_path(model_path)}")
+        logger.info(f"  Übereinstimmung mit Teacher (Val): {report['argmax_agreement']*100:.2f}% | "
+                    f"Signal-Flips: {report['signal_flip_rate']*100:.2f}% | "
+                    f"Max |Δp|: {report['max_abs_delta']:.4f}")
+        logger.info(f"  Val Accuracy Teacher/Student: {report['ref_accuracy']:.4f} / {report['accuracy']:.4f}")
+
     # 9. Zusammenfassung
-    best_val_acc = max(history['val_acc'])
+    best_val_acc = metadata['best_val_acc']
     logger.info(f"\n{'='*60}")
     logger.info(f"  Training abgeschlossen!")
     logger.info(f"  Beste Val Accuracy: {best_val_acc:.4f} ({best_val_acc*100:.1f}%)")
+    if 'val_confusion' in metadata:
+        confusion = np.asarray(metadata['val_confusion'])
+        recall = confusion.diagonal() / np.maximum(confusion.sum(axis=1), 1)
+        class_precision = confusion.diagonal() / np.maximum(confusion.sum(axis=0), 1)
+        for i, name in enumerate(('LONG', 'NEUTRAL', 'SHORT')):
+            logger.info(f"  {name:<8} Recall: {recall[i]:.3f} | Precision: {class_precision[i]:.3f} | "
+                        f"Val-Fenster: {confusion[i].sum()}")
     logger.info(f"  Modell:  {model_path}")
     logger.info(f"  Scaler:  {scaler_path}")
     logger.info(f"\n  Nächster Schritt:")